@@ -1,4 +1,5 @@
 # config.py
+import os
 from pathlib import Path
 from datetime import datetime
 
@@ -14,28 +15,84 @@ OUTPUT_DIR = BASE_DIR / "output" / TIMESTAMP
 PROMPT_DIR = BASE_DIR / "prompts"
 LOG_DIR = OUTPUT_DIR / "logs"
 ANALYSIS_DIR = OUTPUT_DIR / "analysis"
+CACHE_DIR = BASE_DIR / "cache"  # poza TIMESTAMP — cache przetrwa między runami
+
+# Format tabel pośrednich (etykietowane aspekty, recenzje): "parquet" (pyarrow, typy i kolumny słownikowe) lub "csv"
+TABLE_FORMAT = "parquet"
+TABLE_SUFFIX = ".parquet" if TABLE_FORMAT == "parquet" else ".csv"
 
 # 4. Ścieżki do plików
 PATHS = {
     "raw_reviews": INPUT_DIR / "105600_20250209173825.json",
     "sentence_prompt": PROMPT_DIR / "prompt_extract.txt",
+    "sentence_batch_prompt": PROMPT_DIR / "prompt_extract_batch.txt",
     "label_prompt": PROMPT_DIR / "prompt_label.txt",
+    "label_batch_prompt": PROMPT_DIR / "prompt_label_batch.txt",
+    "label_seeds": PROMPT_DIR / "label_seeds.json",
+    "label_lexicon": PROMPT_DIR / "label_lexicon.json",  # None wyłącza szybką ścieżkę leksykonu
     "sentence_output": OUTPUT_DIR / "output_solid_logger.jsonl",
-    "liked_csv": OUTPUT_DIR / "final_label_aspect_logger_liked.csv",
-    "disliked_csv": OUTPUT_DIR / "final_label_aspect_logger_disliked.csv",
-    "review_csv": OUTPUT_DIR / "reviews.csv",
+    "result_db": OUTPUT_DIR / "results.sqlite",  # recenzje, ekstrakcje, aspekty, etykiety; None = wyniki ekstrakcji w JSONL
+    "liked_csv": OUTPUT_DIR / f"final_label_aspect_logger_liked{TABLE_SUFFIX}",
+    "disliked_csv": OUTPUT_DIR / f"final_label_aspect_logger_disliked{TABLE_SUFFIX}",
+    "review_csv": OUTPUT_DIR / f"reviews{TABLE_SUFFIX}",
     "log": LOG_DIR / f"PROD_{TIMESTAMP}.log",
     "liked_analysis": ANALYSIS_DIR / "analysis_liked.json",
     "disliked_analysis": ANALYSIS_DIR / "analysis_disliked.json",
-    "charts": ANALYSIS_DIR / "charts"
+    "charts": ANALYSIS_DIR / "charts",
+    "liked_state": ANALYSIS_DIR / "state_liked.json",  # stan częściowy analizy — przyrosty i scalanie shardów
+    "disliked_state": ANALYSIS_DIR / "state_disliked.json",
+    "metrics": ANALYSIS_DIR / "request_metrics.json",  # tokeny/s, udział promptu, przestoje ładowania, p50/p95/p99 per etap
+    "llm_cache": CACHE_DIR / "llm_cache.sqlite"
 }
 
 # 5. Model ID
 MODEL_ID = "MHKetbi/Mistral-Small3.1-24B-Instruct-2503:q5_K_L"
+ASPECT_CLUSTER_THRESHOLD = 0.7  # Jaccard zbiorów tokenów dla niemal identycznych aspektów; None wyłącza klastrowanie
+EMBED_MODEL_ID = "nomic-embed-text"
+EMBED_LABEL_MARGIN = 0.05  # minimalna różnica podobieństwa 1. i 2. kategorii; poniżej — etykietuje LLM
+# Hosty Ollama z wagami, np. "http://gpu1:11434=2,http://gpu2:11434"; puste = lokalny klient domyślny
+OLLAMA_HOSTS = os.environ.get("OLLAMA_HOSTS", "")
+OLLAMA_KEEP_ALIVE = "30m"  # jak długo Ollama trzyma model w pamięci między zapytaniami (None = domyślne 5 min serwera)
+OLLAMA_TIMEOUT = 300.0  # sekundy na jedno żądanie HTTP do Ollamy (połączenie + generowanie)
+RETRY_ATTEMPTS = 4  # łączna liczba prób przy błędach przejściowych (połączenie, timeout, 5xx, 429)
+RETRY_BASE_DELAY = 1.0  # opóźnienie przed n-tą ponowną próbą: losowo 0..min(RETRY_MAX_DELAY, base * 2^n)
+RETRY_MAX_DELAY = 30.0
+LLM_CACHE_MAX_BYTES = 512 * 1024 * 1024
+ADAPTIVE_MAX_WORKERS = 16  # górna granica limitu współbieżności przy --adaptive
+MIN_REVIEW_CHARS = 4  # krótsze recenzje (lub bez liter, np. "10/10", "👍") dostają pusty wynik bez LLM
+SENTENCE_BATCH_CHARS = 2000  # budżet znaków recenzji na jedno zapytanie wsadowe (~500 tokenów)
+
+# 6. Tworzenie katalogów — wywoływane przy starcie runu, nie przy imporcie: procesy robocze (spawn)
+# importują config ponownie z nowym TIMESTAMP i zostawiałyby puste katalogi output/<ts>/
+def ensure_directories_exist(paths=PATHS):
+    for path in paths.values():
+        if path is not None:  # None wyłącza daną funkcję (np. result_db, label_lexicon)
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+# 7. Przepinanie ścieżek wyjściowych z OUTPUT_DIR na inny katalog (log pozostaje wspólny)
+def rebase_paths(paths, new_root):
+    rebased = {}
+    for key, path in paths.items():
+        if path is None:
+            rebased[key] = None
+            continue
+        path = Path(path)
+        if key != "log" and path.is_relative_to(OUTPUT_DIR):
+            path = Path(new_root) / path.relative_to(OUTPUT_DIR)
+        rebased[key] = path
+    ensure_directories_exist(rebased)
+    return rebased
 
-# 6. Tworzenie katalogów
-def ensure_directories_exist():
-    for path in PATHS.values():
-        path.parent.mkdir(parents=True, exist_ok=True)
+# Przy przetwarzaniu wielu zrzutów wyniki trafiają do OUTPUT_DIR/{appid}/...
+def shard_paths(paths, appid):
+    return rebase_paths(paths, OUTPUT_DIR / str(appid))
 
-ensure_directories_exist()
+# 8. Najnowszy katalog runu z wynikami — do wznawiania przerwanego przetwarzania
+def latest_run_dir():
+    if not OUTPUT_DIR.parent.is_dir():
+        return None
+    runs = sorted((p for p in OUTPUT_DIR.parent.iterdir() if p.is_dir()), reverse=True)
+    for run_dir in runs:
+        if any(run_dir.rglob("*.jsonl")) or any(run_dir.rglob("*.sqlite")):
+            return run_dir
+    return None
@@ -1,7 +1,19 @@
+import asyncio
 from abc import ABC, abstractmethod
 from typing import List, Dict
 
 class AspectLabeler(ABC):
     @abstractmethod
     def label_aspect(self, aspect: str) -> List[str]:
-        ...
\ No newline at end of file
+        ...
+
+    async def alabel_aspect(self, aspect: str) -> List[str]:
+        # Domyślnie synchroniczna implementacja uruchamiana w wątku
+        return await asyncio.to_thread(self.label_aspect, aspect)
+
+    def label_aspects(self, aspects: List[str]) -> List[List[str]]:
+        # Domyślnie bez wsadów — implementacje mogą etykietować wiele aspektów jednym zapytaniem
+        return [self.label_aspect(aspect) for aspect in aspects]
+
+    async def alabel_aspects(self, aspects: List[str]) -> List[List[str]]:
+        return [await self.alabel_aspect(aspect) for aspect in aspects]
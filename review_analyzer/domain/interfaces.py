@@ -1,7 +1,8 @@
 # domain/interfaces.py
 
+import asyncio
 from abc import ABC, abstractmethod
-from typing import List, Dict
+from typing import List, Dict, Iterator
 from review_analyzer.domain.models import Review
 import pandas as pd
 
@@ -10,6 +11,10 @@ class ReviewRepository(ABC):
     def load_reviews(self) -> List[Review]:
         pass
 
+    def iter_reviews(self, language: str = None) -> Iterator[Review]:
+        # Domyślnie bez strumieniowania — implementacje mogą nadpisać
+        yield from self.load_reviews(language)
+
 class AspectExtractor(ABC):
     @abstractmethod
     def extract_aspects(self, reviews: List[Review]) -> Dict[str, List[str]]:
@@ -27,11 +32,54 @@ class ReviewAspectExtractor(ABC):
     def extract_sentence_sentiment(self, review: Review) -> dict:
         pass
 
+    async def aextract_sentence_sentiment(self, review: Review) -> dict:
+        # Domyślnie synchroniczna implementacja uruchamiana w wątku
+        return await asyncio.to_thread(self.extract_sentence_sentiment, review)
+
+    def extract_batch(self, reviews: List[Review]) -> List[dict]:
+        # Domyślnie bez wsadów — implementacje mogą analizować wiele recenzji jednym zapytaniem
+        return [self.extract_sentence_sentiment(review) for review in reviews]
+
+    async def aextract_batch(self, reviews: List[Review]) -> List[dict]:
+        return [await self.aextract_sentence_sentiment(review) for review in reviews]
+
 class ReviewAnalyzer(ABC):
     @abstractmethod
     def analyze_data(self, data: pd.DataFrame) -> Dict:
         ...
 
+class IncrementalReviewAnalyzer(ReviewAnalyzer):
+    """
+    Analiza liczona ze stanu częściowego (liczniki, sumy, sumy kwadratów) serializowalnego do JSON.
+    Stan wsadu (partial_state) scala się ze stanem wcześniejszych wsadów, shardów lub runów
+    (merge_states — w miejscu, w pierwszym argumencie, kosztem proporcjonalnym do przyrostu),
+    a podsumowanie (summarize) powstaje ze stanu — bez ponownego czytania danych.
+    Statystyki per recenzja zakładają, że wiersze jednej recenzji trafiają do jednego wsadu.
+    """
+    @abstractmethod
+    def empty_state(self) -> Dict:
+        ...
+
+    @abstractmethod
+    def partial_state(self, data: pd.DataFrame) -> Dict:
+        ...
+
+    @abstractmethod
+    def merge_states(self, state: Dict, other: Dict) -> Dict:
+        ...
+
+    @abstractmethod
+    def summarize(self, state: Dict) -> Dict:
+        ...
+
+    def update_state(self, state: Dict, data: pd.DataFrame) -> Dict:
+        return self.merge_states(state, self.partial_state(data))
+
+    def analyze_data(self, data: pd.DataFrame) -> Dict:
+        # Stan ostatniej analizy zostaje w `state` — do zapisu i późniejszego scalenia z przyrostem
+        self.state = self.partial_state(data)
+        return self.summarize(self.state)
+
 class DataFrameSaver(ABC):
     @abstractmethod
     def save(self, dataframe: pd.DataFrame, csv_path: str) -> None:
@@ -0,0 +1,121 @@
+# infrastructure/aggregate_state.py
+
+import json
+import math
+import os
+from collections import Counter
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Klocki stanu częściowego analiz: liczniki, liczniki par i momenty (n, suma, suma kwadratów, min, max).
+# Wszystko serializowalne do JSON, a scalanie jest łączne — kolejność kluczy po scaleniu odpowiada
+# kolejności pierwszego wystąpienia w połączonych danych (remisy w most_common jak w pełnym przeliczeniu).
+# Liczniki są słownikami kluczowanymi wartością: rozmiar stanu zależy od liczby różnych kluczy, a scalanie
+# dopisuje przyrost do pierwszego stanu w miejscu, dotykając tylko kluczy przyrostu (koszt O(przyrost)).
+
+
+def _native(value):
+    return value.item() if hasattr(value, "item") else value
+
+
+def counts(values: pd.Series) -> Dict:
+    '''Licznik wartości w kolejności pierwszego wystąpienia (bez braków danych).'''
+    codes, uniques = pd.factorize(values)
+    totals = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    return dict(zip(uniques.tolist(), totals.tolist()))
+
+
+def merge_counts(a: Dict, b: Dict) -> Dict:
+    '''Dodaje liczniki `b` do `a` w miejscu i zwraca `a`.'''
+    for key, count in b.items():
+        a[key] = a.get(key, 0) + count
+    return a
+
+
+def pair_counts(keys: pd.Series, values: pd.Series) -> Dict:
+    '''{klucz: {wartość: liczba}} — klucze i wartości w kolejności pierwszego wystąpienia pary (bez braków danych).'''
+    key_codes, key_uniques = pd.factorize(keys)
+    value_codes, value_uniques = pd.factorize(values)
+    valid = (key_codes >= 0) & (value_codes >= 0)
+    grouped = (
+        pd.DataFrame({"key": key_codes[valid], "value": value_codes[valid]})
+        .groupby(["key", "value"], sort=False)
+        .size()
+    )
+    key_uniques, value_uniques = np.asarray(key_uniques, dtype=object), np.asarray(value_uniques, dtype=object)
+    nested: Dict = {}
+    for key, value, count in zip(key_uniques[grouped.index.get_level_values(0).to_numpy()],
+                                 value_uniques[grouped.index.get_level_values(1).to_numpy()], grouped.tolist()):
+        nested.setdefault(_native(key), {})[_native(value)] = count
+    return nested
+
+
+def merge_pair_counts(a: Dict, b: Dict) -> Dict:
+    '''Dodaje liczniki par `b` do `a` w miejscu i zwraca `a`.'''
+    for key, values in b.items():
+        merge_counts(a.setdefault(key, {}), values)
+    return a
+
+
+def most_common(counter: Dict, n: int) -> List[tuple]:
+    return Counter(counter).most_common(n)
+
+
+def sorted_counts(counter: Dict) -> Dict:
+    # Jak Series.value_counts(): malejąco po liczbie, kolejność remisów jak w pandas
+    return pd.Series(counter, dtype="int64").sort_values(ascending=False).to_dict() if counter else {}
+
+
+def moments(values: pd.Series) -> Dict:
+    values = values.dropna()
+    if values.empty:
+        return empty_moments()
+    return {
+        "n": int(len(values)),
+        "sum": _native(values.sum()),
+        "sumsq": _native((values ** 2).sum()),
+        "min": _native(values.min()),
+        "max": _native(values.max()),
+    }
+
+
+def empty_moments() -> Dict:
+    return {"n": 0, "sum": 0, "sumsq": 0, "min": None, "max": None}
+
+
+def merge_moments(a: Dict, b: Dict) -> Dict:
+    return {
+        "n": a["n"] + b["n"],
+        "sum": a["sum"] + b["sum"],
+        "sumsq": a["sumsq"] + b["sumsq"],
+        "min": min((v for v in (a["min"], b["min"]) if v is not None), default=None),
+        "max": max((v for v in (a["max"], b["max"]) if v is not None), default=None),
+    }
+
+
+def mean(m: Dict) -> float:
+    return m["sum"] / m["n"] if m["n"] else math.nan
+
+
+def variance(m: Dict) -> float:
+    # Wariancja próbkowa (ddof=1, jak Series.var); dla liczb całkowitych licznik jest dokładny
+    if m["n"] < 2:
+        return math.nan
+    return (m["n"] * m["sumsq"] - m["sum"] ** 2) / (m["n"] * (m["n"] - 1))
+
+
+def load_state(path) -> Optional[Dict]:
+    if not path or not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_state(path, state: Dict) -> None:
+    # Zwarty JSON przez plik tymczasowy — przerwany zapis nie psuje poprzedniego stanu
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
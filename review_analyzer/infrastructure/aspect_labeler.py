@@ -1,18 +1,42 @@
 # review_analyzer/infrastructure/aspect_labeler_llm.py
 from logging import Logger
 import json
-from ollama import Client
-from typing import List
+import time
+from ollama import Client, AsyncClient
+from typing import List, Dict
 from review_analyzer.domain.aspect_labeler import AspectLabeler
+from review_analyzer.infrastructure.request_metrics import RequestMetrics
+from review_analyzer.infrastructure.prompt_prefix import split_prompt, chat_messages
+from review_analyzer.infrastructure.retry import without_retries
 import re
 
+# Fragment prompt_label.txt, od którego zaczyna się część dla pojedynczego aspektu —
+# prompt wsadowy bierze instrukcje sprzed niego i dokleja prompt_label_batch.txt
+SINGLE_ASPECT_MARKER = "NOW CLASSIFY ONLY THIS ONE ASPECT."
+
+# Kategorie z prompt_label.txt — enum w schemacie `format` ogranicza model do tej listy
+LABEL_CATEGORIES = ["Gameplay", "Graphics", "Story", "Optimization", "Price", "Music", "Multiplayer", "Bugs", "Innovation",
+                    "Updates", "Other"]
+LABELS_SCHEMA = {"type": "array", "items": {"type": "string", "enum": LABEL_CATEGORIES}, "minItems": 1, "maxItems": 2}
+LABEL_SCHEMA = {"type": "object", "properties": {"labels": LABELS_SCHEMA}, "required": ["labels"]}
 
 
 class MistralAspectLabeler(AspectLabeler):
-    def __init__(self, client: Client, model_name: str, prompt_template: str, logger: Logger):
+    def __init__(self, client: Client, model_name: str, prompt_template: str, logger: Logger, async_client: AsyncClient = None,
+                 batch_prompt_template: str = None, structured_output: bool = True, metrics: RequestMetrics = None,
+                 system_prefix: bool = True, keep_alive=None):
         self.client = client
+        self.async_client = async_client
         self.model = model_name
         self.prompt_template = prompt_template
+        self.batch_prompt_template = batch_prompt_template
+        self.structured_output = structured_output
+        self.metrics = metrics
+        # system_prefix: instrukcje jako stała wiadomość systemowa, aspekt w osobnej wiadomości
+        self.system_prompt, self.user_template = (
+            split_prompt(prompt_template, SINGLE_ASPECT_MARKER) if system_prefix else (None, prompt_template)
+        )
+        self.keep_alive = keep_alive
         self.logger = logger
 
     def _extract_json(self, text: str) -> dict:
@@ -25,20 +49,140 @@ class MistralAspectLabeler(AspectLabeler):
             self.logger.warning("Błąd dekodowania JSON: %s", e)
             raise
 
-    def label_aspect(self, aspect: str) -> List[str]:
-        prompt = self.prompt_template.replace("{INSERT_ASPECT_HERE}", aspect)
+    def _chat_kwargs(self, aspect: str) -> dict:
+        prompt = self.user_template.replace("{INSERT_ASPECT_HERE}", aspect)
+        return self._chat_request(prompt, LABEL_SCHEMA)
 
+    def _chat_request(self, prompt: str, schema: dict) -> dict:
+        kwargs = {
+            "model": self.model,
+            "messages": chat_messages(self.system_prompt, prompt),
+            "options": {"temperature": 0.15},
+        }
+        if self.structured_output:
+            kwargs["format"] = schema
+        if self.keep_alive is not None:
+            kwargs["keep_alive"] = self.keep_alive
+        return kwargs
+
+    def warm_up(self) -> None:
+        '''Ładuje model i wylicza cache KV instrukcji systemowych przed pierwszym aspektem.'''
+        kwargs = self._chat_request("OK", LABEL_SCHEMA)
+        kwargs["options"] = {**kwargs["options"], "num_predict": 1}
         try:
-            response = self.client.chat(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt}],
-                options={"temperature": 0.15}
-            )
-            self.logger.debug("RESPONSE: %s", response)
-            raw = response["message"]["content"]
+            # Jedna próba, bez ponowień: niedostępny host nie wstrzymuje startu na czas backoffu
+            without_retries(self.client).chat(**kwargs)  # poza metrykami — czas ładowania modelu zawyżyłby percentyle
+            self.logger.info("Model %s rozgrzany (keep_alive=%s)", self.model, self.keep_alive)
+        except Exception as e:
+            self.logger.warning("Rozgrzewka modelu %s nieudana: %s", self.model, e)
 
+    def _send(self, kwargs: dict, kind: str = "single"):
+        start = time.perf_counter()
+        response = self.client.chat(**kwargs)
+        self.logger.debug("RESPONSE: %s", response)
+        if self.metrics is not None:
+            self.metrics.record(response, time.perf_counter() - start, kind)
+        return response
+
+    async def _asend(self, kwargs: dict, kind: str = "single"):
+        start = time.perf_counter()
+        response = await self.async_client.chat(**kwargs)
+        self.logger.debug("RESPONSE: %s", response)
+        if self.metrics is not None:
+            self.metrics.record(response, time.perf_counter() - start, kind)
+        return response
+
+    def _parse_labels(self, response) -> List[str]:
+        raw = response["message"]["content"]
+
+        # Odpowiedź ze schematem to czysty JSON; regex tylko gdy model go nie dotrzymał
+        try:
+            parsed = json.loads(raw)
+        except json.JSONDecodeError:
+            parsed = None
+        if not isinstance(parsed, dict):
             parsed = self._extract_json(raw)
-            return parsed.get("labels", [])
+        return parsed.get("labels", [])
+
+    def label_aspect(self, aspect: str) -> List[str]:
+        try:
+            response = self._send(self._chat_kwargs(aspect))
+            return self._parse_labels(response)
+        except Exception as e:
+            self.logger.warning("Błąd podczas etykietowania aspektu (%s): %s", aspect, e)
+            return []
+
+    async def alabel_aspect(self, aspect: str) -> List[str]:
+        '''Wersja asynchroniczna przez `async_client` (ollama.AsyncClient); bez niego — w wątku.'''
+        if self.async_client is None:
+            return await super().alabel_aspect(aspect)
+        try:
+            response = await self._asend(self._chat_kwargs(aspect))
+            return self._parse_labels(response)
         except Exception as e:
             self.logger.warning("Błąd podczas etykietowania aspektu (%s): %s", aspect, e)
-            return []
\ No newline at end of file
+            return []
+
+
+    # --- Etykietowanie wsadowe: N aspektów w jednym zapytaniu
+
+    def _batch_kwargs(self, aspects: List[str]) -> dict:
+        instructions = "" if self.system_prompt is not None else self.prompt_template.split(SINGLE_ASPECT_MARKER)[0]
+        listing = "\n".join(f"{i}: {json.dumps(aspect, ensure_ascii=False)}" for i, aspect in enumerate(aspects))
+        ids = [str(i) for i in range(len(aspects))]
+        schema = {"type": "object", "properties": {i: LABELS_SCHEMA for i in ids}, "required": ids}
+        return self._chat_request(instructions + self.batch_prompt_template.replace("{INSERT_ASPECTS_HERE}", listing), schema)
+
+    def _parse_batch(self, response, size: int) -> Dict[int, List[str]]:
+        raw = response["message"]["content"]
+        try:
+            parsed = json.loads(raw)
+        except json.JSONDecodeError:
+            start, end = raw.find("{"), raw.rfind("}")
+            if start == -1 or end < start:
+                raise json.JSONDecodeError("Brak poprawnego JSON-a w odpowiedzi", raw, 0)
+            parsed = json.loads(raw[start:end + 1])
+
+        labeled = {}
+        for key, labels in parsed.items():
+            if not (str(key).isdigit() and int(key) < size):
+                continue
+            if isinstance(labels, list) and labels and all(isinstance(label, str) for label in labels):
+                labeled[int(key)] = labels
+        return labeled
+
+    def _missing(self, aspects: List[str], labeled: Dict[int, List[str]]) -> List[int]:
+        missing = [i for i in range(len(aspects)) if i not in labeled]
+        if missing:
+            self.logger.debug("Etykietowanie wsadowe: %d/%d aspektów bez etykiet — pojedyncze zapytania", len(missing), len(aspects))
+        return missing
+
+    def label_aspects(self, aspects: List[str]) -> List[List[str]]:
+        if not self.batch_prompt_template or len(aspects) < 2:
+            return super().label_aspects(aspects)
+
+        try:
+            response = self._send(self._batch_kwargs(aspects), "batch")
+            labeled = self._parse_batch(response, len(aspects))
+        except Exception as e:
+            self.logger.warning("Błąd etykietowania wsadowego (%d aspektów): %s", len(aspects), e)
+            labeled = {}
+
+        for i in self._missing(aspects, labeled):
+            labeled[i] = self.label_aspect(aspects[i])
+        return [labeled[i] for i in range(len(aspects))]
+
+    async def alabel_aspects(self, aspects: List[str]) -> List[List[str]]:
+        if self.async_client is None or not self.batch_prompt_template or len(aspects) < 2:
+            return await super().alabel_aspects(aspects)
+
+        try:
+            response = await self._asend(self._batch_kwargs(aspects), "batch")
+            labeled = self._parse_batch(response, len(aspects))
+        except Exception as e:
+            self.logger.warning("Błąd etykietowania wsadowego (%d aspektów): %s", len(aspects), e)
+            labeled = {}
+
+        for i in self._missing(aspects, labeled):
+            labeled[i] = await self.alabel_aspect(aspects[i])
+        return [labeled[i] for i in range(len(aspects))]
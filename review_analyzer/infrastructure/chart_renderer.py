@@ -0,0 +1,144 @@
+# infrastructure/chart_renderer.py
+
+import atexit
+import hashlib
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from logging import Logger
+from typing import Dict, List, Optional
+
+import matplotlib
+matplotlib.use("Agg")  # bez okien i zależności od domyślnego backendu — także w procesach roboczych
+import matplotlib.pyplot as plt
+import seaborn as sns
+
+# Zmiana wyglądu wykresów = nowa wersja, żeby odcisk unieważnił stare pliki
+RENDER_VERSION = 1
+MANIFEST_NAME = ".chart_fingerprints.json"
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+
+_pools: Dict[int, ProcessPoolExecutor] = {}
+
+
+def chart_spec(path: str, title: str, x: List, y: List, figsize=(10, 6), xlabel: str = None, ylabel: str = None,
+               rotate_xticks: bool = False) -> Dict:
+    '''Opis wykresu słupkowego — dane i parametry, z których liczony jest odcisk.'''
+    return {"path": str(path), "title": title, "x": list(x), "y": list(y), "figsize": list(figsize), "xlabel": xlabel,
+            "ylabel": ylabel, "rotate_xticks": rotate_xticks}
+
+
+def fingerprint(spec: Dict) -> str:
+    payload = {key: value for key, value in spec.items() if key != "path"}
+    payload["_versions"] = [RENDER_VERSION, matplotlib.__version__, sns.__version__]
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")).hexdigest()
+
+
+def render_chart(spec: Dict) -> str:
+    # Funkcja modułu (nie metoda) — przekazywana do procesów roboczych
+    fig = plt.figure(figsize=tuple(spec["figsize"]))
+    try:
+        sns.barplot(x=spec["x"], y=spec["y"])
+        plt.title(spec["title"])
+        if spec["xlabel"]:
+            plt.xlabel(spec["xlabel"])
+        if spec["ylabel"]:
+            plt.ylabel(spec["ylabel"])
+        if spec["rotate_xticks"]:
+            plt.xticks(rotation=45)
+        plt.tight_layout()
+        plt.savefig(spec["path"])
+    finally:
+        plt.close(fig)
+    return spec["path"]
+
+
+def _pool(workers: int) -> ProcessPoolExecutor:
+    # Jedna pula na cały proces — kolejne analizy (np. wiele gier) nie płacą ponownie za start procesów
+    if workers not in _pools:
+        _pools[workers] = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    return _pools[workers]
+
+
+@atexit.register
+def _shutdown_pools():
+    for pool in _pools.values():
+        pool.shutdown(wait=True)
+    _pools.clear()
+
+
+class ChartRenderer:
+    '''
+    Rysuje wykresy z opisów (chart_spec) na backendzie Agg. Wykres, którego odcisk danych zgadza się
+    z zapisanym w manifeście katalogu i którego plik istnieje, jest pomijany; pozostałe są rysowane
+    w puli procesów (`workers` > 1 i więcej niż jeden wykres do narysowania) albo w bieżącym procesie.
+    '''
+
+    def __init__(self, logger: Optional[Logger] = None, workers: int = DEFAULT_WORKERS):
+        self.logger = logger
+        self.workers = workers
+
+    def _log(self, level: str, msg: str, *args):
+        if self.logger:
+            getattr(self.logger, level)(msg, *args)
+
+    @staticmethod
+    def _load_manifest(path: str) -> Dict[str, str]:
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def _save_manifest(path: str, manifest: Dict[str, str]) -> None:
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, path)
+
+    def _draw(self, specs: List[Dict]) -> List[Optional[str]]:
+        # Ścieżki narysowanych wykresów; None = błąd (wykres zostanie narysowany przy następnym uruchomieniu)
+        if self.workers > 1 and len(specs) > 1:
+            futures = [_pool(self.workers).submit(render_chart, spec) for spec in specs]
+            outcomes = []
+            for spec, future in zip(specs, futures):
+                try:
+                    outcomes.append(future.result())
+                except Exception as e:
+                    self._log("error", "Błąd rysowania wykresu %s: %s", spec["path"], e)
+                    outcomes.append(None)
+            return outcomes
+
+        outcomes = []
+        for spec in specs:
+            try:
+                outcomes.append(render_chart(spec))
+            except Exception as e:
+                self._log("error", "Błąd rysowania wykresu %s: %s", spec["path"], e)
+                outcomes.append(None)
+        return outcomes
+
+    def render(self, specs: List[Dict], output_dir: str) -> Dict[str, int]:
+        os.makedirs(output_dir, exist_ok=True)
+        manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+        manifest = self._load_manifest(manifest_path)
+
+        pending, fingerprints = [], {}
+        for spec in specs:
+            name = os.path.basename(spec["path"])
+            fingerprints[name] = fingerprint(spec)
+            if manifest.get(name) != fingerprints[name] or not os.path.exists(spec["path"]):
+                pending.append(spec)
+
+        rendered = [path for path in self._draw(pending) if path is not None]
+        for path in rendered:
+            manifest[os.path.basename(path)] = fingerprints[os.path.basename(path)]
+        if rendered:
+            self._save_manifest(manifest_path, manifest)
+
+        stats = {"rendered": len(rendered), "skipped": len(specs) - len(pending), "failed": len(pending) - len(rendered)}
+        self._log("info", "Wykresy w %s: narysowano %d, bez zmian %d, błędy %d", output_dir, stats["rendered"], stats["skipped"],
+                  stats["failed"])
+        return stats
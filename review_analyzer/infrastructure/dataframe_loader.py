@@ -14,4 +14,33 @@ class DataFrameLoaderCsv(DataFrameLoader):
             return df
         except Exception as e:
             self.logger.warning("Blad podczas wczytywania %s, %s", csv_path, e)
-        return None
\ No newline at end of file
+        return None
+
+class DataFrameLoaderParquet(DataFrameLoader):
+    '''
+    Odczyt Parquet (pyarrow): `columns` — wczytywane są tylko potrzebne kolumny; `categories` —
+    kolumny tekstowe zwracane jako kategorie pandas (słownik + kody), pozostałe jako zwykły tekst,
+    tak jak z CSV.
+    '''
+
+    def __init__(self, logger: Logger, columns=None, categories=()):
+        self.logger = logger
+        self.columns = list(columns) if columns else None
+        self.categories = list(categories)
+
+    def load(self, csv_path):
+        try:
+            import pyarrow as pa
+            import pyarrow.compute as pc
+            import pyarrow.parquet as pq
+
+            table = pq.read_table(csv_path, columns=self.columns, read_dictionary=self.categories or None)
+            for i, field in enumerate(table.schema):
+                if pa.types.is_dictionary(field.type) and field.name not in self.categories:
+                    table = table.set_column(i, field.name, pc.cast(table.column(i), field.type.value_type))
+            df = table.to_pandas()
+            self.logger.info("Wczytano plik: %s posiada %d lini", csv_path, len(df))
+            return df
+        except Exception as e:
+            self.logger.warning("Blad podczas wczytywania %s, %s", csv_path, e)
+        return None
@@ -12,4 +12,48 @@ class DataFrameSaverCsv(DataFrameSaver):
             dataframe.to_csv(csv_path, index=False, sep=';')
             self.logger.info("Zapisano plik: %s", csv_path)
         except Exception as e:
-            self.logger.warning("Blad podczas zapisu %s, %s", csv_path, e)
\ No newline at end of file
+            self.logger.warning("Blad podczas zapisu %s, %s", csv_path, e)
+
+class DataFrameSaverParquet(DataFrameSaver):
+    '''
+    Zapis do Parquet (pyarrow) z zachowaniem typów. Kolumny z `dictionary_columns` (powtarzalne
+    teksty: aspekty, etykiety) są zapisywane jako typ słownikowy Arrow — po wczytaniu trafiają
+    do pandas jako kategorie, bez ponownego parsowania tekstu.
+    '''
+
+    def __init__(self, logger: Logger, dictionary_columns=("aspect", "labels"), compression: str = "zstd"):
+        self.logger = logger
+        self.dictionary_columns = dictionary_columns
+        self.compression = compression
+
+    @staticmethod
+    def _to_table(dataframe):
+        import pyarrow as pa
+
+        try:
+            return pa.Table.from_pandas(dataframe, preserve_index=False)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # Kolumny obiektowe z mieszanymi typami (np. liczby i teksty) — zapis jako tekst, braki zostają
+            dataframe = dataframe.copy()
+            for column in dataframe.columns[dataframe.dtypes == object]:
+                values = dataframe[column]
+                dataframe[column] = values.where(values.isna(), values.astype(str))
+            return pa.Table.from_pandas(dataframe, preserve_index=False)
+
+    def save(self, dataframe, csv_path):
+        try:
+            import pyarrow as pa
+            import pyarrow.compute as pc
+            import pyarrow.parquet as pq
+
+            table = self._to_table(dataframe)
+            for column in self.dictionary_columns:
+                i = table.schema.get_field_index(column)
+                # pandas >= 3 zamienia kolumny tekstowe na large_string
+                field_type = table.schema.field(i).type if i >= 0 else None
+                if field_type is not None and (pa.types.is_string(field_type) or pa.types.is_large_string(field_type)):
+                    table = table.set_column(i, column, pc.dictionary_encode(table.column(i)))
+            pq.write_table(table, csv_path, compression=self.compression)
+            self.logger.info("Zapisano plik: %s", csv_path)
+        except Exception as e:
+            self.logger.warning("Blad podczas zapisu %s, %s", csv_path, e)
@@ -0,0 +1,94 @@
+import asyncio
+import threading
+from logging import Logger
+from typing import Dict, List, Optional
+
+import numpy as np
+from ollama import Client
+
+from review_analyzer.domain.aspect_labeler import AspectLabeler
+
+
+class EmbeddingAspectLabeler(AspectLabeler):
+    '''
+    Etykietowanie przez najbliższy centroid: aspekty są embedowane (Ollama /api/embed),
+    a kategoria to centroid o największym podobieństwie kosinusowym. Gdy różnica między
+    dwoma najlepszymi kategoriami jest mniejsza niż `margin`, decyzję podejmuje `fallback`
+    (np. MistralAspectLabeler). Centroidy to średnie embeddingów fraz z `seeds`.
+    '''
+
+    def __init__(self, client: Client, model_name: str, seeds: Dict[str, List[str]], fallback: AspectLabeler, logger: Logger,
+                 margin: float = 0.05):
+        self.client = client
+        self.model = model_name
+        self.seeds = seeds
+        self.fallback = fallback
+        self.logger = logger
+        self.margin = margin
+        self.labels = list(seeds)
+        self.stats = {"embedded": 0, "fallback": 0}
+
+        self._centroids: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        response = self.client.embed(model=self.model, input=texts)
+        return self._normalize(np.asarray(response["embeddings"], dtype=np.float32))
+
+    def _ensure_centroids(self) -> np.ndarray:
+        with self._lock:
+            if self._centroids is None:
+                phrases = [phrase for label in self.labels for phrase in self.seeds[label]]
+                owners = np.repeat(np.arange(len(self.labels)), [len(self.seeds[label]) for label in self.labels])
+                vectors = self._embed(phrases)
+                centroids = np.stack([vectors[owners == i].mean(axis=0) for i in range(len(self.labels))])
+                self._centroids = self._normalize(centroids)
+                self.logger.info("Centroidy etykiet: %d kategorii z %d fraz", len(self.labels), len(phrases))
+            return self._centroids
+
+    def _classify(self, aspects: List[str]) -> List[Optional[List[str]]]:
+        # None = za mały margines — aspekt trafia do fallbacku
+        centroids = self._ensure_centroids()
+        similarity = self._embed(aspects) @ centroids.T
+        top2 = np.argsort(similarity, axis=1)[:, -2:]
+        best, second = top2[:, 1], top2[:, 0]
+        rows = np.arange(len(aspects))
+        confident = similarity[rows, best] - similarity[rows, second] >= self.margin
+        return [[self.labels[b]] if ok else None for b, ok in zip(best, confident)]
+
+    def warm_up(self) -> None:
+        # Model embeddingów ładuje się przy centroidach; rozgrzewamy LLM, który dostaje niepewne aspekty
+        if hasattr(self.fallback, "warm_up"):
+            self.fallback.warm_up()
+
+    def label_aspect(self, aspect: str) -> List[str]:
+        return self.label_aspects([aspect])[0]
+
+    def label_aspects(self, aspects: List[str]) -> List[List[str]]:
+        if not aspects:
+            return []
+        try:
+            labeled = self._classify(aspects)
+        except Exception as e:
+            self.logger.warning("Błąd etykietowania embeddingami (%d aspektów): %s — fallback do LLM", len(aspects), e)
+            labeled = [None] * len(aspects)
+
+        uncertain = [i for i, labels in enumerate(labeled) if labels is None]
+        if uncertain:
+            for i, labels in zip(uncertain, self.fallback.label_aspects([aspects[i] for i in uncertain])):
+                labeled[i] = labels
+
+        with self._lock:
+            self.stats["embedded"] += len(aspects) - len(uncertain)
+            self.stats["fallback"] += len(uncertain)
+        self.logger.debug("Embeddingi: %d/%d aspektów bez LLM", len(aspects) - len(uncertain), len(aspects))
+        return labeled
+
+    async def alabel_aspects(self, aspects: List[str]) -> List[List[str]]:
+        # Jedno zapytanie embed na wsad zamiast osobnego na każdy aspekt
+        return await asyncio.to_thread(self.label_aspects, aspects)
@@ -0,0 +1,34 @@
+from logging import Logger
+from typing import List
+
+from review_analyzer.domain.interfaces import ReviewRepository
+from review_analyzer.domain.models import Review
+from review_analyzer.infrastructure.json_saver import JsonlSaver
+
+
+class ErrorRowsReviewLoader(ReviewRepository):
+    '''
+    Recenzje odtworzone z wierszy wyniku ekstrakcji, które mają pole `error`.
+    Wiersz zawiera tylko appid, recommendationid i tekst — pozostałe pola dostają wartości domyślne,
+    a filtr języka jest pomijany (recenzje przeszły go w pierwotnym przebiegu).
+    '''
+
+    def __init__(self, saver: JsonlSaver, logger: Logger):
+        self.saver = saver
+        self.logger = logger
+
+    def load_reviews(self, language: str = None) -> List[Review]:
+        reviews = [
+            Review(
+                appid=row.get("appid"),
+                recommendationid=row["recommendationid"],
+                language=language or "",
+                review=row.get("original_review", ""),
+                votes_funny=0,
+                voted_up=False,
+            )
+            for row in self.saver.error_rows()
+            if "recommendationid" in row
+        ]
+        self.logger.info("Do ponownego przetworzenia: %d recenzji z błędem", len(reviews))
+        return reviews
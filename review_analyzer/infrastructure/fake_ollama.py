@@ -0,0 +1,203 @@
+import asyncio
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+import numpy as np
+from ollama import ResponseError
+
+# Przykładowe wartości wstawiane w miejsce pól tekstowych schematu
+FAKE_ASPECTS = ["smooth gameplay", "great soundtrack", "too many bugs", "fair price", "weak story", "nice graphics"]
+
+
+class FakeOllamaBackend:
+    '''
+    Symulowany serwer Ollama do benchmarków bez GPU. Latencja odpowiedzi losowana z rozkładu
+    (`constant`, `uniform`, `exponential`, `lognormal`) o średniej `latency` sekund, plus `per_item`
+    sekund na każdy element wsadu (recenzję / aspekt w schemacie `format`). Jednocześnie obsługiwanych
+    jest najwyżej `slots` żądań (jak OLLAMA_NUM_PARALLEL) — kolejne czekają w kolejce. Z prawdopodobieństwem
+    `error_rate` zwracany jest błąd 503. Odpowiedź to JSON zgodny z przesłanym schematem.
+    '''
+
+    DISTRIBUTIONS = ("constant", "uniform", "exponential", "lognormal")
+
+    def __init__(self, latency: float = 0.05, distribution: str = "lognormal", sigma: float = 0.5, per_item: float = 0.0,
+                 error_rate: float = 0.0, slots: int = 4, seed: int = 0, embed_dim: int = 32):
+        if distribution not in self.DISTRIBUTIONS:
+            raise ValueError(f"Nieznany rozkład latencji: {distribution}")
+        self.latency = latency
+        self.distribution = distribution
+        self.sigma = sigma
+        self.per_item = per_item
+        self.error_rate = error_rate
+        self.slots = slots
+        self.embed_dim = embed_dim
+        self.stats = {"requests": 0, "errors": 0, "max_queue": 0}
+
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(slots)
+        self._waiting = 0
+
+    def sample_latency(self, items: int = 1) -> float:
+        with self._lock:
+            if self.distribution == "constant":
+                base = self.latency
+            elif self.distribution == "uniform":
+                base = self._rng.uniform(0, 2 * self.latency)
+            elif self.distribution == "exponential":
+                base = self._rng.expovariate(1 / self.latency) if self.latency else 0.0
+            else:
+                # Średnia rozkładu log-normalnego = exp(mu + sigma^2 / 2)
+                mu = np.log(self.latency) - self.sigma ** 2 / 2 if self.latency else 0.0
+                base = self._rng.lognormvariate(mu, self.sigma) if self.latency else 0.0
+        return base + self.per_item * max(items - 1, 0)
+
+    def _fails(self) -> bool:
+        with self._lock:
+            self.stats["requests"] += 1
+            failed = self._rng.random() < self.error_rate
+            if failed:
+                self.stats["errors"] += 1
+        return failed
+
+    # --- Treść odpowiedzi
+
+    def _instance(self, schema: Dict, path: str = ""):
+        kind = schema.get("type")
+        if kind == "object":
+            return {key: self._instance(sub, f"{path}/{key}") for key, sub in schema.get("properties", {}).items()}
+        if kind == "array":
+            items = schema.get("items", {})
+            count = max(1, min(schema.get("maxItems", 2), schema.get("minItems", 1)))
+            return [self._instance(items, f"{path}/{i}") for i in range(count)]
+        if "enum" in schema:
+            return schema["enum"][_stable_hash(path) % len(schema["enum"])]
+        return FAKE_ASPECTS[_stable_hash(path) % len(FAKE_ASPECTS)]
+
+    @staticmethod
+    def _items(schema: Optional[Dict]) -> int:
+        # Wsad = obiekt kluczowany identyfikatorami (recommendationid / indeks aspektu)
+        if not schema or schema.get("type") != "object":
+            return 1
+        keys = schema.get("properties", {})
+        return len(keys) if all(str(key).isdigit() for key in keys) else 1
+
+    def content(self, kwargs: Dict) -> str:
+        schema = kwargs.get("format")
+        if isinstance(schema, dict):
+            return json.dumps(self._instance(schema), ensure_ascii=False)
+        return json.dumps({"liked": FAKE_ASPECTS[:1], "disliked": FAKE_ASPECTS[2:3]})
+
+    def _chat_response(self, kwargs: Dict, latency: float) -> Dict:
+        content = self.content(kwargs)
+        prompt_chars = sum(len(m.get("content", "")) for m in kwargs.get("messages", []))
+        total_ns = int(latency * 1e9)
+        return {
+            "model": kwargs.get("model", "fake"),
+            "message": {"role": "assistant", "content": content},
+            "done": True,
+            "prompt_eval_count": prompt_chars // 4,
+            "eval_count": max(1, len(content) // 4),
+            "prompt_eval_duration": total_ns // 4,
+            "eval_duration": total_ns - total_ns // 4,
+            "load_duration": 0,
+            "total_duration": total_ns,
+        }
+
+    def _embed_response(self, kwargs: Dict) -> Dict:
+        texts = kwargs.get("input", [])
+        texts = [texts] if isinstance(texts, str) else texts
+        vectors = [np.random.default_rng(_stable_hash(text)).standard_normal(self.embed_dim).tolist() for text in texts]
+        return {"model": kwargs.get("model", "fake"), "embeddings": vectors}
+
+    # --- Obsługa żądania (wspólna dla klienta w procesie i serwera HTTP)
+
+    def _enter(self) -> None:
+        with self._lock:
+            self._waiting += 1
+            self.stats["max_queue"] = max(self.stats["max_queue"], self._waiting - self.slots)
+
+    def _leave(self) -> None:
+        with self._lock:
+            self._waiting -= 1
+
+    def handle(self, method: str, kwargs: Dict) -> Dict:
+        self._enter()
+        try:
+            with self._slots:
+                latency = self.sample_latency(self._items(kwargs.get("format")))
+                time.sleep(latency)
+                if self._fails():
+                    raise ResponseError("simulated overload", 503)
+                return self._embed_response(kwargs) if method == "embed" else self._chat_response(kwargs, latency)
+        finally:
+            self._leave()
+
+    async def ahandle(self, method: str, kwargs: Dict) -> Dict:
+        # Sloty w wątku roboczym — semafor wątkowy nie blokuje pętli zdarzeń
+        return await asyncio.to_thread(self.handle, method, kwargs)
+
+
+def _stable_hash(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=4).digest(), "big")
+
+
+class FakeOllamaClient:
+    '''Zamiennik `ollama.Client` (metody `chat` i `embed`) obsługiwany przez FakeOllamaBackend, bez sieci.'''
+
+    def __init__(self, backend: FakeOllamaBackend):
+        self.backend = backend
+
+    def chat(self, **kwargs):
+        return self.backend.handle("chat", kwargs)
+
+    def embed(self, **kwargs):
+        return self.backend.handle("embed", kwargs)
+
+
+class AsyncFakeOllamaClient:
+    '''Zamiennik `ollama.AsyncClient` obsługiwany przez FakeOllamaBackend.'''
+
+    def __init__(self, backend: FakeOllamaBackend):
+        self.backend = backend
+
+    async def chat(self, **kwargs):
+        return await self.backend.ahandle("chat", kwargs)
+
+    async def embed(self, **kwargs):
+        return await self.backend.ahandle("embed", kwargs)
+
+
+def serve_fake_ollama(backend: FakeOllamaBackend, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    '''
+    Lokalny serwer HTTP z API /api/chat i /api/embed na FakeOllamaBackend — dla prawdziwego
+    `ollama.Client` (koszt httpx i serializacji w pomiarze). Adres: `http://host:server.server_port`;
+    zatrzymanie przez `server.shutdown()`.
+    '''
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            kwargs = json.loads(self.rfile.read(int(self.headers["Content-Length"])) or b"{}")
+            method = "embed" if self.path.endswith("/embed") else "chat"
+            try:
+                status, body = 200, backend.handle(method, kwargs)
+            except ResponseError as e:
+                status, body = e.status_code, {"error": e.error}
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -1,14 +1,14 @@
 import os
-import matplotlib.pyplot as plt
-import seaborn as sns
-from typing import Dict, Any
+from typing import Dict, Any, List
 import pandas as pd
-from collections import Counter, defaultdict
 
-from review_analyzer.domain.interfaces import ReviewAnalyzer
+from review_analyzer.domain.interfaces import IncrementalReviewAnalyzer
+from review_analyzer.infrastructure.chart_renderer import ChartRenderer, chart_spec
+from review_analyzer.infrastructure.aggregate_state import pair_counts, merge_pair_counts, most_common, sorted_counts, \
+    moments, empty_moments, merge_moments, mean
 
 
-class GlobalAspectAnalyzer(ReviewAnalyzer):
+class GlobalAspectAnalyzer(IncrementalReviewAnalyzer):
     """
     Analyzes a DataFrame with the following columns:
     - appid
@@ -16,91 +16,107 @@ class GlobalAspectAnalyzer(ReviewAnalyzer):
     - aspect
     - labels
 
-    Returns statistics about aspect-label relationships.
+    Returns statistics about aspect-label relationships. The statistics are computed from
+    a mergeable partial state, so batches, shards and runs can be combined with merge_states.
     """
-    def __init__(self, label: str = 'normal'):
+    def __init__(self, label: str = 'normal', renderer: ChartRenderer = None):
         self.results = {}
         self.label = label
+        self.renderer = renderer or ChartRenderer()
 
-    def analyze_data(self, data: pd.DataFrame) -> Dict[str, Any]:
+    # --- Partial state: label -> aspect and aspect -> label counters, moments of labels per review
+
+    def empty_state(self) -> Dict[str, Any]:
+        return {"rows": 0, "label_aspects": {}, "aspect_labels": {}, "labels_per_review": empty_moments()}
+
+    def partial_state(self, data: pd.DataFrame) -> Dict[str, Any]:
+        return {
+            "rows": len(data),
+            # {label: {aspect: count}} and {aspect: {label: count}}, both in order of first appearance of the pair
+            "label_aspects": pair_counts(data["labels"], data["aspect"]),
+            "aspect_labels": pair_counts(data["aspect"], data["labels"]),
+            "labels_per_review": moments(data.groupby("recommendationid")["labels"].nunique()),
+        }
+
+    def merge_states(self, state: Dict[str, Any], other: Dict[str, Any]) -> Dict[str, Any]:
+        # In place: only the keys present in `other` are touched
+        state["rows"] += other["rows"]
+        merge_pair_counts(state["label_aspects"], other["label_aspects"])
+        merge_pair_counts(state["aspect_labels"], other["aspect_labels"])
+        state["labels_per_review"] = merge_moments(state["labels_per_review"], other["labels_per_review"])
+        return state
+
+    def summarize(self, state: Dict[str, Any]) -> Dict[str, Any]:
         self.results = {}
+        aspects_by_label = state["label_aspects"]
+        labels_by_aspect = state["aspect_labels"]
+        aspect_counts = {aspect: sum(labels.values()) for aspect, labels in labels_by_aspect.items()}
+        label_counts = {label: sum(aspects.values()) for label, aspects in aspects_by_label.items()}
 
         # 1. Count of total and unique aspects
-        self.results["total_aspects"] = len(data)
-        self.results["unique_aspects"] = data["aspect"].nunique()
+        self.results["total_aspects"] = state["rows"]
+        self.results["unique_aspects"] = len(aspect_counts)
 
         # 2. Label distribution
-        label_counts = data["labels"].value_counts()
-        self.results["label_distribution"] = label_counts.to_dict()
+        self.results["label_distribution"] = sorted_counts(label_counts)
 
         # 3. Top 10 most frequent aspects overall
-        top_aspects = data["aspect"].value_counts().head(10)
-        self.results["top_aspects_overall"] = top_aspects.to_dict()
-
-        # 4. Top 10 aspects per label
-        label_aspect_counts = defaultdict(Counter)
-        for _, row in data.iterrows():
-            label_aspect_counts[row["labels"]][row["aspect"]] += 1
+        self.results["top_aspects_overall"] = dict(list(sorted_counts(aspect_counts).items())[:10])
 
+        # 4. Top 10 aspects per label (ties keep first-appearance order, like Counter.most_common)
         self.results["top_aspects_per_label"] = {
-            label: dict(counter.most_common(10))
-            for label, counter in label_aspect_counts.items()
+            label: dict(most_common(aspects, 10))
+            for label, aspects in aspects_by_label.items()
         }
 
         # 5. Aspects with multiple labels
-        aspect_to_labels = defaultdict(set)
-        for _, row in data.iterrows():
-            aspect_to_labels[row["aspect"]].add(row["labels"])
-
-        multi_label_aspects = {
-            aspect: list(labels)
-            for aspect, labels in aspect_to_labels.items()
-            if len(labels) > 1
-        }
+        multi_label_aspects = [aspect for aspect, labels in labels_by_aspect.items() if len(labels) > 1]
 
         self.results["multi_label_aspects_count"] = len(multi_label_aspects)
-        self.results["multi_label_aspects_sample"] = dict(list(multi_label_aspects.items())[:10])
+        self.results["multi_label_aspects_sample"] = {
+            aspect: _label_set(labels_by_aspect[aspect])
+            for aspect in multi_label_aspects[:10]
+        }
 
         # 6. Labels per recommendationid
-        labels_per_rec = data.groupby("recommendationid")["labels"].nunique()
-        self.results["avg_labels_per_review"] = float(labels_per_rec.mean())
-        self.results["max_labels_per_review"] = int(labels_per_rec.max())
-        self.results["min_labels_per_review"] = int(labels_per_rec.min())
+        labels_per_rec = state["labels_per_review"]
+        self.results["avg_labels_per_review"] = float(mean(labels_per_rec))
+        self.results["max_labels_per_review"] = labels_per_rec["max"]
+        self.results["min_labels_per_review"] = labels_per_rec["min"]
 
         return self.results
 
-    def generate_charts(self, output_dir: str = r"review_analyzer\output\charts"):
-        os.makedirs(output_dir, exist_ok=True)
+    def chart_specs(self, output_dir: str) -> List[Dict[str, Any]]:
+        specs = []
 
         # 1. Label distribution
-        labels, counts = zip(*self.results["label_distribution"].items())
-        plt.figure(figsize=(8, 5))
-        sns.barplot(x=list(labels), y=list(counts))
-        plt.title("Label Distribution")
-        plt.ylabel("Count")
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        plt.savefig(os.path.join(output_dir, f"{self.label}_label_distribution.png"))
-        plt.close()
+        if self.results["label_distribution"]:
+            labels, counts = zip(*self.results["label_distribution"].items())
+            specs.append(chart_spec(os.path.join(output_dir, f"{self.label}_label_distribution.png"), "Label Distribution",
+                                    x=labels, y=counts, figsize=(8, 5), ylabel="Count", rotate_xticks=True))
 
         # 2. Top aspects overall
-        aspects, counts = zip(*self.results["top_aspects_overall"].items())
-        plt.figure(figsize=(10, 6))
-        sns.barplot(x=list(counts), y=list(aspects))
-        plt.title("Top 10 Aspects Overall")
-        plt.xlabel("Count")
-        plt.tight_layout()
-        plt.savefig(os.path.join(output_dir, f"{self.label}_top_aspects_overall.png"))
-        plt.close()
+        if self.results["top_aspects_overall"]:
+            aspects, counts = zip(*self.results["top_aspects_overall"].items())
+            specs.append(chart_spec(os.path.join(output_dir, f"{self.label}_top_aspects_overall.png"), "Top 10 Aspects Overall",
+                                    x=counts, y=aspects, xlabel="Count"))
 
         # 3. Top aspects per label
         for label, aspect_counts in self.results["top_aspects_per_label"].items():
             aspects, counts = zip(*aspect_counts.items())
-            plt.figure(figsize=(10, 6))
-            sns.barplot(x=list(counts), y=list(aspects))
-            plt.title(f"Top Aspects for Label: {label}")
-            plt.xlabel("Count")
-            plt.tight_layout()
             filename = f"{self.label}_top_aspects_{label.lower().replace(' ', '_')}.png"
-            plt.savefig(os.path.join(output_dir, filename))
-            plt.close()
\ No newline at end of file
+            specs.append(chart_spec(os.path.join(output_dir, filename), f"Top Aspects for Label: {label}",
+                                    x=counts, y=aspects, xlabel="Count"))
+        return specs
+
+    def generate_charts(self, output_dir: str = r"review_analyzer\output\charts"):
+        # Agg backend, process pool and skipping charts with unchanged data are handled by ChartRenderer
+        return self.renderer.render(self.chart_specs(output_dir), output_dir)
+
+
+def _label_set(labels) -> list:
+    # Set grown one label at a time in order of first appearance — same iteration order as the former row loop
+    label_set = set()
+    for label in labels:
+        label_set.add(label)
+    return list(label_set)
@@ -3,19 +3,107 @@
 import json
 import os
 import re
-from typing import List
+from typing import List, Iterator, Any, TextIO
 from logging import Logger
 
 from review_analyzer.domain.models import Review
 from review_analyzer.domain.interfaces import ReviewRepository
 
 
+class _JsonArrayStream:
+    '''
+    Przyrostowy parser: czyta plik kawałkami i zwraca kolejne elementy tablicy
+    `key` z obiektu najwyższego poziomu, bez wczytywania całego pliku do pamięci.
+    '''
+    def __init__(self, f: TextIO, chunk_size: int = 1 << 16):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _read_more(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        # Odrzucamy już sparsowaną część bufora
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def _peek(self) -> str:
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos].isspace():
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._read_more():
+                raise json.JSONDecodeError("Nieoczekiwany koniec pliku", self.buf, self.pos)
+
+    def _next_char(self) -> str:
+        char = self._peek()
+        self.pos += 1
+        return char
+
+    def _expect(self, expected: str) -> None:
+        if self._next_char() != expected:
+            raise json.JSONDecodeError(f"Oczekiwano '{expected}'", self.buf, self.pos - 1)
+
+    def _decode_value(self) -> Any:
+        self._peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+                # Wartość kończąca się na końcu bufora może być ucięta (np. liczba) — doczytujemy
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._read_more()
+
+    def _separator(self, closing: str) -> bool:
+        # True jeśli po przecinku jest kolejny element, False na końcu kontenera
+        char = self._next_char()
+        if char == ",":
+            return True
+        if char != closing:
+            raise json.JSONDecodeError(f"Oczekiwano ',' lub '{closing}'", self.buf, self.pos - 1)
+        return False
+
+    def iter_items(self, key: str) -> Iterator[Any]:
+        self._expect("{")
+        if self._peek() == "}":
+            return
+        while True:
+            name = self._decode_value()
+            self._expect(":")
+
+            if name == key:
+                self._expect("[")
+                if self._peek() == "]":
+                    return
+                while True:
+                    yield self._decode_value()
+                    if not self._separator("]"):
+                        return
+
+            self._decode_value()
+            if not self._separator("}"):
+                return
+
+
 class JsonReviewLoader(ReviewRepository):
     def __init__(self, filepath: str, logger: Logger):
         self.filepath = filepath
         self.logger = logger
         self.appid = self._extract_appid(filepath)
-        
+
     def _extract_appid(self, filename: str) -> int:
         # Zakładamy że plik nazywa się w formacie: {appid}_{timestamp}.json
         match = re.match(r"(\d+)_\d+\.json$", os.path.basename(filename))
@@ -24,32 +112,40 @@ class JsonReviewLoader(ReviewRepository):
             raise ValueError(f"Nieprawidłowa nazwa pliku: {filename}")
         return int(match.group(1))
 
-    def load_reviews(self, language: str = None) -> List[Review]:
+    def _build_review(self, r: dict) -> Review:
+        return Review(
+            appid=self.appid,
+            recommendationid=r.get("recommendationid", ""),
+            language=r.get("language", ""),
+            review=r.get("review", ""),
+            votes_funny=r.get("votes_funny", 0),
+            voted_up=r.get("voted_up", False)
+        )
+
+    def iter_reviews(self, language: str = None) -> Iterator[Review]:
         '''
-        Zwraca listę Review. Jeśli `language` jest podane, filtruje po nim.
+        Zwraca generator Review czytający plik strumieniowo — pamięć nie rośnie z rozmiarem zrzutu.
+        Filtr `language` jest stosowany w trakcie parsowania, więc odrzucone recenzje
+        nigdy nie są zamieniane na obiekty Review.
         '''
         self.logger.info("Wczytywanie recenzji z pliku: %s", self.filepath)
-        with open(self.filepath, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-
-        reviews = data.get("reviews", [])
-        result = []
-
         if language:
             self.logger.debug("Filtrowanie recenzji po języku: %s", language)
 
-        for r in reviews:
-            if language and r.get("language") != language:
-                continue
-
-            result.append(Review(
-                appid=self.appid,
-                recommendationid=r.get("recommendationid", ""),
-                language=r.get("language", ""),
-                review=r.get("review", ""),
-                votes_funny=r.get("votes_funny", 0),
-                voted_up=r.get("voted_up", False)
-            ))
-            
-        self.logger.info("Załadowano %d recenzji (z %d oryginalnych)", len(result), len(reviews))
-        return result
+        loaded = 0
+        total = 0
+        with open(self.filepath, 'r', encoding='utf-8') as f:
+            for r in _JsonArrayStream(f).iter_items("reviews"):
+                total += 1
+                if language and r.get("language") != language:
+                    continue
+                loaded += 1
+                yield self._build_review(r)
+
+        self.logger.info("Załadowano %d recenzji (z %d oryginalnych)", loaded, total)
+
+    def load_reviews(self, language: str = None) -> List[Review]:
+        '''
+        Zwraca listę Review. Jeśli `language` jest podane, filtruje po nim.
+        '''
+        return list(self.iter_reviews(language))
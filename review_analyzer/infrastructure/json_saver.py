@@ -1,11 +1,15 @@
 from logging import Logger
-from typing import List
+from typing import List, Set
 import json
+import os
 
 class JsonlSaver: # many keys
-    def __init__(self, output_path: str, logger: Logger):
+    def __init__(self, output_path: str, logger: Logger, flush_every: int = 20):
         self.output_path = output_path
         self.logger = logger
+        self.flush_every = flush_every
+        self._file = None
+        self._pending = 0
 
     def save(self, data: List[dict]):
         with open(self.output_path, "w", encoding="utf-8") as f:
@@ -13,6 +17,110 @@ class JsonlSaver: # many keys
                 f.write(json.dumps(item, ensure_ascii=False) + "\n")
         self.logger.info('Wyniki zapisano do pliku: %s', self.output_path)
 
+    # --- Zapis przyrostowy (checkpoint)
+
+    def finished_ids(self) -> Set[str]:
+        '''
+        Zwraca recommendationid już zapisanych wyników. Ucięta ostatnia linia
+        (przerwany zapis) jest usuwana z pliku, aby dopisywanie zaczęło się od nowej linii.
+        '''
+        if not os.path.exists(self.output_path):
+            return set()
+
+        done = set()
+        valid_bytes = 0
+        with open(self.output_path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    item = json.loads(line.decode("utf-8"))
+                    done.add(str(item["recommendationid"]))
+                except (ValueError, KeyError, TypeError) as e:
+                    self.logger.warning("Pominięto uszkodzoną linię w %s: %s", self.output_path, e)
+                valid_bytes += len(line)
+
+        if valid_bytes < os.path.getsize(self.output_path):
+            self.logger.warning("Usunięto uciętą ostatnią linię z: %s", self.output_path)
+            with open(self.output_path, "r+b") as f:
+                f.truncate(valid_bytes)
+
+        self.logger.info("Znaleziono %d zapisanych wyników w: %s", len(done), self.output_path)
+        return done
+
+    def open(self, append: bool = False):
+        self._file = open(self.output_path, "a" if append else "w", encoding="utf-8")
+        self._pending = 0
+        return self
+
+    def write(self, item: dict):
+        self._file.write(json.dumps(item, ensure_ascii=False) + "\n")
+        self._pending += 1
+        if self._pending >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        # Po flush dane są w buforach systemu — przetrwają awarię procesu
+        self._file.flush()
+        self._pending = 0
+
+    def close(self):
+        if self._file is not None:
+            self.flush()
+            self._file.close()
+            self._file = None
+            self.logger.info('Wyniki zapisano do pliku: %s', self.output_path)
+
+    # --- Ponowne przetwarzanie błędnych wierszy (--only-errors)
+
+    def error_rows(self) -> List[dict]:
+        if not os.path.exists(self.output_path):
+            return []
+        rows = []
+        with open(self.output_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    item = json.loads(line)
+                except ValueError:
+                    continue
+                if "error" in item:
+                    rows.append(item)
+        self.logger.info("Znaleziono %d wierszy z błędem w: %s", len(rows), self.output_path)
+        return rows
+
+    def replace(self, data: List[dict]):
+        '''
+        Podmienia w pliku wiersze o tych samych recommendationid (kolejność pliku zostaje).
+        Zapis do pliku tymczasowego i os.replace — przerwanie nie zostawia połowicznego pliku.
+        '''
+        updates = {str(item["recommendationid"]): item for item in data}
+        tmp_path = f"{self.output_path}.tmp"
+        replaced = 0
+        with open(self.output_path, encoding="utf-8") as src, open(tmp_path, "w", encoding="utf-8") as dst:
+            for line in src:
+                try:
+                    rid = str(json.loads(line).get("recommendationid"))
+                except (ValueError, AttributeError):
+                    rid = None
+                if rid in updates:
+                    line = json.dumps(updates.pop(rid), ensure_ascii=False) + "\n"
+                    replaced += 1
+                dst.write(line)
+        os.replace(tmp_path, self.output_path)
+        self.logger.info("Podmieniono %d wierszy w pliku: %s", replaced, self.output_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+class JsonlPatchSaver(JsonlSaver):
+    '''`save` podmienia istniejące wiersze zamiast nadpisywać plik — dla ponownego przetwarzania błędów.'''
+
+    def save(self, data: List[dict]):
+        self.replace(data)
+
 class JsonSaver: # only one 
     def __init__(self, filepath: str, logger=None):
         self.filepath = filepath
@@ -0,0 +1,41 @@
+import json
+import re
+from logging import Logger
+from typing import Dict, List, Optional
+
+
+class LexiconAspectClassifier:
+    '''
+    Szybka ścieżka przed modelem: słowa kluczowe i wyrażenia regularne dla każdej kategorii,
+    skompilowane do jednego wzorca z nazwanymi grupami. Aspekt dostaje etykietę tylko wtedy,
+    gdy wszystkie trafienia wskazują jedną kategorię; brak trafień lub kilka kategorii
+    oznacza brak pewności (None) i decyzję modelu. Leksykon zawiera wyłącznie jednoznaczne
+    słowa — wieloznaczne (np. "lag": wydajność czy sieć) zostawiamy modelowi.
+
+    Format leksykonu: {"Kategoria": {"keywords": [...], "patterns": [...]}}.
+    '''
+
+    def __init__(self, lexicon: Dict[str, Dict[str, List[str]]], logger: Logger):
+        self.logger = logger
+        self.labels = list(lexicon)
+
+        groups = []
+        for i, label in enumerate(self.labels):
+            entry = lexicon[label]
+            alternatives = [rf"\b{re.escape(keyword)}\b" for keyword in entry.get("keywords", [])]
+            alternatives += entry.get("patterns", [])
+            if alternatives:
+                groups.append(f"(?P<l{i}>{'|'.join(alternatives)})")
+        self.matcher = re.compile("|".join(groups), re.IGNORECASE)
+        self.logger.debug("Leksykon etykiet: %d kategorii", len(groups))
+
+    @classmethod
+    def from_file(cls, path, logger: Logger, **kwargs) -> "LexiconAspectClassifier":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f), logger, **kwargs)
+
+    def classify(self, aspect: str) -> Optional[List[str]]:
+        found = {self.labels[int(match.lastgroup[1:])] for match in self.matcher.finditer(aspect or "")}
+        if len(found) != 1:
+            return None
+        return list(found)
@@ -1,17 +1,51 @@
-from ollama import Client
+from ollama import Client, AsyncClient
 import json
 import re
-from typing import List, Dict
+import time
+from typing import List, Dict, Optional, Tuple
 from logging import Logger
 
 from review_analyzer.domain.interfaces import ReviewAspectExtractor
+from review_analyzer.infrastructure.llm_cache import SqliteResponseCache
+from review_analyzer.infrastructure.request_metrics import RequestMetrics
+from review_analyzer.infrastructure.prompt_prefix import split_prompt, chat_messages
+from review_analyzer.infrastructure.retry import without_retries
+
+# Fragment prompt_extract.txt, od którego zaczyna się część dla pojedynczej recenzji —
+# prompt wsadowy bierze instrukcje sprzed niego i dokleja prompt_extract_batch.txt
+SINGLE_REVIEW_MARKER = "NOW ANALYZE THIS REVIEW:"
+
+# Schemat odpowiedzi przekazywany w parametrze `format` Ollamy — model generuje wyłącznie ten JSON
+EXTRACT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "liked": {"type": "array", "items": {"type": "string"}},
+        "disliked": {"type": "array", "items": {"type": "string"}},
+    },
+    "required": ["liked", "disliked"],
+}
 
 class MistralSentimentAspectExtractor(ReviewAspectExtractor):
-    def __init__(self, client: Client, model_name: str, prompt: str, logger: Logger):
+    def __init__(self, client: Client, model_name: str, prompt: str, logger: Logger, cache: SqliteResponseCache = None,
+                 async_client: AsyncClient = None, batch_prompt_template: str = None, structured_output: bool = True,
+                 metrics: RequestMetrics = None, system_prefix: bool = True, keep_alive=None):
         self.client = client
+        self.async_client = async_client
         self.prompt_template = prompt
+        self.batch_prompt_template = batch_prompt_template
         self.model = model_name
         self.logger = logger
+        self.cache = cache
+        self.options = {"temperature": 0.15} # from https://ollama.com/MHKetbi/Mistral-Small3.1-24B-Instruct-2503:q5_K_L
+        self.structured_output = structured_output
+        self.metrics = metrics
+        # system_prefix: instrukcje jako stała wiadomość systemowa, recenzja w osobnej wiadomości
+        self.system_prompt, self.user_template = split_prompt(prompt, SINGLE_REVIEW_MARKER) if system_prefix else (None, prompt)
+        self.keep_alive = keep_alive  # np. "30m" — jak długo Ollama trzyma model w pamięci po zapytaniu
+        # Odpowiedzi generowane ze schematem i bez niego (oraz z podziałem promptu i bez) mają osobne wpisy w cache
+        self._key_options = {**self.options, "format": EXTRACT_SCHEMA} if structured_output else dict(self.options)
+        if self.system_prompt is not None:
+            self._key_options["system_prefix"] = True
 
 
     def _build_result(self, review, liked: List[str], disliked: List[str], error: str = None) -> Dict:
@@ -34,37 +68,209 @@ class MistralSentimentAspectExtractor(ReviewAspectExtractor):
             raise json.JSONDecodeError("No valid JSON found", text, 0)
         return json.loads(match.group(0))
 
-    def extract_sentence_sentiment(self, review) -> Dict: 
-        prompt = self.prompt_template.replace("{INSERT_REVIEW_HERE}", review.review)
+    def _parse(self, raw: str) -> Dict:
+        # Odpowiedź ze schematem to czysty JSON; regex tylko dla starszych odpowiedzi (np. z cache)
         try:
-            response = self.client.chat(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt}],
-                options={"temperature": 0.15} # from https://ollama.com/MHKetbi/Mistral-Small3.1-24B-Instruct-2503:q5_K_L
-            )
-            self.logger.debug('RESPONSE: %s', response)
+            parsed = json.loads(raw)
+            if isinstance(parsed, dict):
+                return parsed
+        except json.JSONDecodeError:
+            pass
+        return self._extract_json(raw)
 
-            #parsed = json.loads(response["message"]["content"])
-            raw = response["message"]["content"]
-            parsed = self._extract_json(raw)
+    def _request(self, prompt: str, schema: Dict) -> Dict:
+        kwargs = {
+            "model": self.model,
+            "messages": chat_messages(self.system_prompt, prompt),
+            "options": self.options,
+        }
+        if self.structured_output:
+            kwargs["format"] = schema
+        if self.keep_alive is not None:
+            kwargs["keep_alive"] = self.keep_alive
+        return kwargs
 
-            return self._build_result(
-                review,
-                liked=parsed.get("liked", []),
-                disliked=parsed.get("disliked", [])
-            )
+    def _chat_kwargs(self, review) -> Dict:
+        prompt = self.user_template.replace("{INSERT_REVIEW_HERE}", review.review)
+        return self._request(prompt, EXTRACT_SCHEMA)
+
+    def warm_up(self) -> None:
+        '''
+        Ładuje model (z `keep_alive`) i wylicza cache KV instrukcji systemowych jednym krótkim
+        zapytaniem na starcie, zamiast przy pierwszej recenzji. Błąd nie przerywa przetwarzania.
+        '''
+        kwargs = self._request("OK", EXTRACT_SCHEMA)
+        kwargs["options"] = {**self.options, "num_predict": 1}
+        try:
+            # Jedna próba, bez ponowień: niedostępny host nie wstrzymuje startu na czas backoffu
+            without_retries(self.client).chat(**kwargs)  # poza metrykami — czas ładowania modelu zawyżyłby percentyle
+            self.logger.info("Model %s rozgrzany (keep_alive=%s)", self.model, self.keep_alive)
+        except Exception as e:
+            self.logger.warning("Rozgrzewka modelu %s nieudana: %s", self.model, e)
+
+    def _send(self, kwargs: Dict, kind: str = "single"):
+        start = time.perf_counter()
+        response = self.client.chat(**kwargs)
+        self.logger.debug('RESPONSE: %s', response)
+        if self.metrics is not None:
+            self.metrics.record(response, time.perf_counter() - start, kind)
+        return response
 
-        except json.JSONDecodeError as e:
+    async def _asend(self, kwargs: Dict, kind: str = "single"):
+        start = time.perf_counter()
+        response = await self.async_client.chat(**kwargs)
+        self.logger.debug('RESPONSE: %s', response)
+        if self.metrics is not None:
+            self.metrics.record(response, time.perf_counter() - start, kind)
+        return response
+
+    def _chat(self, review) -> str:
+        return self._send(self._chat_kwargs(review))["message"]["content"]
+
+    async def _achat(self, review) -> str:
+        return (await self._asend(self._chat_kwargs(review)))["message"]["content"]
+
+    def _lookup(self, review, template: str = None) -> Tuple[Optional[str], Optional[str]]:
+        # Zwraca (klucz cache, zapisana odpowiedź) — (None, None) gdy cache wyłączony
+        if self.cache is None:
+            return None, None
+        key = self.cache.make_key(self.model, template or self.prompt_template, review.review, self._key_options)
+        return key, self.cache.get(key)
+
+    def _finish(self, review, raw: str, key: str = None) -> Dict:
+        parsed = self._parse(raw)
+        # Do cache trafiają tylko odpowiedzi, które dało się sparsować
+        if key is not None:
+            self.cache.put(key, raw)
+
+        return self._build_result(
+            review,
+            liked=parsed.get("liked", []),
+            disliked=parsed.get("disliked", [])
+        )
+
+    def _failure(self, review, e: Exception) -> Dict:
+        if isinstance(e, json.JSONDecodeError):
             self.logger.warning(
                 "Błąd dekodowania JSON z modelu (recommendationid=%s): %s",
                 review.recommendationid, str(e)
             )
             return self._build_result(review, [], [], error="json_decode")
 
+        self.logger.error(
+            "Błąd podczas przetwarzania review (recommendationid=%s): %s",
+            review.recommendationid, str(e),
+            exc_info=True
+        )
+        return self._build_result(review, [], [], error=str(e))
+
+    def extract_sentence_sentiment(self, review) -> Dict:
+        try:
+            key, raw = self._lookup(review)
+            if raw is not None:
+                return self._finish(review, raw)
+            return self._finish(review, self._chat(review), key)
         except Exception as e:
-            self.logger.error(
-                "Błąd podczas przetwarzania review (recommendationid=%s): %s",
-                review.recommendationid, str(e),
-                exc_info=True
-            )
-            return self._build_result(review, [], [], error=str(e))
\ No newline at end of file
+            return self._failure(review, e)
+
+    async def aextract_sentence_sentiment(self, review) -> Dict:
+        '''Wersja asynchroniczna przez `async_client` (ollama.AsyncClient); bez niego — w wątku.'''
+        if self.async_client is None:
+            return await super().aextract_sentence_sentiment(review)
+        try:
+            key, raw = self._lookup(review)
+            if raw is not None:
+                return self._finish(review, raw)
+            return self._finish(review, await self._achat(review), key)
+        except Exception as e:
+            return self._failure(review, e)
+
+
+    # --- Ekstrakcja wsadowa: kilka recenzji w jednym zapytaniu, odpowiedź kluczowana recommendationid
+
+    def _batch_kwargs(self, reviews) -> Dict:
+        # Z podziałem promptu instrukcje są już w wiadomości systemowej — ten sam prefiks co dla pojedynczych
+        instructions = "" if self.system_prompt is not None else self.prompt_template.split(SINGLE_REVIEW_MARKER)[0]
+        listing = "\n".join(
+            f'Review {review.recommendationid}:\n"""\n{review.review}\n"""\n' for review in reviews
+        )
+        prompt = instructions + self.batch_prompt_template.replace("{INSERT_REVIEWS_HERE}", listing)
+        ids = [str(review.recommendationid) for review in reviews]
+        schema = {"type": "object", "properties": {rid: EXTRACT_SCHEMA for rid in ids}, "required": ids}
+        return self._request(prompt, schema)
+
+    def _batch_pending(self, reviews, results: Dict[int, Dict]) -> List[Tuple[int, object, Optional[str]]]:
+        # Wyniki z cache trafiają od razu do `results`, reszta czeka na zapytanie wsadowe
+        pending = []
+        template = self.prompt_template + self.batch_prompt_template
+        for i, review in enumerate(reviews):
+            key, raw = self._lookup(review, template)
+            if raw is not None:
+                try:
+                    results[i] = self._finish(review, raw)
+                    continue
+                except json.JSONDecodeError:
+                    pass
+            pending.append((i, review, key))
+        return pending
+
+    def _apply_batch(self, response, pending, results: Dict[int, Dict]) -> None:
+        raw = response["message"]["content"]
+        try:
+            parsed = json.loads(raw)
+        except json.JSONDecodeError:
+            start, end = raw.find("{"), raw.rfind("}")
+            if start == -1 or end < start:
+                raise json.JSONDecodeError("No valid JSON found", raw, 0)
+            parsed = json.loads(raw[start:end + 1])
+
+        for i, review, key in pending:
+            item = parsed.get(str(review.recommendationid))
+            if not isinstance(item, dict):
+                continue
+            liked, disliked = item.get("liked", []), item.get("disliked", [])
+            if not (isinstance(liked, list) and isinstance(disliked, list)):
+                continue
+            results[i] = self._build_result(review, liked=liked, disliked=disliked)
+            if key is not None:
+                self.cache.put(key, json.dumps({"liked": liked, "disliked": disliked}, ensure_ascii=False))
+
+    def _batch_missing(self, pending, results: Dict[int, Dict]) -> List:
+        missing = [(i, review) for i, review, _ in pending if i not in results]
+        if missing:
+            self.logger.debug("Ekstrakcja wsadowa: %d/%d recenzji bez wyniku — pojedyncze zapytania", len(missing), len(pending))
+        return missing
+
+    def extract_batch(self, reviews) -> List[Dict]:
+        if not self.batch_prompt_template or len(reviews) < 2:
+            return super().extract_batch(reviews)
+
+        results = {}
+        pending = self._batch_pending(reviews, results)
+        if len(pending) > 1:
+            try:
+                response = self._send(self._batch_kwargs([review for _, review, _ in pending]), "batch")
+                self._apply_batch(response, pending, results)
+            except Exception as e:
+                self.logger.warning("Błąd ekstrakcji wsadowej (%d recenzji): %s", len(pending), e)
+
+        for i, review in self._batch_missing(pending, results):
+            results[i] = self.extract_sentence_sentiment(review)
+        return [results[i] for i in range(len(reviews))]
+
+    async def aextract_batch(self, reviews) -> List[Dict]:
+        if self.async_client is None or not self.batch_prompt_template or len(reviews) < 2:
+            return await super().aextract_batch(reviews)
+
+        results = {}
+        pending = self._batch_pending(reviews, results)
+        if len(pending) > 1:
+            try:
+                response = await self._asend(self._batch_kwargs([review for _, review, _ in pending]), "batch")
+                self._apply_batch(response, pending, results)
+            except Exception as e:
+                self.logger.warning("Błąd ekstrakcji wsadowej (%d recenzji): %s", len(pending), e)
+
+        for i, review in self._batch_missing(pending, results):
+            results[i] = await self.aextract_sentence_sentiment(review)
+        return [results[i] for i in range(len(reviews))]
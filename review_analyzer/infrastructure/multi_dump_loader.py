@@ -0,0 +1,92 @@
+# infrastructure/multi_dump_loader.py
+
+import glob
+import os
+import re
+from collections import defaultdict
+from typing import List, Dict, Iterator
+from logging import Logger
+
+from review_analyzer.domain.models import Review
+from review_analyzer.domain.interfaces import ReviewRepository
+from review_analyzer.infrastructure.json_loader import JsonReviewLoader
+
+DUMP_NAME = re.compile(r"(\d+)_(\d+)\.json$")
+
+
+def is_multi_source(source) -> bool:
+    '''Czy ścieżka wskazuje na katalog lub wzorzec glob zamiast pojedynczego zrzutu.'''
+    source = str(source)
+    return os.path.isdir(source) or glob.has_magic(source)
+
+
+class AppidReviewView(ReviewRepository):
+    '''Widok na recenzje jednej gry zebrane ze wszystkich jej zrzutów.'''
+    def __init__(self, parent: "MultiDumpReviewLoader", appid: int):
+        self.parent = parent
+        self.appid = appid
+
+    def iter_reviews(self, language: str = None) -> Iterator[Review]:
+        return self.parent.iter_reviews(language, appid=self.appid)
+
+    def load_reviews(self, language: str = None) -> List[Review]:
+        return list(self.iter_reviews(language))
+
+
+class MultiDumpReviewLoader(ReviewRepository):
+    '''
+    Wczytuje wiele zrzutów {appid}_{timestamp}.json z katalogu lub wzorca glob,
+    grupuje je po appid i usuwa duplikaty recommendationid między nakładającymi się zrzutami.
+    Przy duplikatach wygrywa wersja z najnowszego zrzutu.
+    '''
+    def __init__(self, source: str, logger: Logger):
+        self.source = str(source)
+        self.logger = logger
+        self.dumps = self._discover()
+
+    def _discover(self) -> Dict[int, List[JsonReviewLoader]]:
+        pattern = os.path.join(self.source, "*.json") if os.path.isdir(self.source) else self.source
+        found = defaultdict(list)
+
+        for path in sorted(glob.glob(pattern)):
+            match = DUMP_NAME.search(os.path.basename(path))
+            if not match:
+                self.logger.warning("Pominięto plik o nieprawidłowej nazwie: %s", path)
+                continue
+            found[int(match.group(1))].append((int(match.group(2)), path))
+
+        dumps = {}
+        for appid, entries in sorted(found.items()):
+            entries.sort(reverse=True)  # najnowszy zrzut pierwszy
+            dumps[appid] = [JsonReviewLoader(path, self.logger) for _, path in entries]
+
+        self.logger.info(
+            "Znaleziono %d zrzutów dla %d gier w: %s",
+            sum(len(v) for v in dumps.values()), len(dumps), self.source
+        )
+        return dumps
+
+    def appids(self) -> List[int]:
+        return list(self.dumps)
+
+    def for_appid(self, appid: int) -> AppidReviewView:
+        return AppidReviewView(self, appid)
+
+    def iter_reviews(self, language: str = None, appid: int = None) -> Iterator[Review]:
+        appids = [appid] if appid is not None else self.appids()
+
+        for current in appids:
+            seen = set()
+            duplicates = 0
+            for loader in self.dumps.get(current, []):
+                for review in loader.iter_reviews(language):
+                    if review.recommendationid in seen:
+                        duplicates += 1
+                        continue
+                    seen.add(review.recommendationid)
+                    yield review
+
+            self.logger.info("appid=%s: %d unikalnych recenzji, %d duplikatów pominięto", current, len(seen), duplicates)
+
+    def load_reviews(self, language: str = None) -> List[Review]:
+        return list(self.iter_reviews(language))
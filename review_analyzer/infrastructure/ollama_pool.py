@@ -0,0 +1,150 @@
+import threading
+import time
+from logging import Logger
+from typing import Callable, List, Optional, Sequence, Tuple, Union
+
+from ollama import AsyncClient, Client, ResponseError
+
+from review_analyzer.infrastructure.retry import RetryPolicy
+
+HostSpec = Union[str, Tuple[str, float]]
+
+
+def parse_hosts(spec: str) -> List[Tuple[str, float]]:
+    '''"http://a:11434=2,http://b:11434" -> [("http://a:11434", 2.0), ("http://b:11434", 1.0)]'''
+    hosts = []
+    for part in (spec or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        host, sep, weight = part.rpartition("=")
+        hosts.append((host, float(weight)) if sep else (part, 1.0))
+    return hosts
+
+
+class _Host:
+    def __init__(self, url: str, weight: float, client):
+        self.url = url
+        self.weight = weight
+        self.client = client
+        self.in_flight = 0
+        self.ejected_until = 0.0
+        self.failures = 0
+        self.requests = 0
+
+
+class _HostPool:
+    '''
+    Wspólna logika wyboru hosta: najmniejsze obciążenie (żądania w locie / waga) spośród
+    zdrowych hostów. Host, który zwrócił błąd połączenia lub 5xx, jest wyłączany na
+    `eject_seconds` (z każdą kolejną porażką dłużej, do `max_eject_seconds`).
+    '''
+
+    def __init__(self, hosts: Sequence[HostSpec], logger: Logger, client_factory: Callable, eject_seconds: float = 30.0,
+                 max_eject_seconds: float = 300.0):
+        if not hosts:
+            raise ValueError("Pula hostów Ollama jest pusta")
+        self.logger = logger
+        self.eject_seconds = eject_seconds
+        self.max_eject_seconds = max_eject_seconds
+        self.hosts = []
+        for spec in hosts:
+            url, weight = (spec, 1.0) if isinstance(spec, str) else spec
+            self.hosts.append(_Host(url, weight, client_factory(host=url)))
+        self._lock = threading.Lock()
+
+    def _acquire(self, exclude: set) -> _Host:
+        with self._lock:
+            now = time.monotonic()
+            candidates = [h for h in self.hosts if h.url not in exclude] or self.hosts
+            healthy = [h for h in candidates if h.ejected_until <= now]
+            if healthy:
+                # Remis (np. bez obciążenia) rozstrzyga łączna liczba żądań — ruch rozkłada się według wag
+                host = min(healthy, key=lambda h: ((h.in_flight + 1) / h.weight, h.requests / h.weight))
+            else:
+                # Wszystkie wyłączone — próbujemy ten, który najwcześniej wraca
+                host = min(candidates, key=lambda h: h.ejected_until)
+            host.in_flight += 1
+            host.requests += 1
+            return host
+
+    def _release(self, host: _Host, error: Optional[Exception] = None) -> None:
+        with self._lock:
+            host.in_flight -= 1
+            if error is None:
+                host.failures = 0
+                return
+            host.failures += 1
+            pause = min(self.max_eject_seconds, self.eject_seconds * 2 ** (host.failures - 1))
+            host.ejected_until = time.monotonic() + pause
+        self.logger.warning("Host Ollama %s wyłączony na %.0fs: %s", host.url, pause, error)
+
+    @staticmethod
+    def _is_host_failure(e: Exception) -> bool:
+        # Tylko błędy transportu i 5xx — błędy zapytania (4xx, 429) i nasze własne (TypeError, JSON)
+        # nie świadczą o awarii hosta i są zgłaszane od razu, bez wyłączania hosta
+        if isinstance(e, ResponseError):
+            return e.status_code < 0 or e.status_code >= 500
+        return RetryPolicy.is_transient(e)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {h.url: {"requests": h.requests, "in_flight": h.in_flight, "failures": h.failures} for h in self.hosts}
+
+
+class OllamaClientPool(_HostPool):
+    '''Zamiennik `ollama.Client` (metody `chat` i `embed`) rozkładający żądania na kilka hostów.'''
+
+    def __init__(self, hosts: Sequence[HostSpec], logger: Logger, client_factory: Callable = Client, **kwargs):
+        super().__init__(hosts, logger, client_factory, **kwargs)
+
+    def _call(self, method: str, kwargs: dict):
+        tried, last_error = set(), None
+        for _ in range(len(self.hosts)):
+            host, error = self._acquire(tried), None
+            try:
+                return getattr(host.client, method)(**kwargs)
+            except Exception as e:
+                if not self._is_host_failure(e):
+                    raise
+                error = e
+            finally:
+                self._release(host, error)
+            tried.add(host.url)
+            last_error = error
+        raise last_error
+
+    def chat(self, **kwargs):
+        return self._call("chat", kwargs)
+
+    def embed(self, **kwargs):
+        return self._call("embed", kwargs)
+
+
+class AsyncOllamaClientPool(_HostPool):
+    '''Zamiennik `ollama.AsyncClient` — ta sama polityka wyboru hosta dla asyncio.'''
+
+    def __init__(self, hosts: Sequence[HostSpec], logger: Logger, client_factory: Callable = AsyncClient, **kwargs):
+        super().__init__(hosts, logger, client_factory, **kwargs)
+
+    async def _call(self, method: str, kwargs: dict):
+        tried, last_error = set(), None
+        for _ in range(len(self.hosts)):
+            host, error = self._acquire(tried), None
+            try:
+                return await getattr(host.client, method)(**kwargs)
+            except Exception as e:
+                if not self._is_host_failure(e):
+                    raise
+                error = e
+            finally:
+                self._release(host, error)
+            tried.add(host.url)
+            last_error = error
+        raise last_error
+
+    async def chat(self, **kwargs):
+        return await self._call("chat", kwargs)
+
+    async def embed(self, **kwargs):
+        return await self._call("embed", kwargs)
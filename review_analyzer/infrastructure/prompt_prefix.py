@@ -0,0 +1,18 @@
+from typing import Dict, List, Optional, Tuple
+
+
+def split_prompt(template: str, marker: str) -> Tuple[Optional[str], str]:
+    '''
+    Dzieli szablon na statyczne instrukcje (wszystko przed `marker`) i część zmienną (od `marker`).
+    Instrukcje idą jako stała wiadomość systemowa — identyczny początek kontekstu w każdym zapytaniu
+    pozwala Ollamie użyć ponownie cache KV promptu. Bez markera: (None, cały szablon).
+    '''
+    head, sep, tail = template.partition(marker)
+    if not sep or not head.strip():
+        return None, template
+    return head, sep + tail
+
+
+def chat_messages(system: Optional[str], prompt: str) -> List[Dict[str, str]]:
+    messages = [{"role": "system", "content": system}] if system is not None else []
+    return messages + [{"role": "user", "content": prompt}]
@@ -0,0 +1,100 @@
+import json
+import os
+import threading
+from logging import Logger
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Liczniki z odpowiedzi /api/chat Ollamy; czasy w nanosekundach
+COUNTERS = ("prompt_eval_count", "eval_count", "prompt_eval_duration", "eval_duration", "load_duration", "total_duration")
+
+
+def _counter(response, field: str) -> Optional[float]:
+    try:
+        value = response[field]
+    except (KeyError, TypeError, IndexError):
+        return None
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+
+class RequestMetrics:
+    '''
+    Metryki żądań jednego etapu (ekstrakcja, etykietowanie): liczniki tokenów i czasy z odpowiedzi
+    Ollamy oraz latencja mierzona po stronie klienta, po jednym wierszu na żądanie. `summary` liczy
+    przepustowość tokenów, udział przetwarzania promptu w czasie odpowiedzi, przestoje na ładowanie
+    modelu i percentyle latencji; `save` dopisuje podsumowanie etapu do wspólnego pliku JSON runu.
+    '''
+
+    LOAD_STALL_SECONDS = 1.0  # load_duration powyżej progu = model był (prze)ładowywany
+
+    def __init__(self, stage: str, logger: Logger):
+        self.stage = stage
+        self.logger = logger
+        self.requests: List[Dict] = []
+        self._lock = threading.Lock()
+
+    def record(self, response, latency: float, kind: str = "single") -> None:
+        row = {"kind": kind, "latency": latency}
+        for field in COUNTERS:
+            row[field] = _counter(response, field)
+        with self._lock:
+            self.requests.append(row)
+
+    def _total(self, field: str) -> float:
+        return float(sum(row[field] or 0 for row in self.requests))
+
+    def summary(self) -> Dict:
+        with self._lock:
+            rows = list(self.requests)
+        summary = {"stage": self.stage, "requests": len(rows), "by_kind": {}}
+        for row in rows:
+            summary["by_kind"][row["kind"]] = summary["by_kind"].get(row["kind"], 0) + 1
+        if not rows:
+            return summary
+
+        prompt_ns, eval_ns = self._total("prompt_eval_duration"), self._total("eval_duration")
+        total_ns, load_ns = self._total("total_duration"), self._total("load_duration")
+        latencies = np.array([row["latency"] for row in rows], dtype=float)
+        summary.update({
+            "prompt_tokens": int(self._total("prompt_eval_count")),
+            "eval_tokens": int(self._total("eval_count")),
+            "prompt_eval_seconds": prompt_ns / 1e9,
+            "prompt_tokens_per_sec": self._total("prompt_eval_count") / (prompt_ns / 1e9) if prompt_ns else None,
+            "eval_tokens_per_sec": self._total("eval_count") / (eval_ns / 1e9) if eval_ns else None,
+            "prompt_share": prompt_ns / total_ns if total_ns else None,
+            "load_stalls": sum(1 for row in rows if (row["load_duration"] or 0) / 1e9 >= self.LOAD_STALL_SECONDS),
+            "load_seconds": load_ns / 1e9,
+            "latency_seconds": {
+                "mean": float(latencies.mean()),
+                "p50": float(np.percentile(latencies, 50)),
+                "p95": float(np.percentile(latencies, 95)),
+                "p99": float(np.percentile(latencies, 99)),
+                "max": float(latencies.max()),
+            },
+        })
+        return summary
+
+    def save(self, path) -> Dict:
+        # Jeden plik na run: {etap: podsumowanie}; kolejne etapy dopisują swój klucz
+        summary = self.summary()
+        stages = {}
+        if os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    stages = json.load(f)
+            except ValueError as e:
+                self.logger.warning("Nieczytelny plik metryk %s: %s — zapis od nowa", path, e)
+        stages[self.stage] = summary
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(stages, f, indent=2, ensure_ascii=False)
+
+        latency = summary.get("latency_seconds", {})
+        self.logger.info("Metryki %s: %d żądań, %s tok/s, p50=%s s, p95=%s s, przestoje ładowania: %s — %s", self.stage,
+                         summary["requests"], _fmt(summary.get("eval_tokens_per_sec")), _fmt(latency.get("p50")),
+                         _fmt(latency.get("p95")), summary.get("load_stalls", 0), path)
+        return summary
+
+
+def _fmt(value) -> str:
+    return "-" if value is None else f"{value:.2f}"
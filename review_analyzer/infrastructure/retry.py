@@ -0,0 +1,97 @@
+import asyncio
+import random
+import time
+from logging import Logger
+
+import httpx
+from ollama import ResponseError
+
+
+class RetryPolicy:
+    '''
+    Ponawianie przejściowych błędów Ollamy (zerwane połączenie, timeout, 5xx, 429) z wykładniczym
+    opóźnieniem i pełnym jitterem: przed n-tą ponowną próbą czekamy losowo 0..min(max_delay, base_delay * 2^n),
+    żeby wiele wątków nie uderzało w restartowany serwer jednocześnie. Błędy zapytania (4xx) nie są ponawiane.
+    '''
+
+    def __init__(self, logger: Logger, attempts: int = 4, base_delay: float = 1.0, max_delay: float = 30.0):
+        self.logger = logger
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retries = 0
+
+    @staticmethod
+    def is_transient(e: Exception) -> bool:
+        if isinstance(e, ResponseError):
+            return e.status_code < 0 or e.status_code == 429 or e.status_code >= 500
+        return isinstance(e, (httpx.TransportError, ConnectionError, TimeoutError))
+
+    def delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def _next_delay(self, attempt: int, e: Exception):
+        # None = nie ponawiamy (błąd trwały albo wyczerpane próby)
+        if attempt + 1 >= self.attempts or not self.is_transient(e):
+            return None
+        pause = self.delay(attempt)
+        self.retries += 1
+        self.logger.warning("Błąd przejściowy Ollamy (próba %d/%d), ponowienie za %.1fs: %s",
+                            attempt + 1, self.attempts, pause, e)
+        return pause
+
+    def call(self, func, *args, **kwargs):
+        for attempt in range(self.attempts):
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                pause = self._next_delay(attempt, e)
+                if pause is None:
+                    raise
+            time.sleep(pause)
+
+    async def acall(self, func, *args, **kwargs):
+        for attempt in range(self.attempts):
+            try:
+                return await func(*args, **kwargs)
+            except Exception as e:
+                pause = self._next_delay(attempt, e)
+                if pause is None:
+                    raise
+            await asyncio.sleep(pause)
+
+
+class RetryingClient:
+    '''Zamiennik `ollama.Client` (lub OllamaClientPool) — `chat` i `embed` z polityką ponawiania.'''
+
+    def __init__(self, client, policy: RetryPolicy):
+        self.client = client
+        self.policy = policy
+
+    def chat(self, **kwargs):
+        return self.policy.call(self.client.chat, **kwargs)
+
+    def embed(self, **kwargs):
+        return self.policy.call(self.client.embed, **kwargs)
+
+    def stats(self) -> dict:
+        return self.client.stats()
+
+
+class AsyncRetryingClient:
+    '''Zamiennik `ollama.AsyncClient` (lub AsyncOllamaClientPool) z tą samą polityką ponawiania.'''
+
+    def __init__(self, client, policy: RetryPolicy):
+        self.client = client
+        self.policy = policy
+
+    async def chat(self, **kwargs):
+        return await self.policy.acall(self.client.chat, **kwargs)
+
+    async def embed(self, **kwargs):
+        return await self.policy.acall(self.client.embed, **kwargs)
+
+
+def without_retries(client):
+    '''Klient pod RetryingClient/AsyncRetryingClient — dla kroków „best effort” (rozgrzewka), które nie mogą czekać na backoff.'''
+    return client.client if isinstance(client, (RetryingClient, AsyncRetryingClient)) else client
@@ -1,65 +1,97 @@
 # infrastructure/sentence_analyzer.py
 
+import numpy as np
 import pandas as pd
 import json
-from collections import Counter
-import re
 from typing import Dict
-from review_analyzer.domain.interfaces import ReviewAnalyzer
+from review_analyzer.domain.interfaces import ReviewAnalyzer, IncrementalReviewAnalyzer
+from review_analyzer.infrastructure.aggregate_state import counts, merge_counts, pair_counts, merge_pair_counts, most_common, \
+    moments, empty_moments, merge_moments, mean, variance
 
 
-class ValidReviewAspectAnalyzer(ReviewAnalyzer):
+class ValidReviewAspectAnalyzer(IncrementalReviewAnalyzer):
     def __init__(self, output_path: str = None, label: str = "liked"):
         self.output_path = output_path
         self.label = label  # "liked" albo "disliked" — dla raportu
 
-    def analyze_data(self, data: pd.DataFrame) -> Dict:
+    # --- Stan częściowy: liczniki aspektów/słów, momenty liczby aspektów na recenzję i długości aspektów
+
+    def empty_state(self) -> Dict:
+        return {"rows": 0, "aspects_per_review": empty_moments(), "aspect_count_distribution": {}, "aspects": {},
+                "aspect_words": empty_moments(), "words": {}, "game_aspects": {}}
+
+    def partial_state(self, data: pd.DataFrame) -> Dict:
         required_cols = {"recommendationid", "aspect", "appid"}
         if not required_cols.issubset(data.columns):
             raise ValueError(f"Missing required columns: {required_cols - set(data.columns)}")
 
+        aspects_per_review = data.groupby("recommendationid").size()
+        tokens = data["aspect"].str.lower().str.findall(r"\b\w{3,}\b").explode()
+        return {
+            "rows": len(data),
+            "aspects_per_review": moments(aspects_per_review),
+            # Klucze tekstowe — takie same przed i po zapisie stanu do JSON
+            "aspect_count_distribution": counts(aspects_per_review.astype(str)),
+            "aspects": counts(data["aspect"]),
+            "aspect_words": moments(data["aspect"].str.split().str.len()),
+            "words": counts(tokens),
+            "game_aspects": pair_counts(data["appid"].astype("string"), data["aspect"]),
+        }
+
+    def merge_states(self, state: Dict, other: Dict) -> Dict:
+        # W miejscu — scalanie dotyka tylko kluczy z `other`
+        state["rows"] += other["rows"]
+        for key in ("aspects_per_review", "aspect_words"):
+            state[key] = merge_moments(state[key], other[key])
+        for key in ("aspect_count_distribution", "aspects", "words"):
+            merge_counts(state[key], other[key])
+        merge_pair_counts(state["game_aspects"], other["game_aspects"])
+        return state
+
+    def summarize(self, state: Dict) -> Dict:
         summary = {}
 
         # --- 1. Statystyki ogólne
+        aspects_per_review = state["aspects_per_review"]
         summary["label"] = self.label
-        summary["total_reviews"] = int(data["recommendationid"].nunique())
-        aspects_per_review = data.groupby("recommendationid").size()
-        summary["avg_aspects_per_review"] = float(round(aspects_per_review.mean(), 2))
-        summary["aspects_per_review_variance"] = float(round(aspects_per_review.var(), 2))
+        summary["total_reviews"] = aspects_per_review["n"]
+        summary["avg_aspects_per_review"] = float(np.round(mean(aspects_per_review), 2))
+        summary["aspects_per_review_variance"] = float(np.round(variance(aspects_per_review), 2))
 
         # --- 2. Top aspekty
-        summary["top_aspects"] = Counter(data["aspect"]).most_common(10)
+        summary["top_aspects"] = most_common(state["aspects"], 10)
 
         # --- 3. Unikalność aspektów
-        total_aspects = len(data)
-        unique_aspects = data["aspect"].nunique()
-        summary["unique_aspects"] = int(unique_aspects)
+        total_aspects = state["rows"]
+        unique_aspects = len(state["aspects"])
+        summary["unique_aspects"] = unique_aspects
         summary["duplicated_aspects_ratio"] = round(1 - (unique_aspects / total_aspects), 3)
 
         # --- 4. Rozkład liczby aspektów na recenzję
-        summary["aspect_count_distribution"] = (
-            aspects_per_review.value_counts().sort_index().to_dict()
-        )
+        summary["aspect_count_distribution"] = {
+            int(count): reviews for count, reviews in sorted(state["aspect_count_distribution"].items(), key=lambda item: int(item[0]))
+        }
 
         # --- 5. Długość aspektów (w słowach)
-        word_counts = data["aspect"].str.split().str.len()
+        word_counts = state["aspect_words"]
         summary["aspect_length_stats"] = {
-            "mean": float(round(word_counts.mean(), 2)),
-            "min": int(word_counts.min()),
-            "max": int(word_counts.max()),
+            "mean": float(np.round(mean(word_counts), 2)),
+            "min": None if word_counts["min"] is None else int(word_counts["min"]),
+            "max": None if word_counts["max"] is None else int(word_counts["max"]),
         }
 
         # --- 6. Top słowa
-        tokens = data["aspect"].str.lower().apply(lambda s: re.findall(r"\b\w{3,}\b", s))
-        flat_tokens = [token for sublist in tokens for token in sublist]
-        summary["top_words"] = Counter(flat_tokens).most_common(15)
+        summary["top_words"] = most_common(state["words"], 15)
 
         # --- 7. Top aspekty per gra
-        summary["top_aspects_per_game"] = (
-            data.groupby("appid")["aspect"]
-            .apply(lambda x: Counter(x).most_common(5))
-            .to_dict()
-        )
+        summary["top_aspects_per_game"] = {
+            _appid(appid): most_common(aspects, 5)
+            for appid, aspects in sorted(state["game_aspects"].items(), key=lambda item: _appid(item[0]))
+        }
+        return summary
+
+    def analyze_data(self, data: pd.DataFrame) -> Dict:
+        summary = super().analyze_data(data)
 
         if self.output_path is not None:
             with open(self.output_path, "w", encoding="utf-8") as f:
@@ -69,16 +101,30 @@ class ValidReviewAspectAnalyzer(ReviewAnalyzer):
         return summary
 
 
-class ErrorReviewAnalyzer(ReviewAnalyzer):
-    def analyze_data(self, data: pd.DataFrame) -> Dict:
+def _appid(key: str):
+    # Klucze gier w stanie są tekstowe (JSON) — w podsumowaniu liczbowe appid jak w danych
+    return int(key) if key.isdigit() else key
+
+
+class ErrorReviewAnalyzer(IncrementalReviewAnalyzer):
+    def empty_state(self) -> Dict:
+        return {"errors": {}}
+
+    def partial_state(self, data: pd.DataFrame) -> Dict:
         if "error" not in data.columns:
             raise ValueError("Missing 'error' column in input data")
+        return {"errors": counts(data["error"])}
+
+    def merge_states(self, state: Dict, other: Dict) -> Dict:
+        merge_counts(state["errors"], other["errors"])
+        return state
 
-        errors_only = data[data["error"].notna()]
+    def summarize(self, state: Dict) -> Dict:
+        errors = state["errors"]
         summary = {
-            "total_errors": int(len(errors_only)),
-            "error_types": dict(Counter(errors_only["error"])),
-            "sample_errors": list(errors_only["error"].dropna().unique()[:5])
+            "total_errors": sum(errors.values()),
+            "error_types": dict(errors),
+            "sample_errors": list(errors)[:5]
         }
         return summary
 
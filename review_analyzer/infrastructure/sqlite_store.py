@@ -0,0 +1,238 @@
+# infrastructure/sqlite_store.py
+
+import json
+import sqlite3
+import threading
+from logging import Logger
+from typing import List, Optional, Set, Tuple
+
+import pandas as pd
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS reviews ("
+    " recommendationid TEXT PRIMARY KEY,"
+    " appid INTEGER,"
+    " original_review TEXT)",
+    "CREATE TABLE IF NOT EXISTS extractions ("
+    " recommendationid TEXT PRIMARY KEY,"
+    " appid INTEGER,"
+    " liked TEXT NOT NULL,"
+    " disliked TEXT NOT NULL,"
+    " error TEXT)",
+    "CREATE TABLE IF NOT EXISTS aspects ("
+    " appid INTEGER,"
+    " recommendationid TEXT NOT NULL,"
+    " kind TEXT NOT NULL,"
+    " position INTEGER NOT NULL,"
+    " aspect TEXT NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS labels ("
+    " appid INTEGER,"
+    " recommendationid TEXT,"
+    " kind TEXT NOT NULL,"
+    " aspect TEXT,"
+    " label TEXT)",
+    "CREATE INDEX IF NOT EXISTS idx_reviews_appid ON reviews(appid)",
+    "CREATE INDEX IF NOT EXISTS idx_extractions_appid ON extractions(appid)",
+    "CREATE INDEX IF NOT EXISTS idx_extractions_error ON extractions(recommendationid) WHERE error IS NOT NULL",
+    "CREATE INDEX IF NOT EXISTS idx_aspects_appid ON aspects(appid, kind)",
+    "CREATE INDEX IF NOT EXISTS idx_aspects_recommendationid ON aspects(recommendationid)",
+    "CREATE INDEX IF NOT EXISTS idx_labels_appid ON labels(appid, kind)",
+    "CREATE INDEX IF NOT EXISTS idx_labels_recommendationid ON labels(recommendationid)",
+)
+
+KINDS = ("liked", "disliked")
+
+
+def _scalar(value):
+    # Typy numpy (np. int64 z ramki) nie są akceptowane przez sqlite3
+    return value.item() if hasattr(value, "item") else value
+
+
+class SqliteResultStore:
+    '''
+    Wyniki runu w jednej bazie SQLite: recenzje, surowe wyniki ekstrakcji, aspekty (po jednym
+    wierszu na aspekt) i etykiety, z indeksami po appid i recommendationid. Interfejs zapisu jak
+    JsonlSaver (finished_ids/open/write/close, save, error_rows/replace), więc zastępuje plik JSONL
+    w ReviewProcessingService; wiersze z `write` trafiają do bazy wsadami po `batch_size`,
+    każdy wsad w jednej transakcji. recommendationid przechowywane jest jako tekst.
+    '''
+
+    def __init__(self, db_path: str, logger: Logger, batch_size: int = 200):
+        self.db_path = str(db_path)
+        self.logger = logger
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._pending: List[dict] = []
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            # WAL: odczyty (np. zapytania analityczne) nie blokują zapisu trwającego runu
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            for statement in SCHEMA:
+                self._conn.execute(statement)
+            self._conn.commit()
+        return self._conn
+
+    # --- Zapis wyników ekstrakcji
+
+    @staticmethod
+    def _rows(items: List[dict]) -> Tuple[List[tuple], List[tuple], List[tuple], List[tuple]]:
+        reviews, extractions, ids, aspects = [], [], [], []
+        for item in items:
+            rid, appid = str(item["recommendationid"]), item.get("appid")
+            reviews.append((rid, appid, item.get("original_review")))
+            liked, disliked = item.get("liked") or [], item.get("disliked") or []
+            extractions.append((rid, appid, json.dumps(liked, ensure_ascii=False), json.dumps(disliked, ensure_ascii=False),
+                                item.get("error")))
+            ids.append((rid,))
+            for kind, values in zip(KINDS, (liked, disliked)):
+                aspects.extend((appid, rid, kind, position, aspect) for position, aspect in enumerate(values) if aspect is not None)
+        return reviews, extractions, ids, aspects
+
+    def _upsert(self, items: List[dict]) -> None:
+        # Wywoływane pod blokadą; cały wsad w jednej transakcji — przerwanie nie zostawia połowy wiersza
+        reviews, extractions, ids, aspects = self._rows(items)
+        conn = self._connection()
+        with conn:
+            conn.executemany("INSERT OR REPLACE INTO reviews (recommendationid, appid, original_review) VALUES (?, ?, ?)",
+                             reviews)
+            conn.executemany("INSERT OR REPLACE INTO extractions (recommendationid, appid, liked, disliked, error) "
+                             "VALUES (?, ?, ?, ?, ?)", extractions)
+            conn.executemany("DELETE FROM aspects WHERE recommendationid = ?", ids)
+            conn.executemany("INSERT INTO aspects (appid, recommendationid, kind, position, aspect) VALUES (?, ?, ?, ?, ?)",
+                             aspects)
+
+    def save(self, data: List[dict]):
+        # Wstawia lub podmienia wiersze o tych samych recommendationid — pozostałe zostają w bazie
+        with self._lock:
+            self._upsert(data)
+        self.logger.info('Zapisano %d wyników do bazy: %s', len(data), self.db_path)
+
+    def finished_ids(self) -> Set[str]:
+        with self._lock:
+            done = {row[0] for row in self._connection().execute("SELECT recommendationid FROM extractions")}
+        self.logger.info("Znaleziono %d zapisanych wyników w: %s", len(done), self.db_path)
+        return done
+
+    def open(self, append: bool = False):
+        # Jak tryb "w" pliku JSONL: bez dopisywania wyniki ekstrakcji poprzedniego przebiegu są usuwane
+        with self._lock:
+            self._pending = []
+            if not append:
+                conn = self._connection()
+                with conn:
+                    for table in ("reviews", "extractions", "aspects"):
+                        conn.execute(f"DELETE FROM {table}")
+        return self
+
+    def write(self, item: dict):
+        with self._lock:
+            self._pending.append(item)
+            if len(self._pending) >= self.batch_size:
+                self._flush_pending()
+
+    def _flush_pending(self):
+        if self._pending:
+            self._upsert(self._pending)
+            self._pending = []
+
+    def flush(self):
+        with self._lock:
+            self._flush_pending()
+
+    def close(self):
+        with self._lock:
+            if self._conn is None:
+                return
+            self._flush_pending()
+            self._conn.close()
+            self._conn = None
+        self.logger.info('Wyniki zapisano do bazy: %s', self.db_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # --- Ponowne przetwarzanie błędnych wierszy (--only-errors)
+
+    def error_rows(self) -> List[dict]:
+        rows = self.extractions("e.error IS NOT NULL")
+        self.logger.info("Znaleziono %d wierszy z błędem w: %s", len(rows), self.db_path)
+        return rows
+
+    def replace(self, data: List[dict]):
+        self.save(data)
+
+    # --- Odczyt
+
+    def extractions(self, where: str = None, params: tuple = ()) -> List[dict]:
+        '''Wiersze w formacie wyniku ekstrakcji (jak linie JSONL); `where` filtruje po kolumnach `e.` i `r.`.'''
+        query = ("SELECT e.appid, e.recommendationid, e.liked, e.disliked, r.original_review, e.error "
+                 "FROM extractions e LEFT JOIN reviews r USING (recommendationid)")
+        if where:
+            query += f" WHERE {where}"
+        with self._lock:
+            cursor = self._connection().execute(query, params)
+            rows = cursor.fetchall()
+        results = []
+        for appid, rid, liked, disliked, review, error in rows:
+            item = {"appid": appid, "recommendationid": rid, "liked": json.loads(liked), "disliked": json.loads(disliked),
+                    "original_review": review}
+            if error is not None:
+                item["error"] = error
+            results.append(item)
+        return results
+
+    def query(self, sql: str, params: tuple = ()) -> pd.DataFrame:
+        with self._lock:
+            return pd.read_sql_query(sql, self._connection(), params=params)
+
+    def load_dataframes(self, appid=None) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+        '''
+        Te same ramki co SentenceLoader.load_dataframes (recenzje, liked, disliked), ale z zapytań SQL
+        zamiast wczytywania całego pliku; `appid` ogranicza wynik do jednej gry (indeks).
+        '''
+        where, params = (" WHERE r.appid = ?", (appid,)) if appid is not None else ("", ())
+        reviews_df = self.query(
+            "SELECT r.appid, r.recommendationid, r.original_review, e.error "
+            f"FROM reviews r LEFT JOIN extractions e USING (recommendationid){where} ORDER BY r.rowid", params)
+        if reviews_df["error"].isna().all():
+            reviews_df = reviews_df.drop(columns=["error"])
+        else:
+            # NULL z SQL jako NaN — jak brak pola `error` w ramce z JSONL
+            reviews_df["error"] = reviews_df["error"].where(reviews_df["error"].notna(), float("nan"))
+
+        aspect_where = " AND appid = ?" if appid is not None else ""
+        frames = [
+            self.query("SELECT appid, recommendationid, aspect FROM aspects "
+                       f"WHERE kind = ?{aspect_where} ORDER BY rowid", (kind,) + params)
+            for kind in KINDS
+        ]
+        self.logger.info("Wczytano z bazy: %d recenzji, %d liked, %d disliked", len(reviews_df), len(frames[0]), len(frames[1]))
+        return reviews_df, frames[0], frames[1]
+
+    # --- Etykiety
+
+    def save_labels(self, kind: str, labeled: pd.DataFrame) -> None:
+        # Etykiety danego rodzaju są zastępowane w całości (jak nadpisanie tabeli etykietowanych aspektów)
+        rows = [
+            (_scalar(appid), None if pd.isna(rid) else str(rid), aspect, None if pd.isna(label) else str(label))
+            for appid, rid, aspect, label in labeled.reindex(columns=["appid", "recommendationid", "aspect", "labels"]).itertuples(index=False)
+        ]
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute("DELETE FROM labels WHERE kind = ?", (kind,))
+                conn.executemany("INSERT INTO labels (appid, recommendationid, kind, aspect, label) VALUES (?, ?, ?, ?, ?)",
+                                 [(appid, rid, kind, aspect, label) for appid, rid, aspect, label in rows])
+        self.logger.info("Zapisano %d etykiet (%s) do bazy: %s", len(rows), kind, self.db_path)
+
+    def load_labels(self, kind: str, appid=None) -> pd.DataFrame:
+        where, params = (" AND appid = ?", (kind, appid)) if appid is not None else ("", (kind,))
+        return self.query(f"SELECT appid, recommendationid, aspect, label AS labels FROM labels WHERE kind = ?{where} "
+                          "ORDER BY rowid", params)
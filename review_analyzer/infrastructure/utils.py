@@ -1,18 +1,72 @@
+import numpy as np
+import pandas as pd
+
 from review_analyzer.infrastructure.global_analyzer import GlobalAspectAnalyzer
 from review_analyzer.infrastructure.dataframe_loader import DataFrameLoaderCsv
 from review_analyzer.infrastructure.json_saver import JsonSaver
+from review_analyzer.infrastructure.aggregate_state import load_state, save_state
+
+def normalize_labels(labels: pd.Series) -> pd.Series:
+    # Etykiety jako tekst bez białych znaków, braki jako "nan" (jak po astype(str) z CSV)
+    if isinstance(labels.dtype, pd.CategoricalDtype):
+        # Z Parquet: normalizacja tylko słownika kategorii, wiersze przez kody (kod -1 = brak)
+        lookup = np.append(labels.cat.categories.astype(str).str.strip().to_numpy(dtype=object), "nan")
+        return pd.Series(lookup[labels.cat.codes.to_numpy()], index=labels.index, name=labels.name)
+    return labels.fillna("nan").astype(str).str.strip()
 
-def analyze_and_save(label: str, csv_path: str, output_path: str, logger, charts_dir: str):
-    loader = DataFrameLoaderCsv(logger)
+def load_labeled(csv_path: str, logger, loader=None) -> pd.DataFrame:
+    loader = loader or DataFrameLoaderCsv(logger)
     df = loader.load(csv_path)
+    df["labels"] = normalize_labels(df["labels"])
+    return df
 
-    df["labels"] = df["labels"].astype(str).str.strip()
+def analyze_and_save(label: str, csv_path: str, output_path: str, logger, charts_dir: str, loader=None, state_path: str = None):
+    df = load_labeled(csv_path, logger, loader)
 
     logger.debug("%s preview:\n%s", label.capitalize(), df.head(5).copy().to_string(index=False))
 
     analyzer = GlobalAspectAnalyzer(label=label)
     analysis = analyzer.analyze_data(df)
-    analyzer.generate_charts(output_dir=charts_dir)
+    logger.debug("Wykresy %s: %s", label, analyzer.generate_charts(output_dir=charts_dir))
 
     saver = JsonSaver(output_path, logger)
-    saver.save(analysis)
\ No newline at end of file
+    saver.save(analysis)
+
+    if state_path:
+        # Stan częściowy analizy — do dopisywania przyrostów i scalania shardów bez ponownego czytania tabel
+        save_state(state_path, analyzer.state)
+
+def save_summary(analyzer: GlobalAspectAnalyzer, state: dict, output_path: str, state_path: str, logger, charts_dir: str):
+    analysis = analyzer.summarize(state)
+    logger.debug("Wykresy %s: %s", analyzer.label, analyzer.generate_charts(output_dir=charts_dir))
+    JsonSaver(output_path, logger).save(analysis)
+    if state_path:
+        save_state(state_path, state)
+    return analysis
+
+def update_analysis(label: str, csv_path: str, output_path: str, state_path: str, logger, charts_dir: str, loader=None):
+    '''
+    Dopisuje przyrost (np. nowe recenzje z ostatniej doby) do zapisanego stanu analizy i odświeża
+    podsumowanie — czas zależy od wielkości przyrostu, nie całej historii. Brak stanu = pełna analiza przyrostu.
+    '''
+    analyzer = GlobalAspectAnalyzer(label=label)
+    state = load_state(state_path) or analyzer.empty_state()
+    delta = load_labeled(csv_path, logger, loader)
+    state = analyzer.update_state(state, delta)
+    logger.info("Analiza %s: dopisano %d wierszy, razem %d", label, len(delta), state["rows"])
+    return save_summary(analyzer, state, output_path, state_path, logger, charts_dir)
+
+def merge_analyses(label: str, state_paths, output_path: str, state_path: str, logger, charts_dir: str):
+    # Scalenie stanów z shardów (np. gier) lub runów w jedno podsumowanie
+    analyzer = GlobalAspectAnalyzer(label=label)
+    state = analyzer.empty_state()
+    merged = 0
+    for path in state_paths:
+        shard_state = load_state(path)
+        if shard_state is None:
+            logger.warning("Brak stanu analizy: %s — pominięto", path)
+            continue
+        state = analyzer.merge_states(state, shard_state)
+        merged += 1
+    logger.info("Analiza %s: scalono %d stanów (%d wierszy)", label, merged, state["rows"])
+    return save_summary(analyzer, state, output_path, state_path, logger, charts_dir)
@@ -0,0 +1,107 @@
+import argparse
+import json
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from review_analyzer.infrastructure.global_analyzer import GlobalAspectAnalyzer
+
+# Benchmark etapu analizy: GlobalAspectAnalyzer.analyze_data na syntetycznej tabeli etykietowanych
+# aspektów (rozkład Zipfa, jak w prawdziwych danych) kontra poprzednia wersja sekcji 4–5 na iterrows.
+# Wersja z iterrows jest mierzona tylko do --legacy-max-rows; powyżej czas jest ekstrapolowany liniowo.
+
+LABELS = ["Gameplay", "Graphics", "Story", "Audio", "Performance", "Price", "Multiplayer", "Controls", "Content", "nan"]
+
+
+def synthetic_labeled(rows: int, aspects: int = 50_000, reviews_share: float = 0.3, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    aspect_ids = np.minimum(rng.zipf(1.3, rows), aspects) - 1
+    aspect_names = np.array([f"aspect {i}" for i in range(aspects)], dtype=object)
+    return pd.DataFrame({
+        "appid": rng.integers(1, 20, rows),
+        "recommendationid": rng.integers(0, max(int(rows * reviews_share), 1), rows),
+        "aspect": aspect_names[aspect_ids],
+        # Etykieta zależy głównie od aspektu, z domieszką szumu — część aspektów ma kilka etykiet
+        "labels": np.array(LABELS, dtype=object)[np.where(rng.random(rows) < 0.05, rng.integers(0, len(LABELS), rows),
+                                                          aspect_ids % len(LABELS))],
+    })
+
+
+def legacy_label_sections(data: pd.DataFrame) -> Dict:
+    '''Sekcje 4–5 GlobalAspectAnalyzer w poprzedniej postaci (dwie pętle iterrows) — punkt odniesienia.'''
+    label_aspect_counts = defaultdict(Counter)
+    for _, row in data.iterrows():
+        label_aspect_counts[row["labels"]][row["aspect"]] += 1
+
+    aspect_to_labels = defaultdict(set)
+    for _, row in data.iterrows():
+        aspect_to_labels[row["aspect"]].add(row["labels"])
+    multi_label_aspects = {aspect: list(labels) for aspect, labels in aspect_to_labels.items() if len(labels) > 1}
+
+    return {
+        "top_aspects_per_label": {label: dict(counter.most_common(10)) for label, counter in label_aspect_counts.items()},
+        "multi_label_aspects_count": len(multi_label_aspects),
+        "multi_label_aspects_sample": dict(list(multi_label_aspects.items())[:10]),
+    }
+
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def run_case(rows: int, legacy_max_rows: int, legacy_rate: float = None) -> Dict:
+    data = synthetic_labeled(rows)
+    # Całe analyze_data (wszystkie sekcje) kontra same sekcje 4–5 w starej postaci — przyspieszenie zaniżone
+    results, seconds = _timed(GlobalAspectAnalyzer().analyze_data, data)
+
+    if rows <= legacy_max_rows:
+        legacy, legacy_seconds = _timed(legacy_label_sections, data)
+        # Porównanie przez JSON — jak zapis analizy, razem z kolejnością kluczy
+        identical = all(json.dumps(results[key]) == json.dumps(legacy[key]) for key in legacy)
+        estimated = False
+    else:
+        legacy_seconds, identical, estimated = rows * legacy_rate if legacy_rate else None, None, True
+
+    return {
+        "rows": rows,
+        "vectorized_s": round(seconds, 3),
+        "iterrows_s": round(legacy_seconds, 3) if legacy_seconds is not None else None,
+        "iterrows_estimated": estimated,
+        "speedup": round(legacy_seconds / seconds, 1) if legacy_seconds else None,
+        "identical": identical,
+    }
+
+
+def _ints(text: str) -> List[int]:
+    return [int(float(part)) for part in text.split(",") if part.strip()]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="1e5,1e6,1e7", help="Liczba wierszy tabeli etykietowanych aspektów")
+    parser.add_argument("--legacy-max-rows", type=float, default=1e6,
+                        help="Największa tabela mierzona wersją iterrows; większe są ekstrapolowane")
+    parser.add_argument("--output", default=None, help="CSV z wynikami")
+    args = parser.parse_args()
+
+    rows, legacy_rate = [], None
+    for size in _ints(args.sizes):
+        row = run_case(size, int(args.legacy_max_rows), legacy_rate)
+        if not row["iterrows_estimated"]:
+            legacy_rate = row["iterrows_s"] / size
+        rows.append(row)
+        print(" ".join(f"{key}={value}" for key, value in row.items()), flush=True)
+
+    results = pd.DataFrame(rows)
+    print(results.to_string(index=False))
+    if args.output:
+        results.to_csv(args.output, index=False)
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,70 @@
+import argparse
+import json
+from itertools import islice
+
+from ollama import Client
+
+from review_analyzer.config import PATHS, MODEL_ID, OLLAMA_KEEP_ALIVE, OLLAMA_TIMEOUT
+from review_analyzer.infrastructure.json_loader import JsonReviewLoader
+from review_analyzer.infrastructure.mistral_extractor import MistralSentimentAspectExtractor
+from review_analyzer.infrastructure.request_metrics import RequestMetrics
+
+from review_analyzer.infrastructure.log_handlers.console_handler import get_console_handler
+from review_analyzer.infrastructure.log_handlers.setup_logging import setup_logger
+
+# Porównanie czasu przetwarzania promptu: cały szablon w jednej wiadomości użytkownika (przed)
+# kontra stałe instrukcje w wiadomości systemowej + recenzja osobno (po). Zapytania idą kolejno,
+# bez cache odpowiedzi, po rozgrzewce modelu — różnica to efekt ponownego użycia cache KV prefiksu.
+
+VARIANTS = {"user_message": False, "system_prefix": True}
+
+
+def measure(client, prompt, reviews, logger, system_prefix: bool, keep_alive) -> dict:
+    metrics = RequestMetrics("system_prefix" if system_prefix else "user_message", logger)
+    extractor = MistralSentimentAspectExtractor(client, MODEL_ID, prompt, logger, metrics=metrics, system_prefix=system_prefix,
+                                                keep_alive=keep_alive)
+    extractor.warm_up()
+    for review in reviews:
+        extractor.extract_sentence_sentiment(review)
+
+    summary = metrics.summary()
+    requests = max(summary["requests"], 1)
+    return {
+        "requests": summary["requests"],
+        "prompt_tokens_per_request": summary.get("prompt_tokens", 0) / requests,
+        "prompt_eval_ms_per_request": summary.get("prompt_eval_seconds", 0.0) * 1000 / requests,
+        "prompt_share": summary.get("prompt_share"),
+        "latency_p50": summary.get("latency_seconds", {}).get("p50"),
+        "latency_p95": summary.get("latency_seconds", {}).get("p95"),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--language", default="english")
+    parser.add_argument("--input", default=str(PATHS["raw_reviews"]))
+    parser.add_argument("--output", default=None, help="Plik JSON z wynikami (domyślnie tylko konsola)")
+    args = parser.parse_args()
+
+    logger = setup_logger(name="review-analyzer", handlers=[get_console_handler('INFO')])
+    with open(PATHS['sentence_prompt'], encoding="utf-8") as f:
+        prompt = f.read()
+    reviews = list(islice(JsonReviewLoader(args.input, logger).iter_reviews(args.language), args.limit))
+    client = Client(timeout=OLLAMA_TIMEOUT)
+
+    results = {name: measure(client, prompt, reviews, logger, system_prefix, OLLAMA_KEEP_ALIVE)
+               for name, system_prefix in VARIANTS.items()}
+
+    print(f"{'wariant':<15} {'żądania':>8} {'tok. promptu':>13} {'prompt ms':>10} {'udział':>7} {'p50 s':>7} {'p95 s':>7}")
+    for name, row in results.items():
+        print(f"{name:<15} {row['requests']:>8} {row['prompt_tokens_per_request']:>13.0f} {row['prompt_eval_ms_per_request']:>10.1f} "
+              f"{row['prompt_share'] or 0:>7.2f} {row['latency_p50'] or 0:>7.2f} {row['latency_p95'] or 0:>7.2f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,179 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from itertools import product
+from logging import Logger
+from typing import Dict, List
+
+os.environ.setdefault("TQDM_DISABLE", "1")  # paski postępu zaburzałyby tabelę wyników
+
+import pandas as pd
+from ollama import Client
+
+from review_analyzer.config import PATHS, MIN_REVIEW_CHARS
+from review_analyzer.domain.interfaces import ReviewRepository
+from review_analyzer.domain.models import Review
+from review_analyzer.infrastructure.aspect_labeler import MistralAspectLabeler
+from review_analyzer.infrastructure.fake_ollama import FakeOllamaBackend, FakeOllamaClient, serve_fake_ollama
+from review_analyzer.infrastructure.json_saver import JsonlSaver
+from review_analyzer.infrastructure.mistral_extractor import MistralSentimentAspectExtractor
+from review_analyzer.infrastructure.request_metrics import RequestMetrics
+from review_analyzer.service.aspect_labeling_service import AspectLabelingService
+from review_analyzer.service.review_sentence_processing_service import ReviewProcessingService
+
+from review_analyzer.infrastructure.log_handlers.console_handler import get_console_handler
+from review_analyzer.infrastructure.log_handlers.setup_logging import setup_logger
+
+# Benchmark przepustowości serwisów bez GPU: prawdziwe ReviewProcessingService i AspectLabelingService
+# (z prawdziwymi adapterami i zapisem JSONL) na symulowanym backendzie Ollamy — w procesie (`fake`)
+# albo przez lokalny serwer HTTP i ollama.Client (`http`). Przegląd workers × wsad × rozmiar danych;
+# tabela wyników (CSV) może być porównana z wynikiem poprzedniej wersji przez --compare.
+
+CASE_COLUMNS = ["stage", "transport", "size", "workers", "batch"]
+WORDS = ["game", "graphics", "story", "price", "bugs", "music", "multiplayer", "servers", "controls", "levels", "boss", "crafting",
+         "great", "terrible", "smooth", "laggy", "fun", "boring", "beautiful", "expensive", "worth", "broken", "amazing", "slow"]
+
+
+class InMemoryReviewLoader(ReviewRepository):
+    def __init__(self, reviews: List[Review]):
+        self.reviews = reviews
+
+    def load_reviews(self, language: str = None) -> List[Review]:
+        return list(self.reviews)
+
+
+def synthetic_reviews(size: int, seed: int = 0) -> List[Review]:
+    rng = random.Random(seed)
+    return [
+        Review(appid=1, recommendationid=100000 + i, language="english",
+               review=" ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 120))), votes_funny=0, voted_up=True)
+        for i in range(size)
+    ]
+
+
+def synthetic_aspects(size: int, seed: int = 0) -> pd.DataFrame:
+    rng = random.Random(seed)
+    aspects = [f"{rng.choice(WORDS)} {rng.choice(WORDS)} {i}" for i in range(size)]
+    return pd.DataFrame({"appid": 1, "recommendationid": range(size), "aspect": aspects})
+
+
+def read_prompts() -> Dict[str, str]:
+    prompts = {}
+    for key in ("sentence_prompt", "sentence_batch_prompt", "label_prompt", "label_batch_prompt"):
+        with open(PATHS[key], encoding="utf-8") as f:
+            prompts[key] = f.read()
+    return prompts
+
+
+def _run_extraction(client, prompts, size, workers, batch, logger, metrics, workdir):
+    extractor = MistralSentimentAspectExtractor(client, "fake", prompts["sentence_prompt"], logger, metrics=metrics,
+                                                batch_prompt_template=prompts["sentence_batch_prompt"] if batch > 1 else None)
+    saver = JsonlSaver(os.path.join(workdir, "output.jsonl"), logger)
+    service = ReviewProcessingService(extractor, InMemoryReviewLoader(synthetic_reviews(size)), saver, logger, workers, stream=True,
+                                      checkpoint=True, batch_chars=10 ** 9 if batch > 1 else None, dedup=True,
+                                      min_chars=MIN_REVIEW_CHARS)
+    service.MAX_BATCH_REVIEWS = batch  # wsad ograniczony liczbą recenzji, nie budżetem znaków
+    return (service.run() or {}).get("results", 0)  # checkpoint — run zwraca tylko podsumowanie
+
+
+def _run_labeling(client, prompts, size, workers, batch, logger, metrics, workdir):
+    labeler = MistralAspectLabeler(client, "fake", prompts["label_prompt"], logger, metrics=metrics,
+                                   batch_prompt_template=prompts["label_batch_prompt"] if batch > 1 else None)
+    service = AspectLabelingService(labeler, synthetic_aspects(size), logger, workers, batch_size=batch)
+    return len(service.run())
+
+
+STAGES = {"extraction": _run_extraction, "labeling": _run_labeling}
+
+
+def run_case(stage: str, transport: str, size: int, workers: int, batch: int, backend_options: Dict, prompts: Dict[str, str],
+             logger: Logger) -> Dict:
+    backend = FakeOllamaBackend(**backend_options)
+    server = serve_fake_ollama(backend) if transport == "http" else None
+    client = Client(host=f"http://127.0.0.1:{server.server_port}") if server else FakeOllamaClient(backend)
+    metrics = RequestMetrics(stage, logger)
+
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            tracemalloc.start()
+            start = time.perf_counter()
+            items = STAGES[stage](client, prompts, size, workers, batch, logger, metrics, workdir)
+            seconds = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+    finally:
+        if server:
+            server.shutdown()
+
+    summary = metrics.summary()
+    latency = summary.get("latency_seconds", {})
+    return {
+        "stage": stage, "transport": transport, "size": size, "workers": workers, "batch": batch,
+        "items": items,
+        "seconds": round(seconds, 3),
+        "items_per_sec": round(items / seconds, 2) if seconds else None,
+        "requests": summary["requests"],
+        "requests_per_sec": round(summary["requests"] / seconds, 2) if seconds else None,
+        **{p: round(latency[p], 4) if p in latency else None for p in ("p50", "p95", "p99")},
+        "errors": backend.stats["errors"],
+        "max_queue": backend.stats["max_queue"],
+        "peak_mem_mb": round(peak / 2 ** 20, 2),
+    }
+
+
+def compare(results: pd.DataFrame, baseline_path: str) -> pd.DataFrame:
+    # Zmiana przepustowości i p95 względem poprzedniego wyniku dla tych samych przypadków
+    baseline = pd.read_csv(baseline_path)
+    merged = results.merge(baseline[CASE_COLUMNS + ["items_per_sec", "p95", "peak_mem_mb"]], on=CASE_COLUMNS, how="left",
+                           suffixes=("", "_base"))
+    merged["throughput_change_%"] = ((merged["items_per_sec"] / merged["items_per_sec_base"] - 1) * 100).round(1)
+    merged["p95_change_%"] = ((merged["p95"] / merged["p95_base"] - 1) * 100).round(1)
+    return merged
+
+
+def _ints(text: str) -> List[int]:
+    return [int(part) for part in text.split(",") if part.strip()]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--stages", default="extraction,labeling")
+    parser.add_argument("--transport", choices=["fake", "http"], default="fake",
+                        help="fake: klient w procesie; http: lokalny serwer i ollama.Client")
+    parser.add_argument("--sizes", default="200,1000", help="Liczba recenzji / aspektów")
+    parser.add_argument("--workers", default="1,4,8")
+    parser.add_argument("--batch", default="1,8", help="Recenzji / aspektów na zapytanie (1 = bez wsadów)")
+    parser.add_argument("--latency", type=float, default=0.05, help="Średnia latencja odpowiedzi [s]")
+    parser.add_argument("--distribution", choices=FakeOllamaBackend.DISTRIBUTIONS, default="lognormal")
+    parser.add_argument("--sigma", type=float, default=0.5)
+    parser.add_argument("--per-item", type=float, default=0.01, help="Dodatkowa latencja na element wsadu [s]")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--slots", type=int, default=4, help="Równoległe sloty serwera (OLLAMA_NUM_PARALLEL)")
+    parser.add_argument("--output", default=None, help="CSV z wynikami")
+    parser.add_argument("--compare", default=None, help="CSV poprzedniego wyniku do porównania")
+    args = parser.parse_args()
+
+    logger = setup_logger(name="review-analyzer.benchmark", handlers=[get_console_handler('WARNING')])
+    logger.setLevel("WARNING")
+    backend_options = {"latency": args.latency, "distribution": args.distribution, "sigma": args.sigma, "per_item": args.per_item,
+                       "error_rate": args.error_rate, "slots": args.slots}
+    prompts = read_prompts()
+
+    rows = []
+    for stage, size, workers, batch in product(args.stages.split(","), _ints(args.sizes), _ints(args.workers), _ints(args.batch)):
+        rows.append(run_case(stage, args.transport, size, workers, batch, backend_options, prompts, logger))
+        print(" ".join(f"{key}={value}" for key, value in rows[-1].items()), flush=True)
+
+    results = pd.DataFrame(rows)
+    if args.compare:
+        results = compare(results, args.compare)
+    print(results.to_string(index=False))
+    if args.output:
+        results.to_csv(args.output, index=False)
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
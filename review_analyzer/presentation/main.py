@@ -1,5 +1,5 @@
 import argparse
-from review_analyzer.config import MODEL_ID, PATHS
+from review_analyzer.config import MODEL_ID, PATHS, OLLAMA_HOSTS
 from review_analyzer.presentation.runner import run
 
 def main() -> int:
@@ -7,10 +7,27 @@ def main() -> int:
     parser.add_argument("--workers", type=int, default=6)
     parser.add_argument("--language", default="english")
     parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--input", default=None, help="Plik zrzutu, katalog lub wzorzec glob z wieloma zrzutami")
+    parser.add_argument("--resume", nargs="?", const="latest", default=None,
+                        help="Wznów przerwany run: katalog runu lub bez wartości — najnowszy run")
+    parser.add_argument("--engine", choices=["threads", "async"], default="threads",
+                        help="threads: pula wątków; async: asyncio + ollama.AsyncClient (--workers = limit żądań w locie)")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="Adaptacyjny limit żądań w locie (AIMD); --workers to wtedy limit startowy")
+    parser.add_argument("--hosts", default=OLLAMA_HOSTS,
+                        help="Hosty Ollama z wagami: http://gpu1:11434=2,http://gpu2:11434 (domyślnie $OLLAMA_HOSTS lub localhost)")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="Ekstrakcja i etykietowanie jednocześnie (aspekty przekazywane kolejką, bez ponownego wczytania JSONL)")
+    parser.add_argument("--labeler", choices=["llm", "embedding"], default="llm",
+                        help="embedding: najbliższy centroid embeddingów, LLM tylko przy małym marginesie")
+    parser.add_argument("--only-errors", nargs="?", const="latest", default=None,
+                        help="Ponów ekstrakcję tylko wierszy z polem error (w miejscu): katalog runu lub bez wartości — najnowszy run")
     args = parser.parse_args()
 
-    run(PATHS, MODEL_ID, workers=args.workers, language=args.language, limit=args.limit)
-    return 0
+    paths = {**PATHS, "raw_reviews": args.input} if args.input else PATHS
+    return run(paths, MODEL_ID, workers=args.workers, language=args.language, limit=args.limit, resume=args.resume,
+               engine=args.engine, adaptive=args.adaptive, hosts=args.hosts, pipeline=args.pipeline,
+               labeler=args.labeler, only_errors=args.only_errors)
 
 if __name__ == "__main__":
     raise SystemExit(main())
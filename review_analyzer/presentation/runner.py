@@ -1,80 +1,278 @@
+import asyncio
+import json
+from functools import partial
 from pathlib import Path
 
-from ollama import Client
+from ollama import Client, AsyncClient
 
 # ASPECT
+from review_analyzer.config import ensure_directories_exist, shard_paths, rebase_paths, latest_run_dir, LLM_CACHE_MAX_BYTES, SENTENCE_BATCH_CHARS, MIN_REVIEW_CHARS, \
+    ADAPTIVE_MAX_WORKERS, EMBED_MODEL_ID, EMBED_LABEL_MARGIN, ASPECT_CLUSTER_THRESHOLD, OLLAMA_TIMEOUT, OLLAMA_KEEP_ALIVE, RETRY_ATTEMPTS, \
+    RETRY_BASE_DELAY, RETRY_MAX_DELAY
 from review_analyzer.infrastructure.json_loader import JsonReviewLoader
+from review_analyzer.infrastructure.multi_dump_loader import MultiDumpReviewLoader, is_multi_source
 from review_analyzer.infrastructure.mistral_extractor import MistralSentimentAspectExtractor
-from review_analyzer.infrastructure.json_saver import JsonlSaver
+from review_analyzer.infrastructure.llm_cache import SqliteResponseCache
+from review_analyzer.infrastructure.ollama_pool import OllamaClientPool, AsyncOllamaClientPool, parse_hosts
+from review_analyzer.infrastructure.request_metrics import RequestMetrics
+from review_analyzer.infrastructure.retry import RetryPolicy, RetryingClient, AsyncRetryingClient
+from review_analyzer.infrastructure.error_rows_loader import ErrorRowsReviewLoader
+from review_analyzer.infrastructure.json_saver import JsonlSaver, JsonlPatchSaver
+from review_analyzer.infrastructure.sqlite_store import SqliteResultStore
 from review_analyzer.service.review_sentence_processing_service import ReviewProcessingService
+from review_analyzer.service.concurrency import AdaptiveLimiter
 
 # LABEL
 from review_analyzer.infrastructure.aspect_labeler import MistralAspectLabeler
+from review_analyzer.infrastructure.embedding_labeler import EmbeddingAspectLabeler
+from review_analyzer.infrastructure.lexicon_classifier import LexiconAspectClassifier
 from review_analyzer.service.aspect_labeling_service import AspectLabelingService
+from review_analyzer.service.pipeline_service import PipelineService
+from review_analyzer.service.aspect_clustering import AspectClusterer
 from review_analyzer.infrastructure.sentence_loader import SentenceLoader
-from review_analyzer.infrastructure.dataframe_saver import DataFrameSaverCsv
+from review_analyzer.infrastructure.dataframe_saver import DataFrameSaverCsv, DataFrameSaverParquet
+from review_analyzer.infrastructure.dataframe_loader import DataFrameLoaderCsv, DataFrameLoaderParquet
 
 # Analysis
-from review_analyzer.infrastructure.utils import analyze_and_save
+from review_analyzer.infrastructure.utils import analyze_and_save, merge_analyses
 
 # LOGGER
 from review_analyzer.infrastructure.log_handlers.console_handler import get_console_handler
 from review_analyzer.infrastructure.log_handlers.file_handler import get_file_handler
 from review_analyzer.infrastructure.log_handlers.setup_logging import setup_logger 
 
-def sentence_batch(client, logger, PATHS, MODEL_ID, workers=6, language='english', limit=None):
-    logger.info('Batch Sentence')
+def make_retry_policy(logger):
+    return RetryPolicy(logger, RETRY_ATTEMPTS, RETRY_BASE_DELAY, RETRY_MAX_DELAY)
+
+def make_client(logger, hosts=None):
+    # Timeout na żądanie trafia do httpx; ponowienia obejmują całą pulę (po przełączeniu hostów)
+    if hosts:
+        client = OllamaClientPool(hosts, logger, client_factory=partial(Client, timeout=OLLAMA_TIMEOUT))
+    else:
+        client = Client(timeout=OLLAMA_TIMEOUT)
+    return RetryingClient(client, make_retry_policy(logger))
+
+def make_async_client(logger, engine, hosts=None):
+    # Nowy klient dla każdego asyncio.run — AsyncClient nie jest współdzielony między pętlami
+    if engine != 'async':
+        return None
+    if hosts:
+        client = AsyncOllamaClientPool(hosts, logger, client_factory=partial(AsyncClient, timeout=OLLAMA_TIMEOUT))
+    else:
+        client = AsyncClient(timeout=OLLAMA_TIMEOUT)
+    return AsyncRetryingClient(client, make_retry_policy(logger))
+
+def make_limiter(logger, workers, adaptive):
+    # --workers to wtedy limit startowy; osobny limiter na etap, bo latencje ekstrakcji i etykietowania są różne
+    if not adaptive:
+        return None
+    return AdaptiveLimiter(logger, initial=workers, max_limit=max(workers, ADAPTIVE_MAX_WORKERS))
+
+def read_prompt(PATHS, key):
+    # Opcjonalne prompty (np. wsadowe) — brak klucza w PATHS wyłącza daną funkcję
+    if not PATHS.get(key):
+        return None
+    with open(PATHS[key], encoding="utf-8") as f:
+        return f.read()
+
+def build_sentence_service(client, logger, PATHS, MODEL_ID, workers=6, limit=None, loader=None, resume=False, engine='threads',
+                           adaptive=False, hosts=None, only_errors=False, metrics=None):
     with open(PATHS['sentence_prompt'], encoding="utf-8") as f:
         prompt_sentence = f.read()
+    prompt_sentence_batch = read_prompt(PATHS, 'sentence_batch_prompt')
 
-    loader = JsonReviewLoader(PATHS['raw_reviews'], logger)
-    extractor = MistralSentimentAspectExtractor(client, MODEL_ID, prompt_sentence, logger)
-    saver = JsonlSaver(PATHS['sentence_output'], logger)
+    store = make_result_store(logger, PATHS)
+    if only_errors:
+        # Tylko wiersze z polem `error` z istniejącego wyniku; nowe wyniki podmieniają je w miejscu
+        saver = store or JsonlPatchSaver(PATHS['sentence_output'], logger)
+        loader = ErrorRowsReviewLoader(saver, logger)
+    else:
+        saver = store or JsonlSaver(PATHS['sentence_output'], logger)
+        loader = loader or JsonReviewLoader(PATHS['raw_reviews'], logger)
+    cache = SqliteResponseCache(PATHS['llm_cache'], logger, LLM_CACHE_MAX_BYTES) if PATHS.get('llm_cache') else None
+    async_client = make_async_client(logger, engine, hosts)
+    extractor = MistralSentimentAspectExtractor(client, MODEL_ID, prompt_sentence, logger, cache=cache, async_client=async_client,
+                                                batch_prompt_template=prompt_sentence_batch, metrics=metrics,
+                                                keep_alive=OLLAMA_KEEP_ALIVE)
 
-    service = ReviewProcessingService(extractor, loader, saver, logger, workers, limit)  
-    service.run(language)
+    service = ReviewProcessingService(extractor, loader, saver, logger, workers, limit, stream=not only_errors,
+                                      checkpoint=not only_errors, resume=resume,
+                                      batch_chars=SENTENCE_BATCH_CHARS if prompt_sentence_batch else None,
+                                      limiter=make_limiter(logger, workers, adaptive), dedup=True, min_chars=MIN_REVIEW_CHARS)
+    return service, cache
 
-def label_batch(client, logger, PATHS, MODEL_ID, workers=6, limit=None):
-    logger.info('Batch Label')
+def make_result_store(logger, PATHS):
+    # Brak klucza "result_db" w PATHS = wyniki ekstrakcji w pliku JSONL
+    if not PATHS.get('result_db'):
+        return None
+    if not Path(PATHS['result_db']).exists() and Path(PATHS.get('sentence_output', '')).is_file():
+        # Run sprzed bazy wyników (wznawianie, --only-errors) — dalej w JSONL
+        return None
+    return SqliteResultStore(PATHS['result_db'], logger)
+
+def warm_up(*adapters):
+    # Załadowanie modelu i prefiksu promptu przed pierwszym zapytaniem etapu
+    for adapter in adapters:
+        if hasattr(adapter, 'warm_up'):
+            adapter.warm_up()
+
+def save_metrics(PATHS, *metrics):
+    # Brak klucza "metrics" w PATHS wyłącza zapis podsumowania
+    if PATHS.get('metrics'):
+        for stage_metrics in metrics:
+            stage_metrics.save(PATHS['metrics'])
+
+def close_cache(logger, cache):
+    if cache is not None:
+        logger.info("Cache LLM: %s", cache.stats())
+        cache.close()
+
+def sentence_batch(client, logger, PATHS, MODEL_ID, workers=6, language='english', limit=None, loader=None, resume=False,
+                   engine='threads', adaptive=False, hosts=None, only_errors=False):
+    logger.info('Batch Sentence')
+    metrics = RequestMetrics("extraction", logger)
+    service, cache = build_sentence_service(client, logger, PATHS, MODEL_ID, workers, limit, loader, resume, engine, adaptive,
+                                            hosts, only_errors, metrics)
+    warm_up(service.extractor)
+    if engine == 'async':
+        asyncio.run(service.run_async(language))
+    else:
+        service.run(language)
+
+    service.saver.close()  # zapis bez checkpointu (--only-errors) nie zamyka połączenia z bazą
+    close_cache(logger, cache)
+    save_metrics(PATHS, metrics)
 
+def build_labeler(client, logger, PATHS, MODEL_ID, engine='threads', hosts=None, labeler='llm', metrics=None):
+    # Zwraca (labeler, czy opłaca się etykietować wsadami)
     with open(PATHS['label_prompt'], encoding="utf-8") as f:
         prompt_label = f.read()
+    prompt_label_batch = read_prompt(PATHS, 'label_batch_prompt')
+
+    llm_labeler = MistralAspectLabeler(
+        client=client,
+        model_name=MODEL_ID,
+        prompt_template=prompt_label,
+        logger=logger,
+        async_client=make_async_client(logger, engine, hosts),
+        batch_prompt_template=prompt_label_batch,
+        metrics=metrics,
+        keep_alive=OLLAMA_KEEP_ALIVE
+    )
+    if labeler != 'embedding':
+        return llm_labeler, prompt_label_batch is not None
+
+    with open(PATHS['label_seeds'], encoding="utf-8") as f:
+        seeds = json.load(f)
+    # Embeddingi klasyfikują pewne aspekty, LLM tylko te z małym marginesem
+    return EmbeddingAspectLabeler(client, EMBED_MODEL_ID, seeds, llm_labeler, logger, EMBED_LABEL_MARGIN), True
+
+def build_fast_path(logger, PATHS):
+    return LexiconAspectClassifier.from_file(PATHS['label_lexicon'], logger) if PATHS.get('label_lexicon') else None
+
+def make_clusterer(logger):
+    # Osobny obiekt na serwis — reprezentant klastra musi pochodzić z etykietowanej ramki
+    return AspectClusterer(logger, ASPECT_CLUSTER_THRESHOLD) if ASPECT_CLUSTER_THRESHOLD else None
 
-    loader = SentenceLoader(PATHS['sentence_output'], logger)
+def log_labeler_stats(logger, labeler):
+    stats = getattr(labeler, 'stats', None)
+    if isinstance(stats, dict):
+        logger.info("Etykietowanie embeddingami: %s", stats)
+
+async def _run_labeling_async(*services):
+    # Jedna pętla zdarzeń dla wszystkich serwisów — AsyncClient nie jest współdzielony między pętlami
+    return [await service.run_async() for service in services]
+
+def label_batch(client, logger, PATHS, MODEL_ID, workers=6, limit=None, engine='threads', adaptive=False, hosts=None,
+                labeler='llm'):
+    logger.info('Batch Label')
+
+    store = make_result_store(logger, PATHS)
+    loader = store or SentenceLoader(PATHS['sentence_output'], logger)
     reviews, liked_df, disliked_df = loader.load_dataframes()
+    if store is not None:
+        store.close()
 
     logger.debug("Liked preview:\n%s", liked_df.head(5).copy().to_string(index=False))
     logger.debug("Disliked preview:\n%s", disliked_df.head(5).copy().to_string(index=False))
 
-    
-    labeler = MistralAspectLabeler(
-        client=client,
-        model_name=MODEL_ID,
-        prompt_template=prompt_label,
-        logger=logger
-    )
+    metrics = RequestMetrics("labeling", logger)
+    labeler, _ = build_labeler(client, logger, PATHS, MODEL_ID, engine, hosts, labeler, metrics)
+    warm_up(labeler)
 
-    saver = DataFrameSaverCsv(logger)
+    limiter = make_limiter(logger, workers, adaptive)
+    fast_path = build_fast_path(logger, PATHS)
+    liked_service = AspectLabelingService(labeler, liked_df, logger, workers, limiter=limiter, fast_path=fast_path,
+                                          clusterer=make_clusterer(logger))
+    disliked_service = AspectLabelingService(labeler, disliked_df, logger, workers, limit, limiter=limiter, fast_path=fast_path,
+                                             clusterer=make_clusterer(logger))
+    if engine == 'async':
+        df_liked_labeled, df_disliked_labeled = asyncio.run(_run_labeling_async(liked_service, disliked_service))
+    else:
+        df_liked_labeled = liked_service.run()
+        df_disliked_labeled = disliked_service.run()
+    log_labeler_stats(logger, labeler)
+    save_metrics(PATHS, metrics)
 
-    service = AspectLabelingService(labeler, liked_df, logger, workers)
-    df_liked_labeled = service.run()
-    saver.save(df_liked_labeled, csv_path=PATHS['liked_csv'])
+    save_labeled(logger, PATHS, reviews, df_liked_labeled, df_disliked_labeled)
 
-    service = AspectLabelingService(labeler, disliked_df, logger, workers, limit)
-    df_disliked_labeled = service.run()
+def is_parquet(path):
+    # Format tabel wynika z rozszerzenia ścieżek w PATHS (config.TABLE_FORMAT)
+    return Path(path).suffix == '.parquet'
+
+def save_labeled(logger, PATHS, reviews, df_liked_labeled, df_disliked_labeled):
+    saver = DataFrameSaverParquet(logger) if is_parquet(PATHS['liked_csv']) else DataFrameSaverCsv(logger)
+    saver.save(df_liked_labeled, csv_path=PATHS['liked_csv'])
     saver.save(df_disliked_labeled, csv_path=PATHS['disliked_csv'])
 
     saver.save(reviews, PATHS['review_csv'])
 
+    store = make_result_store(logger, PATHS)
+    if store is not None:
+        # Etykiety także w bazie — zapytania po appid / recommendationid bez wczytywania całych tabel
+        with store:
+            store.save_labels("liked", df_liked_labeled)
+            store.save_labels("disliked", df_disliked_labeled)
+
+def pipeline_batch(client, logger, PATHS, MODEL_ID, workers=6, language='english', limit=None, loader=None, engine='threads',
+                   adaptive=False, hosts=None, labeler='llm'):
+    # Ekstrakcja i etykietowanie naraz, bez ponownego wczytywania JSONL między etapami
+    logger.info('Batch Pipeline')
+    extraction_metrics, labeling_metrics = RequestMetrics("extraction", logger), RequestMetrics("labeling", logger)
+    service, cache = build_sentence_service(client, logger, PATHS, MODEL_ID, workers, limit, loader, False, engine, adaptive,
+                                            hosts, metrics=extraction_metrics)
+    # Wątki etykietujące korzystają z klienta synchronicznego niezależnie od silnika ekstrakcji
+    labeler, batched = build_labeler(client, logger, PATHS, MODEL_ID, 'threads', hosts, labeler, labeling_metrics)
+    # Ten sam model w obu etapach — wystarczy jedna rozgrzewka na prefiks promptu każdego etapu
+    warm_up(service.extractor, labeler)
+    batch_size = AspectLabelingService.MAX_BATCH_SIZE if batched else 1
+    pipeline = PipelineService(service, labeler, logger, workers, batch_size=batch_size,
+                               limiter=make_limiter(logger, workers, adaptive), fast_path=build_fast_path(logger, PATHS),
+                               clusterer=make_clusterer(logger))
+
+    extract = (lambda: asyncio.run(service.run_async(language))) if engine == 'async' else None
+    reviews, df_liked_labeled, df_disliked_labeled = pipeline.run(language, extract=extract)
+
+    close_cache(logger, cache)
+    log_labeler_stats(logger, labeler)
+    save_metrics(PATHS, extraction_metrics, labeling_metrics)
+    save_labeled(logger, PATHS, reviews, df_liked_labeled, df_disliked_labeled)
+
 def analysis_batch(logger, PATHS):
     logger.info("Batch Analysis")
 
+    # Analiza potrzebuje tylko trzech kolumn; etykiety zostają kategoriami (normalizacja na słowniku)
+    loader = (DataFrameLoaderParquet(logger, columns=["recommendationid", "aspect", "labels"], categories=["labels"])
+              if is_parquet(PATHS['liked_csv']) else DataFrameLoaderCsv(logger))
+
     analyze_and_save(
         label="liked",
         csv_path=PATHS['liked_csv'],
         output_path=PATHS['liked_analysis'],
         logger=logger,
-        charts_dir=PATHS['charts']
+        charts_dir=PATHS['charts'],
+        loader=loader,
+        state_path=PATHS.get('liked_state')
     )
 
     analyze_and_save(
@@ -82,19 +280,84 @@ def analysis_batch(logger, PATHS):
         csv_path=PATHS['disliked_csv'],
         output_path=PATHS['disliked_analysis'],
         logger=logger,
-        charts_dir=PATHS['charts']
+        charts_dir=PATHS['charts'],
+        loader=loader,
+        state_path=PATHS.get('disliked_state')
     )
 
-def run(PATHS, MODEL_ID, workers=6, language='english', limit=None) -> int:
+def merge_shard_analyses(logger, PATHS, shards):
+    # Podsumowanie wszystkich gier ze stanów częściowych shardów — bez ponownego wczytywania tabel
+    for label in ("liked", "disliked"):
+        key = f'{label}_state'
+        if not PATHS.get(key):
+            continue
+        merge_analyses(label, [paths[key] for paths in shards if paths.get(key)], PATHS[f'{label}_analysis'], PATHS[key],
+                       logger, PATHS['charts'])
+
+def resolve_resume_dir(resume, logger):
+    # resume == "latest" -> najnowszy run z zapisanymi wynikami, w przeciwnym razie ścieżka katalogu runu
+    run_dir = latest_run_dir() if resume == "latest" else Path(resume)
+    if run_dir is None or not run_dir.is_dir():
+        logger.warning("Brak katalogu do wznowienia (%s) — przetwarzanie od początku", resume)
+        return None
+    logger.info("Wznawianie przetwarzania w katalogu: %s", run_dir)
+    return run_dir
+
+def run(PATHS, MODEL_ID, workers=6, language='english', limit=None, resume=None, engine='threads', adaptive=False,
+        hosts=None, pipeline=False, labeler='llm', only_errors=None) -> int:
+    ensure_directories_exist(PATHS)
     logger = setup_logger(name = "review-analyzer", handlers=[get_console_handler('INFO'), get_file_handler(PATHS['log'], 'DEBUG')])
     logger.info("Start przetwarzania…")
     logger.info('ARG CONFIG: %s, %s, %d,%s, %s',PATHS, MODEL_ID, workers, language, limit)
 
-    client = Client()
+    hosts = parse_hosts(hosts) if isinstance(hosts, str) else hosts
+    if hosts:
+        logger.info("Hosty Ollama: %s", hosts)
+    client = make_client(logger, hosts)
+
+    if only_errors:
+        # Poprawki w istniejącym runie — bez jego katalogu nie ma czego przetwarzać ponownie
+        resume_dir = resolve_resume_dir(only_errors, logger)
+        if resume_dir is None:
+            logger.error("Tryb --only-errors wymaga istniejącego katalogu runu (%s)", only_errors)
+            return 1
+        resume = None
+    else:
+        resume_dir = resolve_resume_dir(resume, logger) if resume else None
+
+    def output_paths(paths):
+        return rebase_paths(paths, resume_dir) if resume_dir else paths
+
+    if pipeline and resume_dir:
+        # Wcześniejsze wyniki są tylko w pliku JSONL / bazie — etykietowanie musi je wczytać, więc bez potoku
+        logger.info("Wznawianie: tryb potokowy wyłączony, etapy uruchamiane kolejno")
+        pipeline = False
+
+    def process(paths, loader=None):
+        if pipeline:
+            pipeline_batch(client, logger, paths, MODEL_ID, workers=workers, language=language, limit=limit, loader=loader,
+                           engine=engine, adaptive=adaptive, hosts=hosts, labeler=labeler)
+        else:
+            sentence_batch(client, logger, paths, MODEL_ID, workers=workers, language=language, limit=limit, loader=loader,
+                           resume=resume_dir is not None and not only_errors, engine=engine, adaptive=adaptive, hosts=hosts,
+                           only_errors=bool(only_errors))
+            label_batch(client, logger, paths, MODEL_ID, workers=workers, limit=limit, engine=engine, adaptive=adaptive,
+                        hosts=hosts, labeler=labeler)
+        analysis_batch(logger, paths)
 
-    sentence_batch(client, logger, PATHS, MODEL_ID, workers=6, language='english', limit=limit)
-    label_batch(client, logger, PATHS, MODEL_ID, workers=6, limit=limit)
-    analysis_batch(logger, PATHS)
+    if is_multi_source(PATHS['raw_reviews']):
+        # Wiele zrzutów: jeden przebieg, wyniki partycjonowane per appid
+        multi_loader = MultiDumpReviewLoader(PATHS['raw_reviews'], logger)
+        shards = []
+        for appid in multi_loader.appids():
+            logger.info('Gra appid=%s', appid)
+            shards.append(output_paths(shard_paths(PATHS, appid)))
+            process(shards[-1], multi_loader.for_appid(appid))
+        merge_shard_analyses(logger, output_paths(PATHS), shards)
+    else:
+        process(output_paths(PATHS))
 
+    if hosts:
+        logger.info("Statystyki hostów Ollama: %s", client.stats())
     logger.info("Zakończono.")
     return 0
\ No newline at end of file
@@ -0,0 +1,38 @@
+import argparse
+
+from review_analyzer.infrastructure.dataframe_loader import DataFrameLoaderCsv, DataFrameLoaderParquet
+from review_analyzer.infrastructure.utils import update_analysis, merge_analyses
+from review_analyzer.presentation.runner import is_parquet
+
+from review_analyzer.infrastructure.log_handlers.console_handler import get_console_handler
+from review_analyzer.infrastructure.log_handlers.setup_logging import setup_logger
+
+# Przyrostowa aktualizacja analizy ze stanu częściowego (analysis/state_{liked,disliked}.json):
+#   --input  tabela etykietowanych aspektów z nowymi recenzjami — dopisywana do --state
+#   --merge  stany innych shardów / runów — scalane z --state (jeśli istnieje) w jedno podsumowanie
+# Podsumowanie trafia do --output, wykresy do --charts, nowy stan z powrotem do --state.
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--label", choices=["liked", "disliked"], required=True)
+    parser.add_argument("--state", required=True, help="Plik stanu analizy (tworzony, jeśli nie istnieje)")
+    parser.add_argument("--output", required=True, help="Plik JSON podsumowania")
+    parser.add_argument("--charts", required=True, help="Katalog wykresów")
+    parser.add_argument("--input", default=None, help="Tabela przyrostu (.parquet lub .csv)")
+    parser.add_argument("--merge", nargs="+", default=[], help="Stany do scalenia")
+    args = parser.parse_args()
+    if not args.input and not args.merge:
+        parser.error("podaj --input lub --merge")
+
+    logger = setup_logger(name="review-analyzer", handlers=[get_console_handler('INFO')])
+    if args.merge:
+        merge_analyses(args.label, [args.state, *args.merge], args.output, args.state, logger, args.charts)
+    if args.input:
+        loader = (DataFrameLoaderParquet(logger, columns=["recommendationid", "aspect", "labels"], categories=["labels"])
+                  if is_parquet(args.input) else DataFrameLoaderCsv(logger))
+        update_analysis(args.label, args.input, args.output, args.state, logger, args.charts, loader=loader)
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,128 @@
+import zlib
+from logging import Logger
+from typing import Dict, FrozenSet, List, Tuple
+
+import numpy as np
+
+# Słowa bez znaczenia dla kategorii aspektu ("graphics are great" ~ "great graphics")
+STOPWORDS = frozenset({
+    "a", "an", "the", "is", "are", "was", "were", "be", "it", "its", "this", "that", "and", "of", "to", "in", "on",
+    "for", "with", "very", "so", "really", "quite", "pretty", "just",
+})
+
+
+def _lsh_params(num_perm: int, threshold: float) -> Tuple[int, int]:
+    # (bands, rows): największy próg kolizji (1/b)^(1/r) nie wyższy niż próg podobieństwa —
+    # wolimy nadmiar kandydatów (i tak weryfikowanych Jaccardem) niż pominięte duplikaty
+    candidates = [(num_perm // r, r) for r in range(1, num_perm + 1) if num_perm % r == 0]
+    below = [br for br in candidates if (1 / br[0]) ** (1 / br[1]) <= threshold]
+    return max(below, key=lambda br: br[1]) if below else candidates[0]
+
+
+class AspectClusterer:
+    '''
+    Grupowanie niemal identycznych aspektów (klucze po normalize_aspects). Zbiór tokenów bez
+    słów pomocniczych; identyczne zbiory trafiają do jednego klastra od razu (słownik), pozostałe
+    przez MinHash + LSH: kandydatami są tylko reprezentanci z tych samych kubełków, a przynależność
+    potwierdza dokładne podobieństwo Jaccarda >= `threshold`. Bez porównań każdy z każdym.
+
+    Klastrowanie jest przyrostowe (pierwszy aspekt klastra zostaje jego reprezentantem),
+    więc ten sam obiekt obsługuje całą ramkę i strumień w trybie potokowym.
+    '''
+
+    MAX_BUCKET = 64  # górna granica kandydatów w kubełku — stały koszt na aspekt niezależnie od skali
+
+    def __init__(self, logger: Logger, threshold: float = 0.7, num_perm: int = 64, seed: int = 1):
+        self.logger = logger
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands, self.rows = _lsh_params(num_perm, threshold)
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 2 ** 63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+
+        self._by_tokens: Dict[FrozenSet[str], str] = {}
+        self._rep_tokens: Dict[str, FrozenSet[str]] = {}
+        self._buckets: Dict[Tuple[int, bytes], List[str]] = {}
+        self._assigned: Dict[str, str] = {}
+
+    @staticmethod
+    def _tokens(key: str) -> FrozenSet[str]:
+        tokens = [t for t in key.split() if t not in STOPWORDS]
+        return frozenset(tokens or key.split())
+
+    def _signatures(self, token_sets: List[FrozenSet[str]], chunk: int = 20000) -> np.ndarray:
+        # Sygnatury MinHash dla wielu zbiorów naraz: haszowanie multiply-shift w arytmetyce uint64
+        # (przepełnienie jest zamierzone), minimum w obrębie zbioru przez reduceat; w porcjach dla pamięci
+        out = np.empty((len(token_sets), self.num_perm), dtype=np.uint64)
+        for start in range(0, len(token_sets), chunk):
+            part = token_sets[start:start + chunk]
+            sizes = np.fromiter((len(t) for t in part), dtype=np.int64, count=len(part))
+            hashes = np.fromiter((zlib.crc32(t.encode()) for tokens in part for t in tokens), dtype=np.uint64,
+                                 count=int(sizes.sum()))
+            permuted = (hashes[:, None] * self._a[None, :] + self._b[None, :]) >> np.uint64(32)
+            offsets = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+            out[start:start + len(part)] = np.minimum.reduceat(permuted, offsets, axis=0)
+        return out
+
+    def _band_keys(self, signatures: np.ndarray) -> List[List[Tuple[int, int]]]:
+        # Każde pasmo `rows` wartości sygnatury składane do jednej liczby (klucz kubełka LSH)
+        bands = signatures.reshape(len(signatures), self.bands, self.rows)
+        combined = np.zeros((len(signatures), self.bands), dtype=np.uint64)
+        for r in range(self.rows):
+            combined = combined * np.uint64(0x100000001B3) ^ bands[:, :, r]
+        return [list(enumerate(row)) for row in combined.tolist()]
+
+    def _match(self, tokens: FrozenSet[str], band_keys: List[Tuple[int, int]]):
+        seen = set()
+        for band_key in band_keys:
+            for candidate in self._buckets.get(band_key, ()):
+                if candidate in seen:
+                    continue
+                seen.add(candidate)
+                other = self._rep_tokens[candidate]
+                # Jaccard <= min/max rozmiarów — tańszy test przed przecięciem zbiorów
+                if min(len(tokens), len(other)) < self.threshold * max(len(tokens), len(other)):
+                    continue
+                if len(tokens & other) / len(tokens | other) >= self.threshold:
+                    return candidate
+        return None
+
+    def assign(self, key: str, band_keys: List[Tuple[int, int]] = None) -> str:
+        '''Zwraca klucz reprezentanta klastra, do którego należy `key`.'''
+        if key in self._assigned:
+            return self._assigned[key]
+
+        tokens = self._tokens(key)
+        rep = self._by_tokens.get(tokens)
+        if rep is None and tokens:
+            if band_keys is None:
+                band_keys = self._band_keys(self._signatures([tokens]))[0]
+            rep = self._match(tokens, band_keys)
+            if rep is None:
+                rep = key
+                self._rep_tokens[key] = tokens
+                for band_key in band_keys:
+                    bucket = self._buckets.setdefault(band_key, [])
+                    if len(bucket) < self.MAX_BUCKET:
+                        bucket.append(key)
+            self._by_tokens[tokens] = rep
+        rep = rep or key
+
+        self._assigned[key] = rep
+        return rep
+
+    def representatives(self, keys: List[str]) -> List[str]:
+        # Sygnatury i kubełki liczone wektorowo dla nowych kluczy, potem przypisanie po kolei
+        fresh = {}
+        for key in dict.fromkeys(keys):
+            if key not in self._assigned:
+                tokens = self._tokens(key)
+                if tokens and tokens not in self._by_tokens:
+                    fresh[key] = tokens
+        band_keys = dict(zip(fresh, self._band_keys(self._signatures(list(fresh.values()))))) if fresh else {}
+
+        reps = [self.assign(key, band_keys.get(key)) for key in keys]
+        self.logger.debug("Klastrowanie aspektów: %d kluczy -> %d klastrów", len(set(keys)), len(set(reps)))
+        return reps
@@ -1,31 +1,177 @@
 from logging import Logger
+from contextlib import aclosing
 from multiprocessing.dummy import Pool  # Thread-based
 from typing import List
 from tqdm import tqdm
 import pandas as pd
 
 from review_analyzer.infrastructure.aspect_labeler import MistralAspectLabeler
+from review_analyzer.infrastructure.lexicon_classifier import LexiconAspectClassifier
+from review_analyzer.service.async_executor import bounded_map
+from review_analyzer.service.aspect_clustering import AspectClusterer
+from review_analyzer.service.concurrency import AdaptiveLimiter
+
+
+def normalize_aspects(aspects: pd.Series) -> pd.Series:
+    '''Klucz deduplikacji: małe litery, bez interpunkcji, pojedyncze spacje.'''
+    return (
+        aspects.astype(str)
+        .str.lower()
+        .str.replace(r"[^\w\s]", " ", regex=True)
+        .str.replace(r"\s+", " ", regex=True)
+        .str.strip()
+    )
+
 
 class AspectLabelingService:
-    def __init__(self, labeler: MistralAspectLabeler, aspect_df: pd.DataFrame, logger: Logger, workers: int = 4, limit: int = None):
+    MAX_BATCH_SIZE = 25
+    BATCH_CHAR_BUDGET = 1500  # łączna długość aspektów w jednym zapytaniu
+    MIN_BATCHES_PER_WORKER = 4
+
+    def __init__(self, labeler: MistralAspectLabeler, aspect_df: pd.DataFrame, logger: Logger, workers: int = 4, limit: int = None,
+                 batch_size: int = None, limiter: AdaptiveLimiter = None, fast_path: LexiconAspectClassifier = None,
+                 clusterer: AspectClusterer = None):
         self.labeler = labeler
         self.aspect_df = aspect_df
         self.logger = logger
         self.workers = workers
         self.limit = limit
+        self.batch_size = batch_size  # None = dobierany automatycznie
+        self.stats = {}
+        # limiter: AdaptiveLimiter — liczba wątków / zadań to wtedy jego max_limit
+        self.limiter = limiter
+        # fast_path: leksykon etykietujący oczywiste aspekty lokalnie, przed modelem
+        self.fast_path = fast_path
+        # clusterer: niemal identyczne aspekty dzielą etykiety reprezentanta klastra
+        self.clusterer = clusterer
+        self._preset = []
 
-    def run(self):
+    @staticmethod
+    def _has_error(labels) -> bool:
+        # Labeler zwraca [] po błędzie zapytania lub parsowania; w asyncio wynik to (indeks, wsad)
+        if isinstance(labels, tuple):
+            labels = labels[1]
+        if labels and isinstance(labels[0], list):
+            return any(not item for item in labels)
+        return not labels
+
+    def _concurrency(self) -> int:
+        return self.limiter.max_limit if self.limiter else self.workers
+
+    def _limited(self, func):
+        return self.limiter.wrap(func, self._has_error) if self.limiter else func
+
+    def _alimited(self, func):
+        return self.limiter.awrap(func, self._has_error) if self.limiter else func
+
+    def _resolve_batch_size(self, aspects: List[str]) -> int:
+        if self.batch_size:
+            return self.batch_size
+        if not aspects:
+            return 1
+        # Limit znaków na zapytanie, ale każdy worker musi dostać kilka wsadów
+        avg_len = sum(len(a) for a in aspects) / len(aspects)
+        by_budget = int(self.BATCH_CHAR_BUDGET // (avg_len + 8))
+        by_parallelism = len(aspects) // (self.workers * self.MIN_BATCHES_PER_WORKER)
+        return max(1, min(self.MAX_BATCH_SIZE, by_budget, by_parallelism))
+
+    def _batches(self, aspects: List[str]) -> List[List[str]]:
+        size = self._resolve_batch_size(aspects)
+        self.stats["batch_size"] = size
+        return [aspects[i:i + size] for i in range(0, len(aspects), size)]
+
+    def _prepare(self):
         self.logger.debug("Parametry: workers=%d, limit=%s", self.workers, self.limit)
 
         df = self.aspect_df.head(self.limit).copy() if self.limit else self.aspect_df.copy()
 
+        # Każdy unikalny (znormalizowany) aspekt etykietujemy dokładnie raz
+        keys = normalize_aspects(df["aspect"])
+        exact_unique = keys.nunique()
+        if self.clusterer:
+            keys = pd.Series(self.clusterer.representatives(keys.tolist()), index=keys.index, dtype=object)
+        unique = pd.DataFrame({"_key": keys, "aspect": df["aspect"]}).drop_duplicates("_key")
+
+        self.stats = {
+            "total_aspects": len(df),
+            "unique_aspects": len(unique),
+            "dedup_ratio": round(1 - len(unique) / len(df), 3) if len(df) else 0.0,
+        }
+        if self.clusterer:
+            self.stats["exact_unique_aspects"] = exact_unique
+            self.logger.info("Klastrowanie: %d unikalnych aspektów -> %d klastrów", exact_unique, len(unique))
+        pending = self._fast_path(unique["aspect"].tolist())
+        batches = self._batches(pending)
+        self.logger.info(
+            "Deduplikacja: %d unikalnych z %d aspektów (dedup ratio %.3f), %d wsadów po %d",
+            self.stats["unique_aspects"], self.stats["total_aspects"], self.stats["dedup_ratio"],
+            len(batches), self.stats["batch_size"]
+        )
         self.logger.info("Przetwarzanie %d aspektów", len(df))
+        return df, keys, unique, batches
+
+    def _fast_path(self, aspects: List[str]) -> List[str]:
+        # Zwraca aspekty dla modelu; etykiety z leksykonu zostają w self._preset (None = do modelu)
+        self._preset = [self.fast_path.classify(a) for a in aspects] if self.fast_path else [None] * len(aspects)
+        pending = [a for a, labels in zip(aspects, self._preset) if labels is None]
+        if self.fast_path:
+            handled = len(aspects) - len(pending)
+            self.stats.update({
+                "lexicon": handled,
+                "model": len(pending),
+                "lexicon_share": round(handled / len(aspects), 3) if aspects else 0.0,
+            })
+            self.logger.info("Leksykon: %d/%d unikalnych aspektów (%.1f%%), model: %d",
+                             handled, len(aspects), 100 * self.stats["lexicon_share"], len(pending))
+        return pending
+
+    def _merge(self, model_labels: List[List[str]]) -> List[List[str]]:
+        model_labels = iter(model_labels)
+        return [labels if labels is not None else next(model_labels) for labels in self._preset]
 
-        with Pool(processes=self.workers) as pool:
-            labels = list(
-                tqdm(pool.imap_unordered(self.labeler.label_aspect, df["aspect"]), total=len(df))
-            )
+    def _broadcast(self, df, keys, unique, labels):
+        # Rozgłoszenie etykiet na wszystkie wiersze przez join po kluczu
+        labels_df = pd.DataFrame({"_key": unique["_key"].to_numpy(), "labels": labels})
+        df["_key"] = keys.to_numpy()
+        df = df.merge(labels_df, on="_key", how="left").drop(columns="_key")
 
-        df["labels"] = labels
         result_df = df.explode("labels").reset_index(drop=True)
-        return result_df
\ No newline at end of file
+        return result_df
+
+    def run(self):
+        df, keys, unique, batches = self._prepare()
+
+        with Pool(processes=self._concurrency()) as pool:
+            if self.stats["batch_size"] == 1:
+                labels = list(
+                    tqdm(pool.imap(self._limited(self.labeler.label_aspect), [b[0] for b in batches]), total=len(batches))
+                )
+            else:
+                labels = [
+                    labels
+                    for batch in tqdm(pool.imap(self._limited(self.labeler.label_aspects), batches), total=len(batches))
+                    for labels in batch
+                ]
+
+        return self._broadcast(df, keys, unique, self._merge(labels))
+
+    async def run_async(self):
+        '''Wariant asyncio: `workers` to limit żądań w locie (semafor), a nie liczba wątków.'''
+        df, keys, unique, batches = self._prepare()
+        results = [None] * len(batches)
+
+        async def label(indexed):
+            i, batch = indexed
+            if len(batch) == 1:
+                return i, [await self.labeler.alabel_aspect(batch[0])]
+            return i, await self.labeler.alabel_aspects(batch)
+
+        with tqdm(total=len(batches)) as progress:
+            stream = bounded_map(self._alimited(label), enumerate(batches), self._concurrency())
+            async with aclosing(stream):
+                async for i, result in stream:
+                    results[i] = result
+                    progress.update()
+
+        labels = [labels for batch in results for labels in batch]
+        return self._broadcast(df, keys, unique, self._merge(labels))
@@ -0,0 +1,41 @@
+import asyncio
+from typing import AsyncIterator, Awaitable, Callable, Iterable, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+async def bounded_map(func: Callable[[T], Awaitable[R]], items: Iterable[T], concurrency: int) -> AsyncIterator[R]:
+    '''
+    Uruchamia `func` dla każdego elementu, trzymając w locie co najwyżej `concurrency`
+    zadań (semafor). Wyniki zwraca w kolejności ukończenia. Elementy są pobierane
+    z iteratora dopiero, gdy zwolni się miejsce — działa także dla generatorów.
+    Anulowanie lub zamknięcie generatora anuluje wszystkie zadania w locie.
+    '''
+    semaphore = asyncio.Semaphore(concurrency)
+    pending = set()
+
+    def _release(_):
+        semaphore.release()
+
+    try:
+        for item in items:
+            await semaphore.acquire()
+            task = asyncio.create_task(func(item))
+            task.add_done_callback(_release)
+            pending.add(task)
+
+            finished = {task for task in pending if task.done()}
+            pending -= finished
+            for task in finished:
+                yield task.result()
+
+        while pending:
+            finished, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in finished:
+                yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
@@ -0,0 +1,120 @@
+import asyncio
+import threading
+import time
+from functools import wraps
+from logging import Logger
+from typing import Any, Callable, Optional
+
+
+class AdaptiveLimiter:
+    '''
+    Adaptacyjny limit żądań w locie (AIMD). Po każdym oknie `window` odpowiedzi:
+    gdy średnia latencja trzyma się blisko bazowej i nie było błędów — limit rośnie o 1,
+    gdy latencja przekracza `tolerance` × bazowa albo pojawiły się błędy — limit maleje
+    mnożnikowo (`backoff`). Bazowa latencja to minimum z pomiarów, powoli zapominane,
+    więc limiter nadąża za zmianą obciążenia serwera Ollama w trakcie nocy.
+
+    Ten sam obiekt obsługuje pulę wątków (`wrap`) i asyncio (`awrap`); pula / semafor
+    powinny mieć rozmiar `max_limit`, a faktyczną współbieżność trzyma limiter.
+    '''
+
+    def __init__(self, logger: Logger, initial: int = 2, min_limit: int = 1, max_limit: int = 16, window: int = 20,
+                 tolerance: float = 1.5, backoff: float = 0.7):
+        self.logger = logger
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = max(min_limit, min(initial, max_limit))
+        self.window = window
+        self.tolerance = tolerance
+        self.backoff = backoff
+        self.in_flight = 0
+        self.history = []  # (czas, limit) — przebieg zmian limitu
+
+        self._baseline = None
+        self._latencies = []
+        self._errors = 0
+        self._cond = threading.Condition()
+        self._acond = None
+
+    def _record(self, latency: float, error: bool) -> None:
+        # Wywoływane pod blokadą
+        if not error:
+            # Powolne zapominanie minimum (1% na próbkę), żeby bazowa mogła też rosnąć
+            self._baseline = latency if self._baseline is None else min(self._baseline * 1.01, latency)
+            self._latencies.append(latency)
+        else:
+            self._errors += 1
+
+        if len(self._latencies) + self._errors < self.window:
+            return
+
+        avg = sum(self._latencies) / len(self._latencies) if self._latencies else 0.0
+        previous = self.limit
+        if self._errors or (self._baseline and avg > self._baseline * self.tolerance):
+            self.limit = max(self.min_limit, int(self.limit * self.backoff))
+        elif self.in_flight >= self.limit - 1:
+            # Zwiększamy tylko wtedy, gdy limit był faktycznie wykorzystany
+            self.limit = min(self.max_limit, self.limit + 1)
+
+        if self.limit != previous:
+            self.history.append((time.time(), self.limit))
+            self.logger.info(
+                "Limit współbieżności: %d -> %d (latencja %.2fs, bazowa %.2fs, błędy %d/%d)",
+                previous, self.limit, avg, self._baseline or 0.0, self._errors, self.window
+            )
+        self._latencies, self._errors = [], 0
+
+    def acquire(self) -> None:
+        with self._cond:
+            self._cond.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+
+    def release(self, latency: float, error: bool = False) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            self._record(latency, error)
+            self._cond.notify_all()
+
+    def wrap(self, func: Callable, is_error: Optional[Callable[[Any], bool]] = None) -> Callable:
+        '''
+        Opakowuje funkcję wywoływaną z wątków: czeka na wolne miejsce i mierzy latencję.
+        `is_error(wynik)` pozwala liczyć jako błąd wyniki, w których wyjątek został już obsłużony.
+        '''
+        @wraps(func)
+        def limited(*args, **kwargs):
+            self.acquire()
+            start, error = time.perf_counter(), True
+            try:
+                result = func(*args, **kwargs)
+                error = bool(is_error and is_error(result))
+                return result
+            finally:
+                self.release(time.perf_counter() - start, error)
+        return limited
+
+    async def _aacquire(self) -> None:
+        if self._acond is None:
+            self._acond = asyncio.Condition()
+        async with self._acond:
+            await self._acond.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+
+    async def _arelease(self, latency: float, error: bool) -> None:
+        async with self._acond:
+            self.in_flight -= 1
+            self._record(latency, error)
+            self._acond.notify_all()
+
+    def awrap(self, func: Callable, is_error: Optional[Callable[[Any], bool]] = None) -> Callable:
+        '''Wersja dla korutyn — jeden limiter na pętlę zdarzeń.'''
+        @wraps(func)
+        async def limited(*args, **kwargs):
+            await self._aacquire()
+            start, error = time.perf_counter(), True
+            try:
+                result = await func(*args, **kwargs)
+                error = bool(is_error and is_error(result))
+                return result
+            finally:
+                await self._arelease(time.perf_counter() - start, error)
+        return limited
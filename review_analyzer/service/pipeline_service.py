@@ -0,0 +1,166 @@
+from logging import Logger
+from queue import Queue, Empty
+from threading import Lock, Thread
+from typing import Dict, List, Tuple
+
+import pandas as pd
+
+from review_analyzer.domain.aspect_labeler import AspectLabeler
+from review_analyzer.infrastructure.lexicon_classifier import LexiconAspectClassifier
+from review_analyzer.service.aspect_labeling_service import normalize_aspects
+from review_analyzer.service.aspect_clustering import AspectClusterer
+from review_analyzer.service.concurrency import AdaptiveLimiter
+
+_DONE = object()
+ASPECT_COLUMNS = ["appid", "recommendationid", "aspect"]
+REVIEW_COLUMNS = ["appid", "recommendationid", "original_review", "error"]
+
+
+class PipelineService:
+    '''
+    Ekstrakcja i etykietowanie jednocześnie: aspekty liked/disliked z każdego wyniku ekstrakcji
+    trafiają do ograniczonej kolejki, z której od razu czytają wątki etykietujące. Pełna kolejka
+    wstrzymuje ekstrakcję (backpressure). Każdy znormalizowany aspekt jest etykietowany raz,
+    a etykiety są rozgłaszane na wszystkie wiersze po zakończeniu obu etapów.
+    '''
+
+    def __init__(self, extraction_service, labeler: AspectLabeler, logger: Logger, workers: int = 4, queue_size: int = 256,
+                 batch_size: int = 1, limiter: AdaptiveLimiter = None, fast_path: LexiconAspectClassifier = None,
+                 clusterer: AspectClusterer = None):
+        self.extraction_service = extraction_service
+        self.labeler = labeler
+        self.logger = logger
+        self.workers = workers
+        self.batch_size = batch_size  # >1: wątek dobiera z kolejki do tylu aspektów na jedno zapytanie wsadowe
+        self.limiter = limiter
+        self.fast_path = fast_path
+        self.clusterer = clusterer
+        self.stats = {"lexicon": 0, "model": 0}
+        self.queue = Queue(maxsize=queue_size)
+
+        self._lock = Lock()
+        self._rows = {"liked": [], "disliked": []}
+        self._labels: Dict[str, List[str]] = {}
+        self._claimed = set()
+        self._reviews: List[Dict] = []
+        self._error = None
+
+    def _on_result(self, result: Dict) -> None:
+        # Tylko kolumny tabeli recenzji — ekstrakcja z checkpointem nie trzyma pełnych wyników w pamięci
+        self._reviews.append({key: result[key] for key in REVIEW_COLUMNS if key in result})
+        for kind in ("liked", "disliked"):
+            for aspect in result.get(kind) or []:
+                self.queue.put((kind, result.get("appid"), result.get("recommendationid"), aspect))
+
+    def _take(self) -> Tuple[List[tuple], bool]:
+        # Blokująco jeden element, potem bez czekania to, co już jest w kolejce (do batch_size)
+        items, done = [], False
+        item = self.queue.get()
+        while True:
+            if item is _DONE:
+                done = True
+                break
+            items.append(item)
+            if len(items) >= self.batch_size:
+                break
+            try:
+                item = self.queue.get_nowait()
+            except Empty:
+                break
+        return items, done
+
+    def _claim(self, items: List[tuple]) -> List[Tuple[str, str]]:
+        keys = normalize_aspects(pd.Series([aspect for *_, aspect in items], dtype=object)).tolist()
+        todo = []
+        with self._lock:
+            for (kind, appid, rid, aspect), key in zip(items, keys):
+                if self.clusterer:
+                    key = self.clusterer.assign(key)
+                self._rows[kind].append((appid, rid, aspect, key))
+                if key not in self._claimed:
+                    self._claimed.add(key)
+                    preset = self.fast_path.classify(aspect) if self.fast_path else None
+                    if preset is not None:
+                        self._labels[key] = preset
+                        self.stats["lexicon"] += 1
+                    else:
+                        todo.append((key, aspect))
+                        self.stats["model"] += 1
+        return todo
+
+    def _label(self, aspects: List[str]) -> List[List[str]]:
+        if len(aspects) == 1:
+            return [self.labeler.label_aspect(aspects[0])]
+        return self.labeler.label_aspects(aspects)
+
+    def _process(self, items: List[tuple], label) -> None:
+        todo = self._claim(items)
+        if todo:
+            try:
+                labels = label([aspect for _, aspect in todo])
+            except Exception as e:
+                self.logger.warning("Błąd etykietowania w potoku (%d aspektów): %s", len(todo), e)
+                labels = [[] for _ in todo]
+            with self._lock:
+                for (key, _), aspect_labels in zip(todo, labels):
+                    self._labels[key] = aspect_labels
+
+    def _consume(self) -> None:
+        label = self.limiter.wrap(self._label, lambda batch: any(not labels for labels in batch)) if self.limiter else self._label
+        while True:
+            items, done = self._take()
+            try:
+                self._process(items, label)
+            except Exception as e:
+                # Wątek dalej opróżnia kolejkę — inaczej producent czekałby w nieskończoność na miejsce w pełnej
+                # kolejce; pierwszy błąd jest zgłaszany z run() po zakończeniu ekstrakcji
+                self.logger.error("Błąd wątku etykietującego w potoku (%d aspektów): %s", len(items), e, exc_info=True)
+                with self._lock:
+                    if self._error is None:
+                        self._error = e
+            if done:
+                return
+
+    def _labeled_frame(self, kind: str) -> pd.DataFrame:
+        rows = self._rows[kind]
+        df = pd.DataFrame([row[:3] for row in rows], columns=ASPECT_COLUMNS)
+        df["labels"] = [self._labels.get(row[3], []) for row in rows]
+        return df.explode("labels").reset_index(drop=True)
+
+    @staticmethod
+    def _reviews_frame(results: List[Dict]) -> pd.DataFrame:
+        df = pd.DataFrame(results, columns=None if results else REVIEW_COLUMNS[:3])
+        columns = REVIEW_COLUMNS[:3] + (["error"] if "error" in df.columns else [])
+        return df[columns].copy()
+
+    def run(self, language=None, extract=None) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+        '''
+        `extract` — opcjonalna funkcja uruchamiająca ekstrakcję (np. wariant asyncio);
+        domyślnie `extraction_service.run(language)`. Zwraca (reviews, liked, disliked).
+        Błąd wątku etykietującego (np. leksykonu lub klastrowania) nie blokuje ekstrakcji —
+        jest zgłaszany po jej zakończeniu.
+        '''
+        self.logger.info("Start potoku ekstrakcja → etykietowanie (workers=%d, kolejka=%d)", self.workers, self.queue.maxsize)
+        self.extraction_service.on_result = self._on_result
+
+        consumers = [Thread(target=self._consume, daemon=True) for _ in range(self.workers)]
+        for consumer in consumers:
+            consumer.start()
+        try:
+            extract() if extract else self.extraction_service.run(language)
+        finally:
+            for _ in consumers:
+                self.queue.put(_DONE)
+            for consumer in consumers:
+                consumer.join()
+        if self._error is not None:
+            raise self._error
+
+        liked_df, disliked_df = self._labeled_frame("liked"), self._labeled_frame("disliked")
+        self.logger.info(
+            "Zakończono potok — %d recenzji, %d/%d aspektów liked/disliked, %d unikalnych etykietowanych",
+            len(self._reviews), len(self._rows["liked"]), len(self._rows["disliked"]), len(self._labels)
+        )
+        if self.fast_path:
+            self.logger.info("Leksykon: %d unikalnych aspektów, model: %d", self.stats["lexicon"], self.stats["model"])
+        return self._reviews_frame(self._reviews), liked_df, disliked_df
@@ -0,0 +1,95 @@
+import hashlib
+import re
+from collections import OrderedDict, deque
+from threading import Lock
+from typing import Dict, Iterable, Iterator, List
+
+
+def normalize_review(text: str) -> str:
+    return re.sub(r"\s+", " ", (text or "").lower()).strip()
+
+
+class ReviewDeduplicator:
+    '''
+    Filtr strumienia recenzji przed ekstrakcją:
+    - recenzje krótsze niż `min_chars` lub bez liter dostają lokalny, pusty wynik (bez LLM),
+    - identyczne (po normalizacji) teksty są ekstrahowane raz — kolejne kopie czekają na wynik
+      pierwszej albo dostają go od razu, jeśli jest już gotowy.
+
+    `filter` działa w wątku zasilającym pulę; wyniki lokalne trafiają do kolejki `drain`,
+    a `fan_out` rozsyła wynik ekstrakcji na wszystkie recenzje o tym samym tekście.
+    Gotowe wyniki są pamiętane w LRU o pojemności `max_done` — pamięć nie rośnie z rozmiarem
+    korpusu; duplikat wyniku usuniętego z LRU jest po prostu ekstrahowany ponownie.
+    '''
+
+    def __init__(self, min_chars: int = 0, dedup: bool = True, max_done: int = 10_000):
+        self.min_chars = min_chars
+        self.dedup = dedup
+        self.max_done = max_done
+        self.stats = {"extracted": 0, "duplicates": 0, "trivial": 0}
+
+        self._lock = Lock()
+        self._ready = deque()
+        self._pending: Dict[str, List] = {}  # klucz tekstu -> recenzje czekające na wynik
+        self._key_of: Dict[str, str] = {}    # recommendationid ekstrahowanej recenzji -> klucz tekstu
+        self._done: OrderedDict = OrderedDict()  # klucz tekstu -> {"liked", "disliked"}, LRU
+
+    @staticmethod
+    def _copy(review, template: Dict) -> Dict:
+        return {
+            **template,
+            "appid": review.appid,
+            "recommendationid": review.recommendationid,
+            "original_review": review.review,
+        }
+
+    def _is_trivial(self, text: str) -> bool:
+        return len(text) < self.min_chars or not any(c.isalpha() for c in text)
+
+    def filter(self, reviews: Iterable) -> Iterator:
+        for review in reviews:
+            text = normalize_review(review.review)
+            if self._is_trivial(text):
+                with self._lock:
+                    self.stats["trivial"] += 1
+                    self._ready.append(self._copy(review, {"liked": [], "disliked": []}))
+                continue
+            if not self.dedup:
+                yield review
+                continue
+
+            key = hashlib.sha1(text.encode("utf-8")).hexdigest()
+            with self._lock:
+                if key in self._done:
+                    self._done.move_to_end(key)
+                    self.stats["duplicates"] += 1
+                    self._ready.append(self._copy(review, self._done[key]))
+                    continue
+                if key in self._pending:
+                    self.stats["duplicates"] += 1
+                    self._pending[key].append(review)
+                    continue
+                self._pending[key] = []
+                self._key_of[str(review.recommendationid)] = key
+                self.stats["extracted"] += 1
+            yield review
+
+    def fan_out(self, result: Dict) -> List[Dict]:
+        '''Wynik ekstrakcji + kopie dla recenzji o identycznym tekście, które na niego czekały.'''
+        with self._lock:
+            key = self._key_of.pop(str(result.get("recommendationid")), None)
+            if key is None:
+                return [result]
+            waiting = self._pending.pop(key, [])
+            template = {k: v for k, v in result.items() if k not in ("appid", "recommendationid", "original_review")}
+            if "error" not in result and self.max_done > 0:
+                self._done[key] = template
+                if len(self._done) > self.max_done:
+                    self._done.popitem(last=False)
+        return [result] + [self._copy(review, template) for review in waiting]
+
+    def drain(self) -> List[Dict]:
+        with self._lock:
+            ready = list(self._ready)
+            self._ready.clear()
+        return ready
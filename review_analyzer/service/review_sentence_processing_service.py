@@ -1,42 +1,141 @@
 from typing import List
+from itertools import islice
+from threading import BoundedSemaphore
+from contextlib import aclosing
 #from multiprocessing import Pool
 from multiprocessing.dummy import Pool  # Thread-based pool
 
 from tqdm import tqdm
 
+from review_analyzer.service.async_executor import bounded_map
+from review_analyzer.service.review_dedup import ReviewDeduplicator
+
 class ReviewProcessingService:
-    def __init__(self, extractor, loader, saver, logger, workers=4, limit=None):
+    MAX_BATCH_REVIEWS = 8
+
+    def __init__(self, extractor, loader, saver, logger, workers=4, limit=None, stream=False, checkpoint=False, resume=False,
+                 batch_chars=None, limiter=None, on_result=None, dedup=False, min_chars=None):
         self.extractor = extractor
         self.loader = loader
         self.saver = saver
         self.logger = logger
         self.workers = workers
         self.limit = limit
+        self.stream = stream
+        # checkpoint: wyniki dopisywane do pliku na bieżąco; resume: pomija już zapisane recenzje
+        self.checkpoint = checkpoint or resume
+        self.resume = resume
+        # batch_chars: budżet znaków tekstu recenzji na jedno zapytanie wsadowe (None = bez wsadów)
+        self.batch_chars = batch_chars
+        # limiter: AdaptiveLimiter — `workers` zastępuje wtedy adaptacyjny limit z górną granicą max_limit
+        self.limiter = limiter
+        # on_result: wywoływane dla każdego wyniku zaraz po jego otrzymaniu (np. potok do etykietowania)
+        self.on_result = on_result
+        # dedup: identyczne teksty ekstrahowane raz; min_chars: krótsze recenzje (lub bez liter) bez LLM
+        self.dedup = dedup
+        self.min_chars = min_chars
+        self._deduplicator = None
+        self.summary = {"results": 0, "errors": 0}
 
-    def run(self, language=None):
-        self.logger.info("Start przetwarzania recenzji")
-        self.logger.debug("Parametry: language=%s, workers=%d, limit=%s", language, self.workers, self.limit)
+    def _bounded(self, reviews, semaphore):
+        # Pool pobiera zadania z iteratora bez ograniczeń — semafor trzyma w locie
+        # co najwyżej kilka recenzji na worker, więc pamięć nie rośnie z rozmiarem pliku
+        for review in reviews:
+            semaphore.acquire()
+            yield review
+
+    def _group(self, reviews):
+        # Krótkie recenzje łączone we wsady w ramach budżetu znaków; dłuższe idą pojedynczo
+        batch, chars = [], 0
+        for review in reviews:
+            size = len(review.review or "")
+            if batch and (chars + size > self.batch_chars or len(batch) >= self.MAX_BATCH_REVIEWS):
+                yield batch
+                batch, chars = [], 0
+            batch.append(review)
+            chars += size
+        if batch:
+            yield batch
+
+    def _tasks(self, reviews, batch_func, single_func):
+        # Zwraca (funkcja, elementy) — przy wsadach funkcja dostaje listę recenzji i zwraca listę wyników
+        if self.batch_chars:
+            return batch_func, self._group(reviews)
+        return single_func, reviews
+
+    @staticmethod
+    def _has_error(output):
+        outputs = output if isinstance(output, list) else [output]
+        return any("error" in result for result in outputs)
+
+    def _concurrency(self):
+        return self.limiter.max_limit if self.limiter else self.workers
+
+    def _load(self, language):
+        done = self.saver.finished_ids() if self.resume else set()
+        if done:
+            self.logger.info("Wznawianie: pomijanie %d przetworzonych recenzji", len(done))
+
+        if self.stream:
+            reviews = self.loader.iter_reviews(language)
+            if done:
+                reviews = (r for r in reviews if str(r.recommendationid) not in done)
+            if self.limit:
+                reviews = islice(reviews, self.limit)
+            self.logger.debug("Przetwarzanie recenzji w trybie strumieniowym")
+            return reviews, None
 
         reviews = self.loader.load_reviews(language)
+        if done:
+            reviews = [r for r in reviews if str(r.recommendationid) not in done]
         if self.limit:
             reviews = reviews[:self.limit]
 
-
         self.logger.debug("Przetwarzanie %d recenzji", len(reviews))
-        try:
-            with Pool(processes=self.workers) as pool:
-                results = list(
-                    tqdm(
-                        pool.imap_unordered(self.extractor.extract_sentence_sentiment, reviews),
-                        total=len(reviews),
-                        desc="Przetwarzanie recenzji"
-                    )
-                )
-        except Exception as e:
-            self.logger.error("Błąd podczas przetwarzania recenzji: %s", str(e), exc_info=True)
-            return
+        return reviews, len(reviews)
+
+    def _start(self, language):
+        self.logger.info("Start przetwarzania recenzji")
+        self.logger.debug("Parametry: language=%s, workers=%d, limit=%s", language, self.workers, self.limit)
 
-        self.logger.info("Zakończono przetwarzanie — %d wyników", len(results))
+        reviews, total = self._load(language)
+        self._deduplicator = None
+        self.summary = {"results": 0, "errors": 0}
+        if self.dedup or self.min_chars:
+            self._deduplicator = ReviewDeduplicator(min_chars=self.min_chars or 0, dedup=self.dedup)
+            reviews = self._deduplicator.filter(reviews)
+        if self.checkpoint:
+            self.saver.open(append=self.resume)
+        return reviews, total
+
+    def _expand(self, outputs):
+        # Rozesłanie wyników na duplikaty + wyniki lokalne (krótkie recenzje, gotowe duplikaty)
+        if self._deduplicator is None:
+            return outputs
+        expanded = [result for output in outputs for result in self._deduplicator.fan_out(output)]
+        return expanded + self._deduplicator.drain()
+
+    def _collect(self, result, results):
+        # Przy checkpoincie wynik trafia od razu do pliku/bazy — w pamięci zostają tylko liczniki,
+        # więc pamięć nie rośnie z rozmiarem zrzutu; bez checkpointu lista jest potrzebna do save()
+        self.summary["results"] += 1
+        if "error" in result:
+            self.summary["errors"] += 1
+        if self.checkpoint:
+            self.saver.write(result)
+        else:
+            results.append(result)
+        if self.on_result:
+            self.on_result(result)
+
+    def _finish(self, results):
+        if self._deduplicator is not None:
+            self.logger.info("Ekstrakcja LLM: %(extracted)d, duplikaty: %(duplicates)d, krótkie/bez liter: %(trivial)d",
+                             self._deduplicator.stats)
+        self.logger.info("Zakończono przetwarzanie — %(results)d wyników, %(errors)d z błędem", self.summary)
+
+        if self.checkpoint:
+            return dict(self.summary)
 
         try:
             self.saver.save(results)
@@ -45,3 +144,71 @@ class ReviewProcessingService:
             self.logger.error("Błąd podczas zapisu wyników: %s", str(e), exc_info=True)
 
         return results
+
+    def run(self, language=None):
+        '''
+        Zwraca listę wyników, a przy checkpoincie (wyniki zapisywane na bieżąco) tylko
+        podsumowanie {"results": n, "errors": k}; None, gdy przetwarzanie przerwał błąd.
+        '''
+        reviews, total = self._start(language)
+        func, items = self._tasks(reviews, self.extractor.extract_batch, self.extractor.extract_sentence_sentiment)
+        if self.limiter:
+            func = self.limiter.wrap(func, self._has_error)
+        semaphore = BoundedSemaphore(self._concurrency() * 2)
+        if self.stream:
+            items = self._bounded(items, semaphore)
+
+        results = []
+        try:
+            with Pool(processes=self._concurrency()) as pool, tqdm(total=total, desc="Przetwarzanie recenzji") as progress:
+                for output in pool.imap_unordered(func, items):
+                    outputs = self._expand(output if self.batch_chars else [output])
+                    for result in outputs:
+                        self._collect(result, results)
+                    progress.update(len(outputs))
+                    if self.stream:
+                        semaphore.release()
+                for result in self._expand([]):
+                    self._collect(result, results)
+                    progress.update()
+        except Exception as e:
+            self.logger.error("Błąd podczas przetwarzania recenzji: %s", str(e), exc_info=True)
+            return
+        finally:
+            if self.checkpoint:
+                self.saver.close()
+
+        return self._finish(results)
+
+    async def run_async(self, language=None):
+        '''
+        Wariant asyncio: `workers` to limit żądań w locie (semafor), a nie liczba wątków.
+        Anulowanie przerywa zadania w locie; zapisane już wyniki zostają w pliku (checkpoint).
+        Zwraca to samo co `run`.
+        '''
+        reviews, total = self._start(language)
+        func, items = self._tasks(reviews, self.extractor.aextract_batch, self.extractor.aextract_sentence_sentiment)
+        if self.limiter:
+            func = self.limiter.awrap(func, self._has_error)
+
+        results = []
+        try:
+            with tqdm(total=total, desc="Przetwarzanie recenzji") as progress:
+                stream = bounded_map(func, items, self._concurrency())
+                async with aclosing(stream):
+                    async for output in stream:
+                        outputs = self._expand(output if self.batch_chars else [output])
+                        for result in outputs:
+                            self._collect(result, results)
+                        progress.update(len(outputs))
+                for result in self._expand([]):
+                    self._collect(result, results)
+                    progress.update()
+        except Exception as e:
+            self.logger.error("Błąd podczas przetwarzania recenzji: %s", str(e), exc_info=True)
+            return
+        finally:
+            if self.checkpoint:
+                self.saver.close()
+
+        return self._finish(results)
@@ -81,7 +81,25 @@ class TestMistralAspectLabeler:
         
         assert result == ["visuals", "rendering"]
         mock_client.chat.assert_called_once()
-        mock_extract_json.assert_called_once()
+        # Czysty JSON (format ze schematem) parsowany bezpośrednio, bez regexa
+        mock_extract_json.assert_not_called()
+        assert mock_client.chat.call_args[1]["format"]["properties"]["labels"]["items"]["enum"][0] == "Gameplay"
+
+    def test_label_aspect_falls_back_to_regex_for_prose(self):
+        """Test that prose around the JSON is still handled when the model ignores the schema"""
+        mock_client = Mock()
+        mock_client.chat.return_value = {"message": {"content": 'Sure! {"labels": ["Music"]} Hope it helps.'}}
+
+        labeler = MistralAspectLabeler(
+            client=mock_client,
+            model_name="test-model",
+            prompt_template="Test prompt {INSERT_ASPECT_HERE}",
+            logger=Mock(),
+            structured_output=False
+        )
+
+        assert labeler.label_aspect("soundtrack") == ["Music"]
+        assert "format" not in mock_client.chat.call_args[1]
 
     def test_label_aspect_exception_handling(self):
         """Test exception handling during labeling"""
@@ -126,4 +144,107 @@ class TestMistralAspectLabeler:
             # Check that the prompt was called with replaced template
             call_args = mock_client.chat.call_args
             messages = call_args[1]['messages']
-            assert "Label this aspect: graphics" in messages[0]['content'] 
\ No newline at end of file
+            assert "Label this aspect: graphics" in messages[0]['content'] 
+
+class TestMistralAspectLabelerBatch:
+    """Test suite for batched labeling"""
+
+    def _labeler(self, client):
+        return MistralAspectLabeler(
+            client=client,
+            model_name="test-model",
+            prompt_template="Rules...\nNOW CLASSIFY ONLY THIS ONE ASPECT.\n\"{INSERT_ASPECT_HERE}\"",
+            logger=Mock(),
+            batch_prompt_template="Classify:\n{INSERT_ASPECTS_HERE}"
+        )
+
+    def test_label_aspects_single_request(self):
+        """Test that a batch is sent as one indexed prompt"""
+        mock_client = Mock()
+        mock_client.chat.return_value = {
+            "message": {"content": 'Sure: {"0": ["Graphics"], "1": ["Price", "Other"]}'}
+        }
+        labeler = self._labeler(mock_client)
+
+        result = labeler.label_aspects(["great graphics", "too \"expensive\""])
+
+        assert result == [["Graphics"], ["Price", "Other"]]
+        mock_client.chat.assert_called_once()
+        system, user = mock_client.chat.call_args[1]["messages"]
+        assert system == {"role": "system", "content": "Rules...\n"}
+        assert user["content"] == 'Classify:\n0: "great graphics"\n1: "too \\"expensive\\""'
+
+    def test_label_aspect_sends_instructions_as_system_message(self):
+        """Test that the static rules form a stable system prefix and warm-up sends the same prefix"""
+        mock_client = Mock()
+        mock_client.chat.return_value = {"message": {"content": '{"labels": ["Graphics"]}'}}
+        labeler = self._labeler(mock_client)
+        labeler.keep_alive = "30m"
+
+        labeler.label_aspect("great graphics")
+        labeler.warm_up()
+
+        single, warm_up = mock_client.chat.call_args_list
+        assert single[1]["messages"] == [
+            {"role": "system", "content": "Rules...\n"},
+            {"role": "user", "content": 'NOW CLASSIFY ONLY THIS ONE ASPECT.\n"great graphics"'},
+        ]
+        assert single[1]["keep_alive"] == "30m"
+        assert warm_up[1]["messages"][0] == single[1]["messages"][0]
+        assert warm_up[1]["options"]["num_predict"] == 1
+
+    @patch('review_analyzer.infrastructure.retry.time.sleep')
+    def test_warm_up_does_not_retry_unreachable_host(self, mock_sleep):
+        """Test that warm-up makes a single attempt even behind the retrying client"""
+        import httpx
+        from review_analyzer.infrastructure.retry import RetryingClient, RetryPolicy
+
+        inner = Mock()
+        inner.chat.side_effect = httpx.ConnectError("refused")
+        labeler = self._labeler(RetryingClient(inner, RetryPolicy(Mock(), attempts=4)))
+
+        labeler.warm_up()
+
+        assert inner.chat.call_count == 1
+        mock_sleep.assert_not_called()
+        labeler.logger.warning.assert_called_once()
+
+    def test_label_aspects_falls_back_for_dropped_indexes(self):
+        """Test that indexes missing from the batch answer are labeled one by one"""
+        mock_client = Mock()
+        mock_client.chat.side_effect = [
+            {"message": {"content": '{"0": ["Music"], "2": [], "7": ["Bugs"]}'}},
+            {"message": {"content": '{"labels": ["Story"]}'}},
+            {"message": {"content": '{"labels": ["Bugs"]}'}},
+        ]
+        labeler = self._labeler(mock_client)
+
+        result = labeler.label_aspects(["soundtrack", "plot", "crashes"])
+
+        assert result == [["Music"], ["Story"], ["Bugs"]]
+        assert mock_client.chat.call_count == 3
+        single_prompt = mock_client.chat.call_args_list[1][1]["messages"][-1]["content"]
+        assert single_prompt.endswith('"plot"')
+
+    def test_label_aspects_falls_back_on_invalid_json(self):
+        """Test that an unparsable batch answer falls back to single-aspect calls"""
+        mock_client = Mock()
+        mock_client.chat.side_effect = [
+            {"message": {"content": "I cannot do that"}},
+            {"message": {"content": '{"labels": ["Gameplay"]}'}},
+            {"message": {"content": '{"labels": ["Price"]}'}},
+        ]
+        labeler = self._labeler(mock_client)
+
+        result = labeler.label_aspects(["combat", "price"])
+
+        assert result == [["Gameplay"], ["Price"]]
+
+    def test_label_aspects_without_batch_prompt(self):
+        """Test that without a batch prompt every aspect gets its own call"""
+        mock_client = Mock()
+        mock_client.chat.return_value = {"message": {"content": '{"labels": ["Other"]}'}}
+        labeler = MistralAspectLabeler(mock_client, "test-model", "{INSERT_ASPECT_HERE}", Mock())
+
+        assert labeler.label_aspects(["a", "b"]) == [["Other"], ["Other"]]
+        assert mock_client.chat.call_count == 2
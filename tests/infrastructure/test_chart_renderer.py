@@ -0,0 +1,68 @@
+import os
+from pathlib import Path
+from unittest.mock import Mock
+
+import matplotlib
+
+from review_analyzer.infrastructure.chart_renderer import ChartRenderer, chart_spec, fingerprint
+
+
+def _specs(tmp_path: Path, counts=(3, 1)):
+    return [
+        chart_spec(tmp_path / "liked_label_distribution.png", "Label Distribution", x=["Music", "Story"], y=counts,
+                   figsize=(8, 5), ylabel="Count", rotate_xticks=True),
+        chart_spec(tmp_path / "liked_top_aspects_overall.png", "Top 10 Aspects Overall", x=[2, 1], y=["music", "story"],
+                   xlabel="Count"),
+    ]
+
+
+def test_renders_headless_and_skips_unchanged_charts(tmp_path: Path):
+    """Drugie rysowanie tych samych danych nic nie rysuje; zmiana danych rysuje tylko zmieniony wykres"""
+    # Arrange
+    renderer = ChartRenderer(Mock(), workers=1)
+
+    # Act
+    first = renderer.render(_specs(tmp_path), str(tmp_path))
+    mtime = os.path.getmtime(tmp_path / "liked_top_aspects_overall.png")
+    second = renderer.render(_specs(tmp_path), str(tmp_path))
+    changed = renderer.render(_specs(tmp_path, counts=(4, 1)), str(tmp_path))
+
+    # Assert
+    assert matplotlib.get_backend().lower() == "agg"
+    assert first == {"rendered": 2, "skipped": 0, "failed": 0}
+    assert second == {"rendered": 0, "skipped": 2, "failed": 0}
+    assert changed == {"rendered": 1, "skipped": 1, "failed": 0}
+    assert os.path.getmtime(tmp_path / "liked_top_aspects_overall.png") == mtime
+
+
+def test_missing_file_is_redrawn(tmp_path: Path):
+    # Arrange
+    renderer = ChartRenderer(Mock(), workers=1)
+    renderer.render(_specs(tmp_path), str(tmp_path))
+    os.remove(tmp_path / "liked_label_distribution.png")
+
+    # Act
+    stats = renderer.render(_specs(tmp_path), str(tmp_path))
+
+    # Assert
+    assert stats["rendered"] == 1
+    assert (tmp_path / "liked_label_distribution.png").exists()
+
+
+def test_fingerprint_ignores_path_only(tmp_path: Path):
+    a, b = _specs(tmp_path)[0], _specs(tmp_path / "other")[0]
+
+    assert fingerprint(a) == fingerprint(b)
+    assert fingerprint(a) != fingerprint(_specs(tmp_path, counts=(3, 2))[0])
+
+
+def test_process_pool_renders_all_charts(tmp_path: Path):
+    # Arrange
+    renderer = ChartRenderer(Mock(), workers=2)
+
+    # Act
+    stats = renderer.render(_specs(tmp_path), str(tmp_path))
+
+    # Assert
+    assert stats == {"rendered": 2, "skipped": 0, "failed": 0}
+    assert all(Path(spec["path"]).stat().st_size > 0 for spec in _specs(tmp_path))
@@ -3,7 +3,7 @@ import pandas as pd
 import tempfile
 import os
 from unittest.mock import Mock
-from review_analyzer.infrastructure.dataframe_saver import DataFrameSaverCsv
+from review_analyzer.infrastructure.dataframe_saver import DataFrameSaverCsv, DataFrameSaverParquet
 
 
 class TestDataFrameSaverCsv:
@@ -71,4 +71,71 @@ class TestDataFrameSaverCsv:
 
         saver.save(test_data, nonexistent_path)
         
-        mock_logger.warning.assert_called() 
\ No newline at end of file
+        mock_logger.warning.assert_called() 
+
+class TestDataFrameSaverParquet:
+    """Test suite for DataFrameSaverParquet"""
+
+    def test_round_trip_keeps_dtypes_and_dictionary_columns(self, tmp_path):
+        """Test that Parquet keeps types, encodes repeated text as dictionary and supports projection"""
+        import pyarrow.parquet as pq
+        from review_analyzer.infrastructure.dataframe_loader import DataFrameLoaderParquet
+
+        # Arrange
+        mock_logger = Mock()
+        path = str(tmp_path / "liked.parquet")
+        df = pd.DataFrame({
+            'appid': [1, 1, 2],
+            'recommendationid': [10, 11, 12],
+            'aspect': ['music', 'bugs', 'music'],
+            'labels': ['Music', None, 'Music'],
+        })
+
+        # Act
+        DataFrameSaverParquet(mock_logger).save(df, path)
+        full = DataFrameLoaderParquet(Mock()).load(path)
+        projected = DataFrameLoaderParquet(Mock(), columns=['aspect', 'labels'], categories=['labels']).load(path)
+
+        # Assert
+        mock_logger.info.assert_called_with("Zapisano plik: %s", path)
+        assert str(pq.read_schema(path).field('labels').type).startswith('dictionary')
+        pd.testing.assert_frame_equal(full, df)
+        assert list(projected.columns) == ['aspect', 'labels']
+        assert isinstance(projected['labels'].dtype, pd.CategoricalDtype)
+        assert projected['aspect'].tolist() == ['music', 'bugs', 'music']
+
+    def test_mixed_object_column_is_saved_as_text(self, tmp_path):
+        """Test that an object column mixing ints and strings does not lose the file"""
+        from review_analyzer.infrastructure.dataframe_loader import DataFrameLoaderParquet
+
+        path = str(tmp_path / "reviews.parquet")
+        df = pd.DataFrame({'recommendationid': [1, "2"], 'error': [None, "timeout"]})
+
+        DataFrameSaverParquet(Mock()).save(df, path)
+        loaded = DataFrameLoaderParquet(Mock()).load(path)
+
+        assert loaded['recommendationid'].tolist() == ["1", "2"]
+        assert pd.isna(loaded['error'][0])
+        assert loaded['error'][1] == "timeout"
+
+    def test_text_columns_are_dictionary_encoded(self, tmp_path):
+        """Test that aspect/labels are written as dictionary columns whatever string type pandas produces"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        path = str(tmp_path / "disliked.parquet")
+        df = pd.DataFrame({'aspect': ['bugs', 'bugs', 'lag'], 'labels': ['Bugs', 'Bugs', 'Optimization']})
+
+        DataFrameSaverParquet(Mock()).save(df, path)
+        schema = pq.read_schema(path)
+
+        assert pa.types.is_dictionary(schema.field('aspect').type)
+        assert pa.types.is_dictionary(schema.field('labels').type)
+
+    def test_save_to_nonexistent_directory(self):
+        """Test that write errors are logged, like the CSV saver"""
+        mock_logger = Mock()
+
+        DataFrameSaverParquet(mock_logger).save(pd.DataFrame({'col': ['test']}), "/nonexistent/directory/test.parquet")
+
+        mock_logger.warning.assert_called()
@@ -0,0 +1,82 @@
+from unittest.mock import Mock
+
+import pytest
+
+from review_analyzer.infrastructure.embedding_labeler import EmbeddingAspectLabeler
+
+SEEDS = {"Music": ["soundtrack", "music"], "Bugs": ["crash", "glitch"], "Price": ["price"]}
+
+# Wektory "embeddingów": kierunek zależy od słów kluczowych
+VECTORS = {
+    "soundtrack": [1, 0, 0], "music": [0.9, 0.1, 0], "crash": [0, 1, 0], "glitch": [0.1, 0.9, 0], "price": [0, 0, 1],
+    "great soundtrack": [0.95, 0.05, 0], "crashes on start": [0, 1, 0.1], "music glitch": [0.7, 0.7, 0],
+}
+
+
+def _client():
+    client = Mock()
+    client.embed.side_effect = lambda model, input: {"embeddings": [VECTORS[text] for text in input]}
+    return client
+
+
+def _labeler(client, fallback=None, margin=0.1):
+    return EmbeddingAspectLabeler(client, "embed-model", SEEDS, fallback or Mock(), Mock(), margin=margin)
+
+
+class TestEmbeddingAspectLabeler:
+    def test_classifies_by_nearest_centroid_in_one_request(self):
+        # Arrange
+        client = _client()
+        fallback = Mock()
+        labeler = _labeler(client, fallback)
+
+        # Act
+        labels = labeler.label_aspects(["great soundtrack", "crashes on start"])
+
+        # Assert
+        assert labels == [["Music"], ["Bugs"]]
+        assert client.embed.call_count == 2  # centroidy + jeden wsad aspektów
+        fallback.label_aspects.assert_not_called()
+        assert labeler.stats == {"embedded": 2, "fallback": 0}
+
+    def test_ambiguous_aspect_goes_to_llm_fallback(self):
+        # Arrange
+        fallback = Mock()
+        fallback.label_aspects.return_value = [["Music", "Bugs"]]
+        labeler = _labeler(_client(), fallback)
+
+        # Act
+        labels = labeler.label_aspects(["great soundtrack", "music glitch"])
+
+        # Assert
+        assert labels == [["Music"], ["Music", "Bugs"]]
+        fallback.label_aspects.assert_called_once_with(["music glitch"])
+        assert labeler.stats == {"embedded": 1, "fallback": 1}
+
+    def test_embedding_error_falls_back_for_whole_batch(self):
+        # Arrange
+        client = Mock()
+        client.embed.side_effect = ConnectionError("down")
+        fallback = Mock()
+        fallback.label_aspects.return_value = [["Other"]]
+        labeler = _labeler(client, fallback)
+
+        # Act
+        labels = labeler.label_aspect("anything")
+
+        # Assert
+        assert labels == ["Other"]
+        fallback.label_aspects.assert_called_once_with(["anything"])
+
+    def test_centroids_are_built_once(self):
+        # Arrange
+        client = _client()
+        labeler = _labeler(client)
+
+        # Act
+        labeler.label_aspect("great soundtrack")
+        labeler.label_aspect("crashes on start")
+
+        # Assert
+        assert client.embed.call_count == 3
+        assert client.embed.call_args_list[0].kwargs["input"] == ["soundtrack", "music", "crash", "glitch", "price"]
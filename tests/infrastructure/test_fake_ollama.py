@@ -0,0 +1,74 @@
+import json
+import threading
+import time
+import pytest
+from ollama import Client, ResponseError
+
+from review_analyzer.infrastructure.aspect_labeler import LABEL_CATEGORIES, LABEL_SCHEMA, LABELS_SCHEMA
+from review_analyzer.infrastructure.fake_ollama import FakeOllamaBackend, FakeOllamaClient, serve_fake_ollama
+from review_analyzer.infrastructure.mistral_extractor import EXTRACT_SCHEMA
+
+
+def test_fake_client_answers_with_schema_conforming_json():
+    """Test that single and batched schemas get parseable answers with Ollama's counters"""
+    client = FakeOllamaClient(FakeOllamaBackend(latency=0.0))
+    batch_schema = {"type": "object", "properties": {"0": LABELS_SCHEMA, "1": LABELS_SCHEMA}, "required": ["0", "1"]}
+
+    extraction = client.chat(model="m", messages=[{"role": "user", "content": "x" * 400}], format=EXTRACT_SCHEMA)
+    label = json.loads(client.chat(model="m", messages=[], format=LABEL_SCHEMA)["message"]["content"])
+    batch = json.loads(client.chat(model="m", messages=[], format=batch_schema)["message"]["content"])
+
+    assert set(json.loads(extraction["message"]["content"])) == {"liked", "disliked"}
+    assert extraction["prompt_eval_count"] == 100
+    assert label["labels"][0] in LABEL_CATEGORIES
+    assert set(batch) == {"0", "1"}
+    assert len(client.embed(model="m", input=["a", "b"])["embeddings"]) == 2
+
+
+@pytest.mark.parametrize("distribution", FakeOllamaBackend.DISTRIBUTIONS)
+def test_latency_distributions_have_requested_mean(distribution):
+    backend = FakeOllamaBackend(latency=0.1, distribution=distribution, per_item=0.05, seed=1)
+
+    samples = [backend.sample_latency() for _ in range(4000)]
+
+    assert sum(samples) / len(samples) == pytest.approx(0.1, rel=0.1)
+
+
+def test_batch_items_add_per_item_latency():
+    backend = FakeOllamaBackend(latency=0.1, distribution="constant", per_item=0.05)
+
+    assert backend.sample_latency(items=3) == pytest.approx(0.2)
+
+
+def test_slots_limit_parallel_requests():
+    """Test that requests beyond the slot count queue up"""
+    backend = FakeOllamaBackend(latency=0.05, distribution="constant", slots=2)
+    client = FakeOllamaClient(backend)
+    threads = [threading.Thread(target=client.chat, kwargs={"model": "m", "messages": []}) for _ in range(4)]
+
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert time.perf_counter() - start >= 0.1
+    assert backend.stats["max_queue"] == 2
+
+
+def test_error_rate_and_http_stub():
+    """Test that simulated overload reaches a real ollama.Client through the stub server as a 503"""
+    backend = FakeOllamaBackend(latency=0.0, error_rate=1.0)
+    server = serve_fake_ollama(backend)
+    try:
+        client = Client(host=f"http://127.0.0.1:{server.server_port}")
+        with pytest.raises(ResponseError) as error:
+            client.chat(model="m", messages=[])
+        backend.error_rate = 0.0
+        response = client.chat(model="m", messages=[], format=EXTRACT_SCHEMA)
+    finally:
+        server.shutdown()
+
+    assert error.value.status_code == 503
+    assert "liked" in json.loads(response["message"]["content"])
+    assert backend.stats == {"requests": 2, "errors": 1, "max_queue": 0}
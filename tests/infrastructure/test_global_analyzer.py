@@ -0,0 +1,84 @@
+import json
+
+import pandas as pd
+
+from review_analyzer.infrastructure.global_analyzer import GlobalAspectAnalyzer
+from review_analyzer.presentation.benchmark_analysis import legacy_label_sections, synthetic_labeled
+
+
+def test_label_sections_match_iterrows_version():
+    """Wynik wektorowy jest identyczny z wersją na iterrows, łącznie z kolejnością kluczy"""
+    # Arrange
+    data = synthetic_labeled(5000, aspects=300, seed=3)
+
+    # Act
+    results = GlobalAspectAnalyzer().analyze_data(data)
+    expected = legacy_label_sections(data)
+
+    # Assert
+    assert results["multi_label_aspects_count"] > 10
+    for key, value in expected.items():
+        assert json.dumps(results[key]) == json.dumps(value)
+
+
+def test_ties_keep_first_appearance_order():
+    # Arrange
+    data = pd.DataFrame({
+        "recommendationid": [1, 1, 2, 2, 3, 3],
+        "aspect": ["story", "music", "music", "story", "price", "story"],
+        "labels": ["Story", "Audio", "Audio", "Story", "Price", "Audio"],
+    })
+
+    # Act
+    results = GlobalAspectAnalyzer().analyze_data(data)
+
+    # Assert
+    assert list(results["top_aspects_per_label"]) == ["Story", "Audio", "Price"]
+    assert list(results["top_aspects_per_label"]["Audio"].items()) == [("music", 2), ("story", 1)]
+    assert results["multi_label_aspects_count"] == 1
+    assert sorted(results["multi_label_aspects_sample"]["story"]) == ["Audio", "Story"]
+
+
+def test_merged_batch_states_equal_full_analysis():
+    """Stany wsadów (po zapisie do JSON) scalone w dowolnym podziale dają to samo podsumowanie"""
+    # Arrange
+    data = synthetic_labeled(4000, aspects=200, seed=7).sort_values("recommendationid", kind="stable")
+    reviews = data["recommendationid"].unique()
+    batches = [data[data["recommendationid"].isin(part)] for part in (reviews[:500], reviews[500:510], reviews[510:])]
+    analyzer = GlobalAspectAnalyzer()
+
+    # Act
+    state = analyzer.empty_state()
+    for batch in batches:
+        state = analyzer.merge_states(state, json.loads(json.dumps(analyzer.partial_state(batch))))
+    merged = analyzer.summarize(state)
+    expected = GlobalAspectAnalyzer().analyze_data(data)
+
+    # Assert
+    assert json.dumps(merged) == json.dumps(expected)
+
+
+def test_state_is_keyed_and_merge_touches_only_delta_keys():
+    """Stan rośnie z liczbą różnych par, nie wierszy; scalenie dopisuje przyrost w miejscu"""
+    # Arrange
+    analyzer = GlobalAspectAnalyzer()
+    batch = pd.DataFrame({
+        "recommendationid": [1, 1, 2],
+        "aspect": ["music", "story", "music"],
+        "labels": ["Audio", "Story", "Audio"],
+    })
+    delta = pd.DataFrame({"recommendationid": [3], "aspect": ["price"], "labels": ["Price"]})
+    state = analyzer.empty_state()
+    for _ in range(3):
+        state = analyzer.update_state(state, batch)
+    untouched = state["label_aspects"]["Audio"]
+
+    # Act
+    merged = analyzer.update_state(state, delta)
+
+    # Assert
+    assert merged is state
+    assert merged["rows"] == 10
+    assert merged["label_aspects"] == {"Audio": {"music": 6}, "Story": {"story": 3}, "Price": {"price": 1}}
+    assert merged["aspect_labels"]["music"] == {"Audio": 6}
+    assert merged["label_aspects"]["Audio"] is untouched
@@ -3,7 +3,7 @@ import os
 import json
 import tempfile
 
-from review_analyzer.infrastructure.json_loader import JsonReviewLoader
+from review_analyzer.infrastructure.json_loader import JsonReviewLoader, _JsonArrayStream
 
 
 def test_load_reviews_basic():
@@ -58,3 +58,47 @@ def test_filter_by_language():
 
         assert len(reviews) == 1
         assert reviews[0].language == "english"
+
+
+def test_iter_reviews_streams_in_small_chunks():
+    mock_data = {
+        "success": 1,
+        "query_summary": {"num_reviews": 3, "nested": [1, {"a": "]}"}]},
+        "reviews": [
+            {"language": "english", "review": "Great {game}, \"really\"", "votes_funny": 12345, "voted_up": True, "recommendationid": 1},
+            {"language": "polish", "review": "Super gra", "votes_funny": 1, "voted_up": False, "recommendationid": 2},
+            {"language": "english", "review": "ok", "votes_funny": 0, "voted_up": True, "recommendationid": 3},
+        ],
+        "cursor": "abc"
+    }
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        filepath = os.path.join(temp_dir, "555_123.json")
+        with open(filepath, "w", encoding="utf-8") as f:
+            json.dump(mock_data, f, indent=2)
+
+        loader = JsonReviewLoader(filepath, Mock())
+        with open(filepath, "r", encoding="utf-8") as f:
+            items = list(_JsonArrayStream(f, chunk_size=7).iter_items("reviews"))
+        reviews = list(loader.iter_reviews(language="english"))
+
+    assert items == mock_data["reviews"]
+    assert [r.recommendationid for r in reviews] == [1, 3]
+    assert reviews[0].review == "Great {game}, \"really\""
+    assert reviews[0].votes_funny == 12345
+
+
+def test_iter_reviews_is_lazy():
+    mock_data = {"reviews": [{"language": "english", "review": "a", "recommendationid": i} for i in range(5)]}
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        filepath = os.path.join(temp_dir, "555_123.json")
+        with open(filepath, "w", encoding="utf-8") as f:
+            json.dump(mock_data, f)
+
+        loader = JsonReviewLoader(filepath, Mock())
+        stream = loader.iter_reviews()
+        first = next(stream)
+        stream.close()
+
+    assert first.recommendationid == 0
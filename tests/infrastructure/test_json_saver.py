@@ -44,6 +44,44 @@ class TestJsonlSaver:
         finally:
             os.unlink(output_path)
 
+    def test_incremental_write_and_append(self, tmp_path):
+        """Test that open/write/close appends results line by line"""
+        output_path = str(tmp_path / "out.jsonl")
+        saver = JsonlSaver(output_path, Mock(), flush_every=1)
+
+        with saver.open():
+            saver.write({"recommendationid": 1})
+            # flush_every=1 - wynik jest na dysku przed zamknięciem
+            with open(output_path, encoding="utf-8") as f:
+                assert f.read() == '{"recommendationid": 1}\n'
+
+        with saver.open(append=True):
+            saver.write({"recommendationid": 2})
+
+        with open(output_path, encoding="utf-8") as f:
+            assert [json.loads(line)["recommendationid"] for line in f] == [1, 2]
+
+    def test_finished_ids_drops_truncated_last_line(self, tmp_path):
+        """Test reading finished ids from an output interrupted mid-write"""
+        output_path = tmp_path / "out.jsonl"
+        output_path.write_text(
+            '{"recommendationid": 1, "liked": []}\n'
+            '{"recommendationid": "2", "error": "json_decode"}\n'
+            '{"recommendationid": 3, "lik',
+            encoding="utf-8"
+        )
+        saver = JsonlSaver(str(output_path), Mock())
+
+        done = saver.finished_ids()
+
+        assert done == {"1", "2"}
+        assert output_path.read_text(encoding="utf-8").endswith('"json_decode"}\n')
+
+    def test_finished_ids_missing_file(self, tmp_path):
+        """Test that a missing output means nothing is finished"""
+        saver = JsonlSaver(str(tmp_path / "missing.jsonl"), Mock())
+        assert saver.finished_ids() == set()
+
 
 class TestJsonSaver:
     """Test suite for JsonSaver"""
@@ -93,3 +131,32 @@ class TestJsonSaver:
                 assert loaded_data == test_data
         finally:
             os.unlink(filepath)
+
+
+def test_error_rows_and_replace_patch_file_in_place(tmp_path):
+    """Test that failed rows are read back and replaced without touching the others"""
+    # Arrange
+    from review_analyzer.infrastructure.json_saver import JsonlPatchSaver
+    from review_analyzer.infrastructure.error_rows_loader import ErrorRowsReviewLoader
+
+    output_path = str(tmp_path / "out.jsonl")
+    rows = [
+        {"appid": 1, "recommendationid": 10, "liked": ["a"], "disliked": [], "original_review": "ok"},
+        {"appid": 1, "recommendationid": 11, "liked": [], "disliked": [], "original_review": "boom", "error": "timeout"},
+        {"appid": 1, "recommendationid": 12, "liked": [], "disliked": ["b"], "original_review": "fine"},
+    ]
+    JsonlSaver(output_path, Mock()).save(rows)
+    saver = JsonlPatchSaver(output_path, Mock())
+
+    # Act
+    reviews = ErrorRowsReviewLoader(saver, Mock()).load_reviews("english")
+    saver.save([{"appid": 1, "recommendationid": 11, "liked": ["c"], "disliked": [], "original_review": "boom"}])
+
+    # Assert
+    assert [(r.recommendationid, r.review, r.language) for r in reviews] == [(11, "boom", "english")]
+    with open(output_path, encoding="utf-8") as f:
+        patched = [json.loads(line) for line in f]
+    assert [row["recommendationid"] for row in patched] == [10, 11, 12]
+    assert patched[1] == {"appid": 1, "recommendationid": 11, "liked": ["c"], "disliked": [], "original_review": "boom"}
+    assert saver.error_rows() == []
+    assert not os.path.exists(output_path + ".tmp")
@@ -0,0 +1,56 @@
+from unittest.mock import Mock
+
+import pytest
+
+from review_analyzer.config import PATHS
+from review_analyzer.infrastructure.lexicon_classifier import LexiconAspectClassifier
+
+LEXICON = {
+    "Optimization": {"keywords": ["fps", "lag"], "patterns": [r"\bframe ?drops?\b"]},
+    "Music": {"keywords": ["soundtrack"]},
+    "Price": {"keywords": ["price"]},
+    "Bugs": {"keywords": ["crash", "crashes"]},
+}
+
+
+class TestLexiconAspectClassifier:
+    @pytest.mark.parametrize("aspect, expected", [
+        ("fps drops", ["Optimization"]),
+        ("Horrible FRAMEDROPS", ["Optimization"]),
+        ("horrible frame drops", ["Optimization"]),
+        ("amazing Soundtrack", ["Music"]),
+        ("fair price", ["Price"]),
+        ("fps drops and frame drops", ["Optimization"]),
+        ("lag and crashes", None),  # kilka kategorii — decyduje model
+        ("fun combat", None),
+        ("flagship", None),  # granice słów — "lag" nie pasuje w środku wyrazu
+    ])
+    def test_classify(self, aspect, expected):
+        classifier = LexiconAspectClassifier(LEXICON, Mock())
+
+        assert classifier.classify(aspect) == expected
+
+    def test_several_categories_are_uncertain(self):
+        classifier = LexiconAspectClassifier(LEXICON, Mock())
+
+        assert classifier.classify("price, soundtrack and lag") is None
+
+    def test_shipped_lexicon_labels_prompt_examples(self):
+        classifier = LexiconAspectClassifier.from_file(PATHS["label_lexicon"], Mock())
+
+        assert classifier.classify("frequent crashes") == ["Bugs"]
+        assert classifier.classify("amazing soundtrack") == ["Music"]
+        assert classifier.classify("long loading times") == ["Optimization"]
+        assert classifier.classify("too expensive for what it offers") == ["Price"]
+        assert classifier.classify("regular updates") == ["Updates"]
+        assert classifier.classify("patches constantly fix bugs") is None
+        assert classifier.classify("cheap graphics") == ["Graphics"]
+
+    @pytest.mark.parametrize("aspect", [
+        "server lag", "dead servers", "voice acting performance", "devs ignore the community", "laggy menus",
+    ])
+    def test_shipped_lexicon_leaves_ambiguous_words_to_the_model(self, aspect):
+        classifier = LexiconAspectClassifier.from_file(PATHS["label_lexicon"], Mock())
+
+        assert classifier.classify(aspect) is None
+        assert classifier.classify("toxic community") is None
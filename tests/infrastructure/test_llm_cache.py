@@ -0,0 +1,53 @@
+from unittest.mock import Mock
+from pathlib import Path
+
+from review_analyzer.infrastructure.llm_cache import SqliteResponseCache
+
+
+def test_get_put_and_counters(tmp_path: Path):
+    cache = SqliteResponseCache(str(tmp_path / "cache.sqlite"), Mock())
+    key = cache.make_key("model", "prompt {X}", "review", {"temperature": 0.15})
+
+    assert cache.get(key) is None
+    cache.put(key, '{"liked": []}')
+    assert cache.get(key) == '{"liked": []}'
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_ratio"] == 0.5
+
+
+def test_key_depends_on_every_part():
+    base = SqliteResponseCache.make_key("m", "p", "t", {"temperature": 0.15})
+
+    assert base == SqliteResponseCache.make_key("m", "p", "t", {"temperature": 0.15})
+    assert base != SqliteResponseCache.make_key("m2", "p", "t", {"temperature": 0.15})
+    assert base != SqliteResponseCache.make_key("m", "p2", "t", {"temperature": 0.15})
+    assert base != SqliteResponseCache.make_key("m", "p", "t2", {"temperature": 0.15})
+    assert base != SqliteResponseCache.make_key("m", "p", "t", {"temperature": 0.5})
+
+
+def test_persists_between_instances(tmp_path: Path):
+    db_path = str(tmp_path / "cache.sqlite")
+    cache = SqliteResponseCache(db_path, Mock())
+    cache.put("k", "value")
+    cache.close()
+
+    reopened = SqliteResponseCache(db_path, Mock())
+    assert reopened.get("k") == "value"
+    assert reopened.stats()["size_bytes"] == 5
+
+
+def test_size_based_eviction_drops_least_recently_used(tmp_path: Path):
+    cache = SqliteResponseCache(str(tmp_path / "cache.sqlite"), Mock(), max_bytes=10)
+
+    cache.put("a", "12345")
+    cache.put("b", "12345")
+    cache.get("a")  # "a" staje się świeższe niż "b"
+    cache.put("c", "12345")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "12345"
+    assert cache.get("c") == "12345"
+    assert cache.stats()["size_bytes"] == 10
@@ -0,0 +1,55 @@
+from unittest.mock import Mock
+import json
+from pathlib import Path
+
+from review_analyzer.infrastructure.multi_dump_loader import MultiDumpReviewLoader, is_multi_source
+
+
+def _write_dump(directory: Path, name: str, reviews: list):
+    path = directory / name
+    path.write_text(json.dumps({"reviews": reviews}), encoding="utf-8")
+    return path
+
+
+def _review(rid, text="ok", language="english"):
+    return {"recommendationid": rid, "review": text, "language": language, "votes_funny": 0, "voted_up": True}
+
+
+def test_groups_by_appid_and_deduplicates(tmp_path: Path):
+    _write_dump(tmp_path, "100_20250101.json", [_review(1, "old"), _review(2)])
+    _write_dump(tmp_path, "100_20250201.json", [_review(1, "new"), _review(3)])
+    _write_dump(tmp_path, "200_20250101.json", [_review(1), _review(4, language="polish")])
+    (tmp_path / "notes.json").write_text("{}", encoding="utf-8")
+
+    mock_logger = Mock()
+    loader = MultiDumpReviewLoader(str(tmp_path), mock_logger)
+
+    assert loader.appids() == [100, 200]
+
+    reviews_100 = loader.for_appid(100).load_reviews("english")
+    assert sorted(r.recommendationid for r in reviews_100) == [1, 2, 3]
+    # Przy duplikacie wygrywa najnowszy zrzut
+    assert next(r for r in reviews_100 if r.recommendationid == 1).review == "new"
+
+    reviews_200 = loader.for_appid(200).load_reviews("english")
+    assert [(r.appid, r.recommendationid) for r in reviews_200] == [(200, 1)]
+
+    assert len(loader.load_reviews()) == 5
+    mock_logger.warning.assert_called_once()
+
+
+def test_accepts_glob_pattern(tmp_path: Path):
+    _write_dump(tmp_path, "100_20250101.json", [_review(1)])
+    _write_dump(tmp_path, "200_20250101.json", [_review(2)])
+
+    loader = MultiDumpReviewLoader(str(tmp_path / "100_*.json"), Mock())
+
+    assert loader.appids() == [100]
+
+
+def test_is_multi_source(tmp_path: Path):
+    single = _write_dump(tmp_path, "100_20250101.json", [])
+
+    assert is_multi_source(tmp_path)
+    assert is_multi_source(str(tmp_path / "*.json"))
+    assert not is_multi_source(single)
@@ -0,0 +1,124 @@
+import asyncio
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import Mock
+
+import pytest
+from ollama import ResponseError
+
+from review_analyzer.infrastructure.ollama_pool import AsyncOllamaClientPool, OllamaClientPool, parse_hosts
+
+
+def _stub_server(name):
+    '''Lokalny serwer udający /api/chat Ollamy — odpowiada nazwą hosta.'''
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers["Content-Length"]))
+            body = json.dumps({"model": "m", "message": {"role": "assistant", "content": name}, "done": True}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def _dead_host():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{s.getsockname()[1]}"
+
+
+@pytest.fixture
+def stub_hosts():
+    servers = [_stub_server(name) for name in ("a", "b")]
+    yield [url for _, url in servers]
+    for server, _ in servers:
+        server.shutdown()
+
+
+def test_parse_hosts_reads_weights():
+    assert parse_hosts("http://a:1=2, http://b:1,") == [("http://a:1", 2.0), ("http://b:1", 1.0)]
+    assert parse_hosts("") == []
+
+
+def test_pool_spreads_requests_over_stub_servers(stub_hosts):
+    pool = OllamaClientPool(stub_hosts, Mock())
+
+    answers = [pool.chat(model="m", messages=[])["message"]["content"] for _ in range(4)]
+
+    assert sorted(answers) == ["a", "a", "b", "b"]
+
+
+def test_pool_ejects_dead_host_and_fails_over(stub_hosts):
+    logger = Mock()
+    dead = _dead_host()
+    pool = OllamaClientPool([dead] + stub_hosts, logger, eject_seconds=60)
+
+    answers = [pool.chat(model="m", messages=[])["message"]["content"] for _ in range(3)]
+
+    assert all(answer in ("a", "b") for answer in answers)
+    stats = pool.stats()
+    assert stats[dead]["requests"] == 1
+    assert stats[dead]["failures"] == 1
+    logger.warning.assert_called_once()
+
+
+def test_pool_prefers_least_loaded_host_by_weight():
+    clients = {}
+
+    def factory(host):
+        clients[host] = Mock()
+        return clients[host]
+
+    pool = OllamaClientPool([("a", 2.0), ("b", 1.0)], Mock(), client_factory=factory)
+
+    picked = [pool._acquire(set()).url for _ in range(6)]
+
+    # Waga 2 — host "a" dostaje dwa razy więcej żądań w locie
+    assert picked.count("a") == 4 and picked.count("b") == 2
+
+
+def test_pool_does_not_eject_on_client_error():
+    client = Mock()
+    client.chat.side_effect = ResponseError("model not found", 404)
+    pool = OllamaClientPool(["a", "b"], Mock(), client_factory=lambda host: client)
+
+    with pytest.raises(ResponseError):
+        pool.chat(model="m", messages=[])
+
+    assert client.chat.call_count == 1
+    assert all(s["failures"] == 0 and s["in_flight"] == 0 for s in pool.stats().values())
+
+
+@pytest.mark.parametrize("error", [TypeError("unexpected keyword argument 'fromat'"), json.JSONDecodeError("bad", "x", 0)])
+def test_pool_keeps_host_on_local_error(error):
+    """Błąd po naszej stronie zgłaszany od razu — host zostaje w puli, bez prób na pozostałych"""
+    client = Mock()
+    client.chat.side_effect = error
+    logger = Mock()
+    pool = OllamaClientPool(["a", "b"], logger, client_factory=lambda host: client)
+
+    with pytest.raises(type(error)):
+        pool.chat(model="m", messages=[])
+
+    assert client.chat.call_count == 1
+    assert all(s["failures"] == 0 and s["in_flight"] == 0 for s in pool.stats().values())
+    assert all(h.ejected_until == 0.0 for h in pool.hosts)
+    logger.warning.assert_not_called()
+
+
+def test_async_pool_fails_over(stub_hosts):
+    pool = AsyncOllamaClientPool([_dead_host(), stub_hosts[0]], Mock())
+
+    response = asyncio.run(pool.chat(model="m", messages=[]))
+
+    assert response["message"]["content"] == "a"
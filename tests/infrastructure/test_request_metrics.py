@@ -0,0 +1,67 @@
+import json
+from unittest.mock import Mock
+
+import pytest
+from ollama import ChatResponse
+
+from review_analyzer.infrastructure.request_metrics import RequestMetrics
+
+
+def _response(prompt_tokens=100, eval_tokens=50, load_ns=1_000_000):
+    return {
+        "message": {"content": "{}"},
+        "prompt_eval_count": prompt_tokens,
+        "eval_count": eval_tokens,
+        "prompt_eval_duration": 250_000_000,
+        "eval_duration": 500_000_000,
+        "load_duration": load_ns,
+        "total_duration": 1_000_000_000,
+    }
+
+
+def test_summary_aggregates_tokens_latency_and_load_stalls():
+    """Test that token throughput, prompt share, load stalls and percentiles come from the recorded counters"""
+    # Arrange
+    metrics = RequestMetrics("extraction", Mock())
+    for i in range(99):
+        metrics.record(_response(), latency=1.0)
+    metrics.record(_response(load_ns=5_000_000_000), latency=11.0, kind="batch")
+
+    # Act
+    summary = metrics.summary()
+
+    # Assert
+    assert summary["requests"] == 100
+    assert summary["by_kind"] == {"single": 99, "batch": 1}
+    assert summary["eval_tokens"] == 5000
+    assert summary["eval_tokens_per_sec"] == pytest.approx(100.0)
+    assert summary["prompt_tokens_per_sec"] == pytest.approx(400.0)
+    assert summary["prompt_share"] == pytest.approx(0.25)
+    assert summary["load_stalls"] == 1
+    assert summary["latency_seconds"]["p50"] == pytest.approx(1.0)
+    assert summary["latency_seconds"]["max"] == pytest.approx(11.0)
+    assert 1.0 <= summary["latency_seconds"]["p99"] <= 11.0
+
+
+def test_record_reads_ollama_response_objects_and_tolerates_missing_counters():
+    metrics = RequestMetrics("labeling", Mock())
+
+    metrics.record(ChatResponse(model="m", message={"role": "assistant", "content": "{}"}, eval_count=7), latency=0.5)
+    metrics.record(Mock(), latency=0.5)
+
+    assert [row["eval_count"] for row in metrics.requests] == [7, None]
+    assert metrics.summary()["eval_tokens"] == 7
+
+
+def test_save_merges_stages_into_one_file(tmp_path):
+    path = tmp_path / "request_metrics.json"
+    extraction, labeling = RequestMetrics("extraction", Mock()), RequestMetrics("labeling", Mock())
+    extraction.record(_response(), latency=2.0)
+
+    extraction.save(path)
+    labeling.save(path)
+
+    saved = json.loads(path.read_text(encoding="utf-8"))
+    assert set(saved) == {"extraction", "labeling"}
+    assert saved["extraction"]["latency_seconds"]["p95"] == pytest.approx(2.0)
+    assert saved["labeling"]["requests"] == 0
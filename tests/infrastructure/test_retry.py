@@ -0,0 +1,79 @@
+import asyncio
+from unittest.mock import AsyncMock, Mock, patch
+
+import httpx
+import pytest
+from ollama import ResponseError
+
+from review_analyzer.infrastructure.retry import AsyncRetryingClient, RetryingClient, RetryPolicy
+
+
+@pytest.mark.parametrize("error, transient", [
+    (httpx.ConnectError("refused"), True),
+    (httpx.ReadTimeout("timed out"), True),
+    (ConnectionError("ollama down"), True),
+    (ResponseError("overloaded", 503), True),
+    (ResponseError("too many requests", 429), True),
+    (ResponseError("model not found", 404), False),
+    (ValueError("bad json"), False),
+])
+def test_is_transient(error, transient):
+    assert RetryPolicy.is_transient(error) is transient
+
+
+def test_delay_has_full_jitter_capped_by_max_delay():
+    policy = RetryPolicy(Mock(), base_delay=1.0, max_delay=5.0)
+
+    delays = [policy.delay(10) for _ in range(200)]
+
+    assert all(0 <= d <= 5.0 for d in delays)
+    assert len(set(delays)) > 1
+
+
+@patch('review_analyzer.infrastructure.retry.time.sleep')
+def test_retrying_client_retries_transient_errors(mock_sleep):
+    """Test that a restarted server is retried with backoff until it answers"""
+    # Arrange
+    logger = Mock()
+    client = Mock()
+    client.chat.side_effect = [httpx.ConnectError("refused"), ResponseError("restarting", 502), {"message": {"content": "ok"}}]
+    retrying = RetryingClient(client, RetryPolicy(logger, attempts=4))
+
+    # Act
+    response = retrying.chat(model="m", messages=[])
+
+    # Assert
+    assert response["message"]["content"] == "ok"
+    assert client.chat.call_count == 3
+    assert mock_sleep.call_count == 2
+    assert retrying.policy.retries == 2
+    assert logger.warning.call_count == 2
+
+
+@patch('review_analyzer.infrastructure.retry.time.sleep')
+def test_retrying_client_gives_up(mock_sleep):
+    """Test that permanent errors fail at once and transient ones after the last attempt"""
+    client = Mock()
+    client.chat.side_effect = ResponseError("model not found", 404)
+    client.embed.side_effect = httpx.ReadTimeout("timed out")
+    retrying = RetryingClient(client, RetryPolicy(Mock(), attempts=3))
+
+    with pytest.raises(ResponseError):
+        retrying.chat(model="m", messages=[])
+    with pytest.raises(httpx.ReadTimeout):
+        retrying.embed(model="m", input=["x"])
+
+    assert client.chat.call_count == 1
+    assert client.embed.call_count == 3
+    assert mock_sleep.call_count == 2
+
+
+def test_async_retrying_client_retries():
+    client = Mock()
+    client.chat = AsyncMock(side_effect=[ConnectionError("down"), {"message": {"content": "ok"}}])
+    retrying = AsyncRetryingClient(client, RetryPolicy(Mock(), base_delay=0.0))
+
+    response = asyncio.run(retrying.chat(model="m", messages=[]))
+
+    assert response["message"]["content"] == "ok"
+    assert client.chat.await_count == 2
@@ -104,3 +104,17 @@ def test_full_review_analyzer_run(liked_df, disliked_df, error_df):
     assert "disliked_analysis" in result
     assert "error_analysis" in result
     os.remove(output_path)
+
+
+def test_incremental_states_equal_full_analysis(liked_df, disliked_df, error_df):
+    """Scalone stany kolejnych wsadów dają to samo podsumowanie co analiza całości"""
+    for analyzer, first, second in (
+        (ValidReviewAspectAnalyzer(label="liked"), liked_df, disliked_df),
+        (ErrorReviewAnalyzer(), error_df, error_df.assign(recommendationid=["g", "h"], error=["Timeout", None])),
+    ):
+        state = analyzer.update_state(analyzer.empty_state(), first)
+        state = analyzer.update_state(json.loads(json.dumps(state)), second)
+
+        expected = analyzer.analyze_data(pd.concat([first, second], ignore_index=True))
+
+        assert json.dumps(analyzer.summarize(state)) == json.dumps(expected)
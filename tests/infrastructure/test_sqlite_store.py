@@ -0,0 +1,115 @@
+import json
+from pathlib import Path
+from unittest.mock import Mock
+
+import pandas as pd
+
+from review_analyzer.infrastructure.sentence_loader import SentenceLoader
+from review_analyzer.infrastructure.sqlite_store import SqliteResultStore
+
+ROWS = [
+    {"appid": 10, "recommendationid": "1", "liked": ["fun gameplay", "music"], "disliked": ["bugs"], "original_review": "Great"},
+    {"appid": 10, "recommendationid": "2", "liked": [], "disliked": [], "original_review": "Meh"},
+    {"appid": 20, "recommendationid": "3", "liked": [], "disliked": [], "original_review": "Broken", "error": "timeout"},
+]
+
+
+def _store(tmp_path: Path, batch_size: int = 2) -> SqliteResultStore:
+    return SqliteResultStore(str(tmp_path / "results.sqlite"), Mock(), batch_size=batch_size)
+
+
+def test_writes_in_batches_and_resumes(tmp_path: Path):
+    """Wiersze z write trafiają do bazy wsadami; finished_ids widzi je po ponownym otwarciu"""
+    # Arrange
+    store = _store(tmp_path).open()
+
+    # Act
+    for row in ROWS:
+        store.write(row)
+    in_flight = _store(tmp_path).finished_ids()
+    store.close()
+
+    # Assert
+    assert in_flight == {"1", "2"}  # pełny wsad zapisany, trzeci wiersz czeka w buforze
+    assert _store(tmp_path).finished_ids() == {"1", "2", "3"}
+
+
+def test_open_without_append_clears_previous_run(tmp_path: Path):
+    # Arrange
+    store = _store(tmp_path)
+    store.save(ROWS)
+
+    # Act
+    store.open(append=False).close()
+    appended = _store(tmp_path)
+    appended.save(ROWS[:1])
+    appended.open(append=True).close()
+
+    # Assert
+    assert _store(tmp_path).finished_ids() == {"1"}
+
+
+def test_load_dataframes_matches_sentence_loader(tmp_path: Path):
+    """Ramki z bazy są takie same jak z pliku JSONL"""
+    # Arrange
+    jsonl_path = tmp_path / "output.jsonl"
+    jsonl_path.write_text("\n".join(json.dumps(row) for row in ROWS), encoding="utf-8")
+    store = _store(tmp_path)
+    store.save(ROWS)
+
+    # Act
+    expected = SentenceLoader(str(jsonl_path), Mock()).load_dataframes()
+    actual = store.load_dataframes()
+
+    # Assert
+    for expected_df, actual_df in zip(expected, actual):
+        pd.testing.assert_frame_equal(actual_df.reset_index(drop=True), expected_df.reset_index(drop=True), check_dtype=False)
+
+
+def test_load_dataframes_filters_by_appid(tmp_path: Path):
+    # Arrange
+    store = _store(tmp_path)
+    store.save(ROWS)
+
+    # Act
+    reviews, liked, disliked = store.load_dataframes(appid=20)
+
+    # Assert
+    assert reviews["recommendationid"].tolist() == ["3"]
+    assert liked.empty and disliked.empty
+
+
+def test_replace_updates_error_rows_and_aspects(tmp_path: Path):
+    """Ponowne przetworzenie podmienia wiersz z błędem razem z jego aspektami"""
+    # Arrange
+    store = _store(tmp_path)
+    store.save(ROWS)
+    errors = store.error_rows()
+
+    # Act
+    store.replace([{**errors[0], "liked": ["stable servers"], "error": None}])
+
+    # Assert
+    assert [row["recommendationid"] for row in errors] == ["3"]
+    assert store.error_rows() == []
+    _, liked, _ = store.load_dataframes(appid=20)
+    assert liked["aspect"].tolist() == ["stable servers"]
+    assert len(store.finished_ids()) == 3
+
+
+def test_labels_round_trip_and_use_indexes(tmp_path: Path):
+    # Arrange
+    store = _store(tmp_path)
+    labeled = pd.DataFrame({"appid": pd.Series([10, 10], dtype="int64"), "recommendationid": ["1", "1"],
+                            "aspect": ["fun gameplay", "music"], "labels": ["Gameplay", None]})
+
+    # Act
+    store.save_labels("liked", labeled)
+    store.save_labels("liked", labeled.iloc[:1])
+    loaded = store.load_labels("liked", appid=10)
+    plan = store.query("EXPLAIN QUERY PLAN SELECT * FROM labels WHERE recommendationid = ?", ("1",))
+
+    # Assert
+    assert loaded.to_dict("records") == [{"appid": 10, "recommendationid": "1", "aspect": "fun gameplay", "labels": "Gameplay"}]
+    assert store.load_labels("disliked").empty
+    assert "idx_labels_recommendationid" in plan["detail"].iloc[0]
@@ -1,5 +1,6 @@
-from unittest.mock import MagicMock, Mock
+from unittest.mock import MagicMock, Mock, patch
 from review_analyzer.infrastructure.mistral_extractor import MistralSentimentAspectExtractor
+from review_analyzer.infrastructure.llm_cache import SqliteResponseCache
 
 def test_extractor_parses_response():
     mock_client = MagicMock()
@@ -26,3 +27,253 @@ def test_extractor_parses_response():
     assert result["disliked"] == ["bugs"]
     assert result["appid"] == 101
     assert result["recommendationid"] == "abc"
+
+
+def test_extractor_uses_cache_on_rerun(tmp_path):
+    mock_client = MagicMock()
+    mock_client.chat.return_value = {
+        "message": {"content": '{"liked": ["fun"], "disliked": []}'}
+    }
+    cache = SqliteResponseCache(str(tmp_path / "cache.sqlite"), Mock())
+
+    extractor = MistralSentimentAspectExtractor(
+        client=mock_client,
+        model_name="dummy-model",
+        prompt="Extract from: {INSERT_REVIEW_HERE}",
+        logger=Mock(),
+        cache=cache
+    )
+
+    review = MagicMock()
+    review.review = "Fun game"
+
+    first = extractor.extract_sentence_sentiment(review)
+    second = extractor.extract_sentence_sentiment(review)
+
+    assert first["liked"] == second["liked"] == ["fun"]
+    mock_client.chat.assert_called_once()
+    assert cache.stats()["hits"] == 1
+
+
+def test_extractor_does_not_cache_unparsable_response(tmp_path):
+    mock_client = MagicMock()
+    mock_client.chat.return_value = {"message": {"content": "no json here"}}
+    cache = SqliteResponseCache(str(tmp_path / "cache.sqlite"), Mock())
+
+    extractor = MistralSentimentAspectExtractor(mock_client, "dummy-model", "{INSERT_REVIEW_HERE}", Mock(), cache=cache)
+    review = MagicMock()
+    review.review = "???"
+
+    assert extractor.extract_sentence_sentiment(review)["error"] == "json_decode"
+    extractor.extract_sentence_sentiment(review)
+
+    assert mock_client.chat.call_count == 2
+
+
+def test_extractor_async_uses_async_client():
+    import asyncio
+
+    mock_async_client = MagicMock()
+
+    async def chat(**kwargs):
+        return {"message": {"content": '{"liked": ["story"], "disliked": []}'}}
+
+    mock_async_client.chat.side_effect = chat
+    mock_client = MagicMock()
+
+    extractor = MistralSentimentAspectExtractor(mock_client, "dummy-model", "{INSERT_REVIEW_HERE}", Mock(),
+                                                async_client=mock_async_client)
+    review = MagicMock()
+    review.review = "Nice story"
+
+    result = asyncio.run(extractor.aextract_sentence_sentiment(review))
+
+    assert result["liked"] == ["story"]
+    mock_client.chat.assert_not_called()
+    assert mock_async_client.chat.call_args[1]["messages"][0]["content"] == "Nice story"
+
+
+def test_extractor_async_without_async_client_falls_back_to_thread():
+    import asyncio
+
+    mock_client = MagicMock()
+    mock_client.chat.return_value = {"message": {"content": '{"liked": [], "disliked": ["bugs"]}'}}
+
+    extractor = MistralSentimentAspectExtractor(mock_client, "dummy-model", "{INSERT_REVIEW_HERE}", Mock())
+    review = MagicMock()
+    review.review = "Buggy"
+
+    result = asyncio.run(extractor.aextract_sentence_sentiment(review))
+
+    assert result["disliked"] == ["bugs"]
+    mock_client.chat.assert_called_once()
+
+
+def _review(rid, text):
+    review = MagicMock()
+    review.review = text
+    review.appid = 101
+    review.recommendationid = rid
+    return review
+
+
+def _batch_extractor(client):
+    return MistralSentimentAspectExtractor(
+        client=client,
+        model_name="dummy-model",
+        prompt="Rules.\nNOW ANALYZE THIS REVIEW:\n{INSERT_REVIEW_HERE}",
+        logger=Mock(),
+        batch_prompt_template="Reviews:\n{INSERT_REVIEWS_HERE}"
+    )
+
+
+def test_extract_batch_uses_one_request_keyed_by_recommendationid():
+    mock_client = MagicMock()
+    mock_client.chat.return_value = {
+        "message": {"content": '{"2": {"liked": ["music"], "disliked": []}, "1": {"liked": [], "disliked": ["bugs"]}}'}
+    }
+    extractor = _batch_extractor(mock_client)
+
+    results = extractor.extract_batch([_review(1, "Buggy."), _review(2, "Great music.")])
+
+    assert mock_client.chat.call_count == 1
+    system, user = mock_client.chat.call_args.kwargs["messages"]
+    # Instrukcje w wiadomości systemowej — ten sam prefiks co w zapytaniach pojedynczych
+    assert system == {"role": "system", "content": "Rules.\n"}
+    assert "Review 1:" in user["content"] and "Review 2:" in user["content"]
+    assert [r["recommendationid"] for r in results] == [1, 2]
+    assert results[0]["disliked"] == ["bugs"]
+    assert results[1]["liked"] == ["music"]
+
+
+def test_extract_batch_retries_missing_reviews_one_by_one():
+    mock_client = MagicMock()
+    mock_client.chat.side_effect = [
+        {"message": {"content": '{"1": {"liked": ["fun"], "disliked": []}}'}},
+        {"message": {"content": '{"liked": [], "disliked": ["price"]}'}},
+    ]
+    extractor = _batch_extractor(mock_client)
+
+    results = extractor.extract_batch([_review(1, "Fun."), _review(2, "Too expensive.")])
+
+    assert mock_client.chat.call_count == 2
+    assert results[0]["liked"] == ["fun"]
+    assert results[1]["disliked"] == ["price"]
+
+
+def test_extract_batch_falls_back_on_invalid_json():
+    mock_client = MagicMock()
+    mock_client.chat.side_effect = [
+        {"message": {"content": "not json"}},
+        {"message": {"content": '{"liked": ["a"], "disliked": []}'}},
+        {"message": {"content": '{"liked": ["b"], "disliked": []}'}},
+    ]
+    extractor = _batch_extractor(mock_client)
+
+    results = extractor.extract_batch([_review(1, "A."), _review(2, "B.")])
+
+    assert mock_client.chat.call_count == 3
+    assert [r["liked"] for r in results] == [["a"], ["b"]]
+    assert all("error" not in r for r in results)
+
+
+def test_extractor_requests_schema_and_parses_plain_json():
+    mock_client = MagicMock()
+    mock_client.chat.return_value = {"message": {"content": '{"liked": ["story {twist}"], "disliked": []}'}}
+    extractor = MistralSentimentAspectExtractor(mock_client, "dummy-model", "Extract: {INSERT_REVIEW_HERE}", Mock())
+
+    result = extractor.extract_sentence_sentiment(_review(1, "Great story twist"))
+
+    # Nawias w treści aspektu psuł regexowe wycinanie JSON-a
+    assert result["liked"] == ["story {twist}"]
+    assert mock_client.chat.call_args.kwargs["format"]["required"] == ["liked", "disliked"]
+
+
+def test_extract_batch_schema_lists_every_review():
+    mock_client = MagicMock()
+    mock_client.chat.return_value = {
+        "message": {"content": '{"1": {"liked": [], "disliked": []}, "2": {"liked": ["a"], "disliked": []}}'}
+    }
+    extractor = _batch_extractor(mock_client)
+
+    extractor.extract_batch([_review(1, "A."), _review(2, "B.")])
+
+    schema = mock_client.chat.call_args.kwargs["format"]
+    assert schema["required"] == ["1", "2"]
+    assert schema["properties"]["2"]["required"] == ["liked", "disliked"]
+
+
+
+def test_extractor_records_request_metrics():
+    from review_analyzer.infrastructure.request_metrics import RequestMetrics
+
+    mock_client = MagicMock()
+    mock_client.chat.return_value = {
+        "message": {"content": '{"liked": [], "disliked": []}'},
+        "eval_count": 12,
+        "load_duration": 3_000_000,
+    }
+    metrics = RequestMetrics("extraction", Mock())
+    extractor = MistralSentimentAspectExtractor(mock_client, "dummy-model", "Extract from: {INSERT_REVIEW_HERE}", Mock(),
+                                                metrics=metrics)
+
+    review = MagicMock()
+    review.review = "Fun game"
+    extractor.extract_sentence_sentiment(review)
+
+    assert len(metrics.requests) == 1
+    assert metrics.requests[0]["kind"] == "single"
+    assert metrics.requests[0]["eval_count"] == 12
+    assert metrics.requests[0]["latency"] >= 0
+
+
+def test_extractor_sends_static_instructions_as_system_message():
+    mock_client = MagicMock()
+    mock_client.chat.return_value = {"message": {"content": '{"liked": [], "disliked": []}'}}
+    extractor = MistralSentimentAspectExtractor(mock_client, "dummy-model", "Rules.\nNOW ANALYZE THIS REVIEW:\n{INSERT_REVIEW_HERE}",
+                                                Mock(), keep_alive="30m")
+
+    extractor.extract_sentence_sentiment(_review(1, "Fun."))
+    extractor.warm_up()
+
+    single, warm_up = mock_client.chat.call_args_list
+    assert single.kwargs["messages"] == [
+        {"role": "system", "content": "Rules.\n"},
+        {"role": "user", "content": "NOW ANALYZE THIS REVIEW:\nFun."},
+    ]
+    assert single.kwargs["keep_alive"] == "30m"
+    assert warm_up.kwargs["messages"][0] == single.kwargs["messages"][0]
+    assert warm_up.kwargs["options"]["num_predict"] == 1
+
+
+@patch('review_analyzer.infrastructure.retry.time.sleep')
+def test_warm_up_does_not_retry_unreachable_host(mock_sleep):
+    """Rozgrzewka to krok „best effort” — jedna próba, bez backoffu polityki ponowień"""
+    import httpx
+    from review_analyzer.infrastructure.retry import RetryingClient, RetryPolicy
+
+    inner = MagicMock()
+    inner.chat.side_effect = httpx.ConnectError("refused")
+    logger = Mock()
+    extractor = MistralSentimentAspectExtractor(RetryingClient(inner, RetryPolicy(logger, attempts=4)), "dummy-model",
+                                                "{INSERT_REVIEW_HERE}", logger)
+
+    extractor.warm_up()
+
+    assert inner.chat.call_count == 1
+    mock_sleep.assert_not_called()
+    logger.warning.assert_called_once()
+
+
+def test_extractor_without_system_prefix_keeps_single_user_message():
+    mock_client = MagicMock()
+    mock_client.chat.return_value = {"message": {"content": '{"liked": [], "disliked": []}'}}
+    extractor = MistralSentimentAspectExtractor(mock_client, "dummy-model", "Rules.\nNOW ANALYZE THIS REVIEW:\n{INSERT_REVIEW_HERE}",
+                                                Mock(), system_prefix=False)
+
+    extractor.extract_sentence_sentiment(_review(1, "Fun."))
+
+    assert mock_client.chat.call_args.kwargs["messages"] == [
+        {"role": "user", "content": "Rules.\nNOW ANALYZE THIS REVIEW:\nFun."}
+    ]
+    assert "keep_alive" not in mock_client.chat.call_args.kwargs
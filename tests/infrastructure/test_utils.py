@@ -1,3 +1,4 @@
+import json
 import pytest
 import pandas as pd
 from unittest.mock import Mock, patch
@@ -79,4 +80,62 @@ class TestUtils:
         mock_analyzer.analyze_data.assert_called_once()
         called_df = mock_analyzer.analyze_data.call_args[0][0]
         assert 'labels' in called_df.columns
-        assert called_df['labels'].dtype == 'object'  # Should be string type after processing 
\ No newline at end of file
+        assert called_df['labels'].dtype == 'object'  # Should be string type after processing 
+
+def test_parquet_analysis_matches_csv(tmp_path):
+    """Test that the analysis of a Parquet table with categorical labels equals the CSV one"""
+    from review_analyzer.infrastructure.dataframe_saver import DataFrameSaverCsv, DataFrameSaverParquet
+    from review_analyzer.infrastructure.dataframe_loader import DataFrameLoaderParquet
+
+    # Arrange
+    df = pd.DataFrame({
+        'appid': [1] * 6,
+        'recommendationid': [1, 1, 2, 3, 3, 4],
+        'aspect': ['music', 'music', 'bugs', 'price', 'music', 'story'],
+        'labels': ['Music', 'Other', None, 'Price ', 'Music', 'Story'],
+    })
+    DataFrameSaverCsv(Mock()).save(df, str(tmp_path / "t.csv"))
+    DataFrameSaverParquet(Mock()).save(df, str(tmp_path / "t.parquet"))
+    loader = DataFrameLoaderParquet(Mock(), columns=['recommendationid', 'aspect', 'labels'], categories=['labels'])
+
+    # Act
+    for name, kwargs in (("csv", {}), ("parquet", {"loader": loader})):
+        analyze_and_save("liked", str(tmp_path / f"t.{name}"), str(tmp_path / f"{name}.json"), Mock(),
+                         str(tmp_path / f"charts_{name}"), **kwargs)
+
+    # Assert
+    csv_result = json.loads((tmp_path / "csv.json").read_text(encoding="utf-8"))
+    parquet_result = json.loads((tmp_path / "parquet.json").read_text(encoding="utf-8"))
+    assert parquet_result == csv_result
+    assert csv_result["label_distribution"]["nan"] == 1
+
+
+def test_update_analysis_with_delta_matches_full_analysis(tmp_path):
+    """Test that appending a delta to the saved state gives the same summary as analysing all rows"""
+    from review_analyzer.infrastructure.dataframe_saver import DataFrameSaverCsv
+    from review_analyzer.infrastructure.utils import update_analysis
+
+    # Arrange
+    df = pd.DataFrame({
+        'appid': [1] * 7,
+        'recommendationid': [1, 1, 2, 3, 3, 4, 5],
+        'aspect': ['music', 'music', 'bugs', 'price', 'music', 'story', 'bugs'],
+        'labels': ['Music', 'Other', None, 'Price', 'Music', 'Story', 'Bugs'],
+    })
+    saver = DataFrameSaverCsv(Mock())
+    saver.save(df, str(tmp_path / "all.csv"))
+    saver.save(df.iloc[:5], str(tmp_path / "base.csv"))
+    saver.save(df.iloc[5:], str(tmp_path / "delta.csv"))
+    state_path = str(tmp_path / "state.json")
+
+    # Act
+    analyze_and_save("liked", str(tmp_path / "all.csv"), str(tmp_path / "full.json"), Mock(), str(tmp_path / "charts"))
+    analyze_and_save("liked", str(tmp_path / "base.csv"), str(tmp_path / "inc.json"), Mock(), str(tmp_path / "charts"),
+                     state_path=state_path)
+    update_analysis("liked", str(tmp_path / "delta.csv"), str(tmp_path / "inc.json"), state_path, Mock(), str(tmp_path / "charts"))
+
+    # Assert
+    full = json.loads((tmp_path / "full.json").read_text(encoding="utf-8"))
+    incremental = json.loads((tmp_path / "inc.json").read_text(encoding="utf-8"))
+    assert incremental == full
+    assert json.loads((tmp_path / "state.json").read_text(encoding="utf-8"))["rows"] == 7
@@ -0,0 +1,33 @@
+from unittest.mock import Mock
+
+import pandas as pd
+
+from review_analyzer.presentation.benchmark_throughput import compare, read_prompts, run_case
+
+
+def test_run_case_measures_real_services_on_fake_backend():
+    """Test that both stages run end to end on the simulated backend and report throughput and tail latency"""
+    # Arrange
+    backend_options = {"latency": 0.0, "distribution": "constant", "slots": 2}
+    prompts = read_prompts()
+
+    # Act
+    extraction = run_case("extraction", "fake", 12, 2, 4, backend_options, prompts, Mock())
+    labeling = run_case("labeling", "fake", 12, 2, 1, backend_options, prompts, Mock())
+
+    # Assert
+    assert extraction["items"] == 12
+    assert extraction["requests"] == 3  # 12 recenzji po 4 na zapytanie
+    assert labeling["items"] == 12 and labeling["requests"] == 12
+    assert all(row["p95"] is not None and row["peak_mem_mb"] > 0 for row in (extraction, labeling))
+
+
+def test_compare_reports_throughput_change(tmp_path):
+    case = {"stage": "labeling", "transport": "fake", "size": 10, "workers": 1, "batch": 1}
+    baseline = tmp_path / "baseline.csv"
+    pd.DataFrame([{**case, "items_per_sec": 100.0, "p95": 0.2, "peak_mem_mb": 1.0}]).to_csv(baseline, index=False)
+
+    merged = compare(pd.DataFrame([{**case, "items_per_sec": 150.0, "p95": 0.1, "peak_mem_mb": 1.0}]), str(baseline))
+
+    assert merged["throughput_change_%"].tolist() == [50.0]
+    assert merged["p95_change_%"].tolist() == [-50.0]
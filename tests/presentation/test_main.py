@@ -18,6 +18,7 @@ class TestMain:
         mock_args.language = "english"
         mock_parser.parse_args.return_value = mock_args
         mock_parser_class.return_value = mock_parser
+        mock_run.return_value = 0
 
         # Act
         result = main()
@@ -39,6 +40,7 @@ class TestMain:
         mock_args.language = "polish"
         mock_parser.parse_args.return_value = mock_args
         mock_parser_class.return_value = mock_parser
+        mock_run.return_value = 0
 
         # Act
         result = main()
@@ -66,7 +68,7 @@ class TestMain:
         # Assert
         # Check that add_argument was called for both workers and language
         add_argument_calls = mock_parser.add_argument.call_args_list
-        assert len(add_argument_calls) == 3
+        assert len(add_argument_calls) == 11
         
         # Check workers argument
         workers_call = add_argument_calls[0]
@@ -80,6 +82,56 @@ class TestMain:
         limit_call = add_argument_calls[2]
         assert limit_call[1]['default'] is None
 
+        input_call = add_argument_calls[3]
+        assert input_call[0][0] == "--input"
+        assert input_call[1]['default'] is None
+
+        resume_call = add_argument_calls[4]
+        assert resume_call[0][0] == "--resume"
+        assert resume_call[1]['const'] == "latest"
+        assert resume_call[1]['default'] is None
+
+        engine_call = add_argument_calls[5]
+        assert engine_call[0][0] == "--engine"
+        assert engine_call[1]['default'] == "threads"
+
+        adaptive_call = add_argument_calls[6]
+        assert adaptive_call[0][0] == "--adaptive"
+        assert adaptive_call[1]['action'] == "store_true"
+
+        hosts_call = add_argument_calls[7]
+        assert hosts_call[0][0] == "--hosts"
+
+        pipeline_call = add_argument_calls[8]
+        assert pipeline_call[0][0] == "--pipeline"
+        assert pipeline_call[1]['action'] == "store_true"
+
+        labeler_call = add_argument_calls[9]
+        assert labeler_call[0][0] == "--labeler"
+        assert labeler_call[1]['default'] == "llm"
+
+        only_errors_call = add_argument_calls[10]
+        assert only_errors_call[0][0] == "--only-errors"
+        assert only_errors_call[1]['const'] == "latest"
+
+    @patch('review_analyzer.presentation.runner.ensure_directories_exist')
+    @patch('review_analyzer.presentation.runner.get_file_handler')
+    @patch('review_analyzer.presentation.runner.Client')
+    @patch('review_analyzer.presentation.runner.setup_logger')
+    def test_main_returns_run_exit_code(self, mock_setup_logger, mock_client_class, mock_file_handler, mock_ensure_dirs,
+                                        tmp_path):
+        """Test that --only-errors without an existing run directory makes main() return 1"""
+        # Arrange
+        argv = ["main.py", "--only-errors", str(tmp_path / "missing")]
+
+        # Act
+        with patch('sys.argv', argv):
+            result = main()
+
+        # Assert
+        assert result == 1
+        mock_setup_logger.return_value.error.assert_called_once()
+
     def test_main_system_exit_behavior(self):
         """Test that main raises SystemExit when called as script"""
         # This test is not needed since main() doesn't actually raise SystemExit
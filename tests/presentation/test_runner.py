@@ -1,10 +1,17 @@
+import json
 import pytest
-from unittest.mock import Mock, MagicMock, patch, mock_open
+from unittest.mock import ANY, Mock, MagicMock, patch, mock_open
 import pandas as pd
+from review_analyzer.infrastructure.sqlite_store import SqliteResultStore
+from review_analyzer.config import MIN_REVIEW_CHARS, OLLAMA_TIMEOUT, OLLAMA_KEEP_ALIVE, OUTPUT_DIR, rebase_paths, PATHS as PATHS_DEFAULT
+from review_analyzer.service.aspect_labeling_service import AspectLabelingService
 from review_analyzer.presentation.runner import (
     sentence_batch, 
     label_batch, 
     analysis_batch, 
+    pipeline_batch,
+    build_labeler,
+    build_fast_path,
     run
 )
 
@@ -160,10 +167,15 @@ class TestRunner:
 
         # Assert
         mock_loader_class.assert_called_once_with(PATHS['raw_reviews'], mock_logger)
-        mock_extractor_class.assert_called_once_with(mock_client, MODEL_ID, "test prompt", mock_logger)
+        mock_extractor_class.assert_called_once_with(mock_client, MODEL_ID, "test prompt", mock_logger, cache=None,
+                                                     async_client=None, batch_prompt_template=None, metrics=ANY,
+                                                     keep_alive=OLLAMA_KEEP_ALIVE)
         mock_saver_class.assert_called_once_with(PATHS['sentence_output'], mock_logger)
-        mock_service_class.assert_called_once_with(mock_extractor, mock_loader, mock_saver, mock_logger, 4, None)
+        mock_service_class.assert_called_once_with(mock_extractor, mock_loader, mock_saver, mock_logger, 4, None,
+                                                   stream=True, checkpoint=True, resume=False, batch_chars=None,
+                                                   limiter=None, dedup=True, min_chars=MIN_REVIEW_CHARS)
         mock_service.run.assert_called_once_with('english')
+        mock_service.extractor.warm_up.assert_called_once()
 
     @patch('review_analyzer.presentation.runner.AspectLabelingService')
     @patch('review_analyzer.presentation.runner.DataFrameSaverCsv')
@@ -211,11 +223,88 @@ class TestRunner:
             client=mock_client,
             model_name=MODEL_ID,
             prompt_template="test label prompt",
-            logger=mock_logger
+            logger=mock_logger,
+            async_client=None,
+            batch_prompt_template=None,
+            metrics=ANY,
+            keep_alive=OLLAMA_KEEP_ALIVE
         )
         assert mock_service_class.call_count == 2  # Called for both liked and disliked
         assert mock_saver.save.call_count == 3  # Called for liked, disliked, and reviews
 
+    @patch('review_analyzer.presentation.runner.MistralSentimentAspectExtractor')
+    def test_sentence_batch_without_result_db_writes_jsonl(self, mock_extractor_class, tmp_path):
+        """Test that PATHS["result_db"] = None keeps extraction results in the JSONL file"""
+        # Arrange
+        dump = tmp_path / "12345_20250209173825.json"
+        dump.write_text(json.dumps({"reviews": [
+            {"language": "english", "review": "Great music", "votes_funny": 0, "voted_up": True, "recommendationid": 1}
+        ]}), encoding="utf-8")
+        prompt = tmp_path / "prompt.txt"
+        prompt.write_text("prompt", encoding="utf-8")
+        PATHS = rebase_paths({
+            'raw_reviews': dump, 'sentence_prompt': prompt, 'result_db': None,
+            'sentence_output': OUTPUT_DIR / "output.jsonl"
+        }, tmp_path / "run")
+        mock_extractor_class.return_value.extract_sentence_sentiment.side_effect = lambda review: {
+            "appid": review.appid, "recommendationid": review.recommendationid, "liked": ["music"], "disliked": []
+        }
+
+        # Act
+        sentence_batch(Mock(), Mock(), PATHS, "test-model", workers=1)
+
+        # Assert
+        assert PATHS['result_db'] is None
+        assert not (tmp_path / "run" / "results.sqlite").exists()
+        rows = [json.loads(line) for line in PATHS['sentence_output'].read_text(encoding="utf-8").splitlines()]
+        assert [row["liked"] for row in rows] == [["music"]]
+
+    def test_disabled_lexicon_sends_every_aspect_to_the_model(self, tmp_path):
+        """Test that PATHS["label_lexicon"] = None disables the fast path instead of crashing"""
+        # Arrange
+        PATHS = rebase_paths({'label_lexicon': None, 'liked_csv': OUTPUT_DIR / "liked.csv"}, tmp_path)
+        labeler = Mock()
+        labeler.label_aspect.return_value = ["Optimization"]
+        df = pd.DataFrame({"aspect": ["fps drops"]})
+
+        # Act
+        fast_path = build_fast_path(Mock(), PATHS)
+        result = AspectLabelingService(labeler, df, Mock(), workers=1, fast_path=fast_path).run()
+
+        # Assert
+        assert fast_path is None
+        labeler.label_aspect.assert_called_once_with("fps drops")
+        assert list(result["labels"]) == ["Optimization"]
+        assert build_fast_path(Mock(), {'label_lexicon': PATHS_DEFAULT['label_lexicon']}).classify("fps drops") == ["Optimization"]
+
+    @patch('review_analyzer.presentation.runner.AspectLabelingService')
+    @patch('review_analyzer.presentation.runner.DataFrameSaverCsv')
+    @patch('review_analyzer.presentation.runner.MistralAspectLabeler')
+    @patch('review_analyzer.presentation.runner.SentenceLoader')
+    def test_label_batch_reads_and_stores_labels_in_result_db(self, mock_loader_class, mock_labeler_class, mock_saver_class,
+                                                             mock_service_class, tmp_path):
+        """Test that label_batch loads aspects from the SQLite store and writes labels back to it"""
+        # Arrange
+        db_path = tmp_path / "results.sqlite"
+        SqliteResultStore(db_path, Mock()).save([{"appid": 1, "recommendationid": "7", "liked": ["music"], "disliked": [],
+                                                  "original_review": "Nice music"}])
+        labeled = pd.DataFrame({"appid": [1], "recommendationid": ["7"], "aspect": ["music"], "labels": ["Audio"]})
+        mock_service_class.return_value.run.return_value = labeled
+        PATHS = {
+            'label_prompt': 'l.txt', 'sentence_output': 'o.jsonl', 'result_db': db_path,
+            'liked_csv': 'liked.csv', 'disliked_csv': 'disliked.csv', 'review_csv': 'reviews.csv'
+        }
+
+        # Act
+        with patch('builtins.open', mock_open(read_data="prompt")):
+            label_batch(Mock(), Mock(), PATHS, "test-model", workers=2)
+
+        # Assert
+        mock_loader_class.assert_not_called()
+        liked_df = mock_service_class.call_args_list[0][0][1]
+        assert liked_df["aspect"].tolist() == ["music"]
+        assert SqliteResultStore(db_path, Mock()).load_labels("liked")["labels"].tolist() == ["Audio"]
+
     @patch('review_analyzer.presentation.runner.analyze_and_save')
     def test_analysis_batch(self, mock_analyze_and_save):
         """Test analysis_batch function"""
@@ -250,6 +339,24 @@ class TestRunner:
         assert second_call[1]['output_path'] == PATHS['disliked_analysis']
         assert second_call[1]['logger'] == mock_logger
         assert second_call[1]['charts_dir'] == PATHS['charts']
+        assert type(first_call[1]['loader']).__name__ == "DataFrameLoaderCsv"
+
+    @patch('review_analyzer.presentation.runner.analyze_and_save')
+    def test_analysis_batch_reads_parquet_with_projection(self, mock_analyze_and_save):
+        """Test that Parquet tables are read with only the analysed columns and categorical labels"""
+        PATHS = {
+            'liked_csv': 'liked.parquet',
+            'disliked_csv': 'disliked.parquet',
+            'liked_analysis': 'liked.json',
+            'disliked_analysis': 'disliked.json',
+            'charts': 'charts'
+        }
+
+        analysis_batch(Mock(), PATHS)
+
+        loader = mock_analyze_and_save.call_args[1]['loader']
+        assert loader.columns == ["recommendationid", "aspect", "labels"]
+        assert loader.categories == ["labels"]
 
     @patch('review_analyzer.presentation.runner.setup_logger')
     @patch('review_analyzer.presentation.runner.Client')
@@ -365,4 +472,225 @@ class TestRunner:
         mock_setup_logger.assert_called_once()
         call_args = mock_setup_logger.call_args
         assert call_args[1]['name'] == "review-analyzer"
-        assert 'handlers' in call_args[1] 
\ No newline at end of file
+        assert 'handlers' in call_args[1] 
+
+    @patch('review_analyzer.presentation.runner.analysis_batch')
+    @patch('review_analyzer.presentation.runner.label_batch')
+    @patch('review_analyzer.presentation.runner.sentence_batch')
+    @patch('review_analyzer.presentation.runner.shard_paths')
+    @patch('review_analyzer.presentation.runner.MultiDumpReviewLoader')
+    @patch('review_analyzer.presentation.runner.setup_logger')
+    @patch('review_analyzer.presentation.runner.Client')
+    def test_run_multi_dump_partitions_per_appid(self, mock_client_class, mock_setup_logger, mock_multi_class,
+                                                 mock_shard_paths, mock_sentence, mock_label, mock_analysis, tmp_path):
+        """Test that a directory input runs the pipeline once per appid on sharded paths"""
+        # Arrange
+        mock_multi = Mock()
+        mock_multi.appids.return_value = [100, 200]
+        mock_multi_class.return_value = mock_multi
+        mock_shard_paths.side_effect = lambda paths, appid: {"appid": appid}
+        PATHS = {'raw_reviews': str(tmp_path), 'log': str(tmp_path / 'test.log')}
+
+        # Act
+        result = run(PATHS, "test-model")
+
+        # Assert
+        assert result == 0
+        assert [c[0][1] for c in mock_shard_paths.call_args_list] == [100, 200]
+        assert mock_sentence.call_count == 2
+        assert mock_sentence.call_args_list[1][1]['loader'] == mock_multi.for_appid.return_value
+        assert mock_label.call_args_list[0][0][2] == {"appid": 100}
+        assert mock_analysis.call_args_list[1][0][1] == {"appid": 200}
+
+    @patch('review_analyzer.presentation.runner.analysis_batch')
+    @patch('review_analyzer.presentation.runner.label_batch')
+    @patch('review_analyzer.presentation.runner.sentence_batch')
+    @patch('review_analyzer.presentation.runner.rebase_paths')
+    @patch('review_analyzer.presentation.runner.setup_logger')
+    @patch('review_analyzer.presentation.runner.Client')
+    def test_run_resume_rebases_outputs(self, mock_client_class, mock_setup_logger, mock_rebase_paths,
+                                        mock_sentence, mock_label, mock_analysis, tmp_path):
+        """Test that resume points every stage at the previous run directory"""
+        # Arrange
+        PATHS = {'raw_reviews': str(tmp_path / '12345_20250209173825.json'), 'log': str(tmp_path / 'test.log')}
+        mock_rebase_paths.return_value = {"rebased": True}
+
+        # Act
+        run(PATHS, "test-model", resume=str(tmp_path))
+        run(PATHS, "test-model", resume=str(tmp_path / "missing"))
+
+        # Assert
+        mock_rebase_paths.assert_called_once_with(PATHS, tmp_path)
+        first, second = mock_sentence.call_args_list
+        assert first[0][2] == {"rebased": True}
+        assert first[1]['resume'] is True
+        assert second[0][2] == PATHS
+        assert second[1]['resume'] is False
+        assert mock_label.call_args_list[0][0][2] == {"rebased": True}
+
+    @patch('review_analyzer.presentation.runner.analysis_batch')
+    @patch('review_analyzer.presentation.runner.label_batch')
+    @patch('review_analyzer.presentation.runner.sentence_batch')
+    @patch('review_analyzer.presentation.runner.rebase_paths')
+    @patch('review_analyzer.presentation.runner.setup_logger')
+    @patch('review_analyzer.presentation.runner.Client')
+    def test_run_only_errors_reprocesses_existing_run(self, mock_client_class, mock_setup_logger, mock_rebase_paths,
+                                                      mock_sentence, mock_label, mock_analysis, tmp_path):
+        """Test that --only-errors patches the previous run in place and skips runs without a directory"""
+        # Arrange
+        PATHS = {'raw_reviews': str(tmp_path / '12345_20250209173825.json'), 'log': str(tmp_path / 'test.log')}
+        mock_rebase_paths.return_value = {"rebased": True}
+
+        # Act
+        result = run(PATHS, "test-model", only_errors=str(tmp_path), pipeline=True)
+        missing = run(PATHS, "test-model", only_errors=str(tmp_path / "missing"))
+
+        # Assert
+        assert result == 0
+        assert missing == 1
+        mock_client_class.assert_called_with(timeout=OLLAMA_TIMEOUT)
+        mock_sentence.assert_called_once()
+        assert mock_sentence.call_args[0][2] == {"rebased": True}
+        assert mock_sentence.call_args[1]['only_errors'] is True
+        assert mock_sentence.call_args[1]['resume'] is False
+        mock_label.assert_called_once()
+        mock_analysis.assert_called_once()
+
+    @patch('review_analyzer.presentation.runner.analysis_batch')
+    @patch('review_analyzer.presentation.runner.label_batch')
+    @patch('review_analyzer.presentation.runner.sentence_batch')
+    @patch('review_analyzer.presentation.runner.setup_logger')
+    @patch('review_analyzer.presentation.runner.Client')
+    def test_run_passes_workers_and_language(self, mock_client_class, mock_setup_logger,
+                                             mock_sentence, mock_label, mock_analysis, tmp_path):
+        """Test that CLI workers, language and adaptive flag reach both stages"""
+        # Arrange
+        PATHS = {'raw_reviews': str(tmp_path / '12345_20250209173825.json'), 'log': str(tmp_path / 'test.log')}
+
+        # Act
+        run(PATHS, "test-model", workers=3, language='polish', adaptive=True)
+
+        # Assert
+        sentence_kwargs = mock_sentence.call_args[1]
+        assert sentence_kwargs['workers'] == 3
+        assert sentence_kwargs['language'] == 'polish'
+        assert sentence_kwargs['adaptive'] is True
+        assert mock_label.call_args[1]['workers'] == 3
+        assert mock_label.call_args[1]['adaptive'] is True
+
+    @patch('review_analyzer.presentation.runner.analysis_batch')
+    @patch('review_analyzer.presentation.runner.label_batch')
+    @patch('review_analyzer.presentation.runner.sentence_batch')
+    @patch('review_analyzer.presentation.runner.OllamaClientPool')
+    @patch('review_analyzer.presentation.runner.setup_logger')
+    def test_run_with_hosts_uses_client_pool(self, mock_setup_logger, mock_pool_class,
+                                             mock_sentence, mock_label, mock_analysis, tmp_path):
+        """Test that a host list replaces the local client with a load-balanced pool"""
+        # Arrange
+        PATHS = {'raw_reviews': str(tmp_path / '12345_20250209173825.json'), 'log': str(tmp_path / 'test.log')}
+
+        # Act
+        run(PATHS, "test-model", hosts="http://gpu1:11434=2,http://gpu2:11434")
+
+        # Assert
+        hosts = [("http://gpu1:11434", 2.0), ("http://gpu2:11434", 1.0)]
+        mock_pool_class.assert_called_once_with(hosts, mock_setup_logger.return_value, client_factory=ANY)
+        assert mock_pool_class.call_args[1]['client_factory'].keywords == {'timeout': OLLAMA_TIMEOUT}
+        # Ponawianie obejmuje całą pulę
+        assert mock_sentence.call_args[0][0].client == mock_pool_class.return_value
+        assert mock_sentence.call_args[1]['hosts'] == hosts
+        assert mock_label.call_args[1]['hosts'] == hosts
+
+    @patch('review_analyzer.presentation.runner.analysis_batch')
+    @patch('review_analyzer.presentation.runner.label_batch')
+    @patch('review_analyzer.presentation.runner.sentence_batch')
+    @patch('review_analyzer.presentation.runner.pipeline_batch')
+    @patch('review_analyzer.presentation.runner.setup_logger')
+    @patch('review_analyzer.presentation.runner.Client')
+    def test_run_pipeline_replaces_sequential_stages(self, mock_client_class, mock_setup_logger, mock_pipeline,
+                                                     mock_sentence, mock_label, mock_analysis, tmp_path):
+        """Test that pipeline mode runs extraction and labeling together, but not when resuming"""
+        # Arrange
+        PATHS = {'raw_reviews': str(tmp_path / '12345_20250209173825.json'), 'log': str(tmp_path / 'test.log')}
+
+        # Act
+        run(PATHS, "test-model", pipeline=True)
+        run(PATHS, "test-model", pipeline=True, resume=str(tmp_path))
+
+        # Assert
+        mock_pipeline.assert_called_once()
+        assert mock_pipeline.call_args[0][2] == PATHS
+        mock_sentence.assert_called_once()
+        assert mock_sentence.call_args[1]['resume'] is True
+        assert mock_analysis.call_count == 2
+
+    @patch('review_analyzer.presentation.runner.DataFrameSaverCsv')
+    @patch('review_analyzer.presentation.runner.PipelineService')
+    @patch('review_analyzer.presentation.runner.MistralAspectLabeler')
+    @patch('review_analyzer.presentation.runner.ReviewProcessingService')
+    @patch('review_analyzer.presentation.runner.JsonlSaver')
+    @patch('review_analyzer.presentation.runner.MistralSentimentAspectExtractor')
+    @patch('review_analyzer.presentation.runner.JsonReviewLoader')
+    def test_pipeline_batch_saves_labeled_frames(self, mock_loader_class, mock_extractor_class, mock_saver_class,
+                                                 mock_service_class, mock_labeler_class, mock_pipeline_class,
+                                                 mock_csv_saver_class):
+        """Test pipeline_batch wiring and CSV outputs"""
+        # Arrange
+        PATHS = {
+            'sentence_prompt': 'p.txt', 'label_prompt': 'l.txt', 'raw_reviews': 'r.json', 'sentence_output': 'o.jsonl',
+            'liked_csv': 'liked.csv', 'disliked_csv': 'disliked.csv', 'review_csv': 'reviews.csv'
+        }
+        mock_pipeline_class.return_value.run.return_value = ("reviews", "liked", "disliked")
+        mock_logger = Mock()
+
+        # Act
+        with patch('builtins.open', mock_open(read_data="prompt")):
+            pipeline_batch(Mock(), mock_logger, PATHS, "test-model", workers=3, language='polish')
+
+        # Assert
+        mock_pipeline_class.assert_called_once_with(mock_service_class.return_value, mock_labeler_class.return_value,
+                                                    mock_logger, 3, batch_size=1, limiter=None, fast_path=None,
+                                                    clusterer=ANY)
+        mock_pipeline_class.return_value.run.assert_called_once_with('polish', extract=None)
+        saver = mock_csv_saver_class.return_value
+        saver.save.assert_any_call("liked", csv_path='liked.csv')
+        saver.save.assert_any_call("disliked", csv_path='disliked.csv')
+        saver.save.assert_any_call("reviews", 'reviews.csv')
+
+    @patch('review_analyzer.presentation.runner.EmbeddingAspectLabeler')
+    @patch('review_analyzer.presentation.runner.MistralAspectLabeler')
+    def test_build_labeler_embedding_wraps_llm_fallback(self, mock_llm_class, mock_embedding_class):
+        """Test that the embedding labeler gets seeds and the LLM labeler as fallback"""
+        # Arrange
+        PATHS = {'label_prompt': 'l.txt', 'label_seeds': 'seeds.json'}
+        mock_logger = Mock()
+
+        # Act
+        with patch('builtins.open', mock_open(read_data='{"Music": ["soundtrack"]}')):
+            labeler, batched = build_labeler(Mock(), mock_logger, PATHS, "test-model", labeler='embedding')
+
+        # Assert
+        assert labeler == mock_embedding_class.return_value
+        assert batched is True
+        args = mock_embedding_class.call_args[0]
+        assert args[2] == {"Music": ["soundtrack"]}
+        assert args[3] == mock_llm_class.return_value
+
+
+def test_importing_config_creates_no_run_directories():
+    """Test that a worker process re-importing config (spawn) leaves no empty output/<timestamp> directory"""
+    import subprocess
+    import sys
+
+    code = (
+        "from pathlib import Path; import review_analyzer; "
+        "out = Path(review_analyzer.__file__).parent / 'output'; "
+        "before = set(out.iterdir()) if out.is_dir() else set(); "
+        "import review_analyzer.config; "
+        "after = set(out.iterdir()) if out.is_dir() else set(); "
+        "print(len(after - before))"
+    )
+
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+
+    assert result.stdout.strip() == "0"
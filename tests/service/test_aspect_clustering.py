@@ -0,0 +1,50 @@
+import random
+from unittest.mock import Mock
+
+from review_analyzer.service.aspect_clustering import AspectClusterer, _lsh_params
+
+
+def test_same_token_sets_share_representative():
+    clusterer = AspectClusterer(Mock())
+
+    reps = clusterer.representatives(["graphics are great", "great graphics", "graphics great", "amazing graphics"])
+
+    assert reps == ["graphics are great"] * 3 + ["amazing graphics"]
+
+
+def test_near_duplicates_join_through_lsh_above_threshold():
+    clusterer = AspectClusterer(Mock(), threshold=0.7)
+
+    reps = clusterer.representatives([
+        "great graphics and smooth animations",
+        "great graphics smooth animations overall",  # Jaccard 4/5
+        "great music",                                # Jaccard 1/5 z pierwszym
+    ])
+
+    assert reps[1] == reps[0]
+    assert reps[2] == "great music"
+
+
+def test_assign_is_incremental_and_matches_batch():
+    keys = ["fun combat system", "combat system fun", "boring story", "story is boring", "bugs"]
+    batch = AspectClusterer(Mock()).representatives(keys)
+    incremental = AspectClusterer(Mock())
+
+    assert [incremental.assign(key) for key in keys] == batch
+
+
+def test_lsh_params_do_not_exceed_threshold():
+    bands, rows = _lsh_params(64, 0.7)
+
+    assert bands * rows == 64
+    assert (1 / bands) ** (1 / rows) <= 0.7
+
+
+def test_distinct_random_aspects_stay_separate():
+    rng = random.Random(0)
+    words = [f"w{i}" for i in range(5000)]
+    keys = [" ".join(rng.sample(words, 4)) for _ in range(2000)]
+
+    reps = AspectClusterer(Mock(), threshold=0.9).representatives(keys)
+
+    assert len(set(reps)) == len(set(keys))
@@ -2,6 +2,7 @@ import pytest
 import pandas as pd
 from unittest.mock import Mock, MagicMock, patch
 from review_analyzer.service.aspect_labeling_service import AspectLabelingService
+from review_analyzer.service.aspect_clustering import AspectClusterer
 
 
 class TestAspectLabelingService:
@@ -62,7 +63,7 @@ class TestAspectLabelingService:
         })
 
         mock_pool_class.return_value.__enter__.return_value = mock_pool
-        mock_pool.imap_unordered.return_value = [
+        mock_pool.imap.return_value = [
             ['visuals', 'rendering'],
             ['mechanics', 'controls'],
             ['narrative', 'plot']
@@ -99,7 +100,7 @@ class TestAspectLabelingService:
         })
 
         mock_pool_class.return_value.__enter__.return_value = mock_pool
-        mock_pool.imap_unordered.return_value = [
+        mock_pool.imap.return_value = [
             [f'label{i}_1', f'label{i}_2'] for i in range(5)
         ]
 
@@ -130,7 +131,7 @@ class TestAspectLabelingService:
         test_df = pd.DataFrame({'aspect': []})
 
         mock_pool_class.return_value.__enter__.return_value = mock_pool
-        mock_pool.imap_unordered.return_value = []
+        mock_pool.imap.return_value = []
 
         service = AspectLabelingService(
             labeler=mock_labeler,
@@ -160,7 +161,7 @@ class TestAspectLabelingService:
         })
 
         mock_pool_class.return_value.__enter__.return_value = mock_pool
-        mock_pool.imap_unordered.return_value = [
+        mock_pool.imap.return_value = [
             ['visuals'],
             ['mechanics']
         ]
@@ -193,7 +194,7 @@ class TestAspectLabelingService:
         })
 
         mock_pool_class.return_value.__enter__.return_value = mock_pool
-        mock_pool.imap_unordered.return_value = [
+        mock_pool.imap.return_value = [
             ['visuals', 'rendering', 'textures', 'lighting']
         ]
 
@@ -226,7 +227,7 @@ class TestAspectLabelingService:
         })
 
         mock_pool_class.return_value.__enter__.return_value = mock_pool
-        mock_pool.imap_unordered.return_value = [
+        mock_pool.imap.return_value = [
             ['visuals', 'rendering'],
             ['mechanics', 'controls']
         ]
@@ -261,7 +262,7 @@ class TestAspectLabelingService:
         })
 
         mock_pool_class.return_value.__enter__.return_value = mock_pool
-        mock_pool.imap_unordered.return_value = [
+        mock_pool.imap.return_value = [
             ['visuals'],
             ['mechanics']
         ]
@@ -294,7 +295,7 @@ class TestAspectLabelingService:
         })
 
         mock_pool_class.return_value.__enter__.return_value = mock_pool
-        mock_pool.imap_unordered.return_value = [
+        mock_pool.imap.return_value = [
             ['visuals'],
             ['mechanics']
         ]
@@ -349,4 +350,154 @@ class TestAspectLabelingService:
         )
 
         # Assert
-        assert service.limit == 0 
\ No newline at end of file
+        assert service.limit == 0 
+
+    def test_run_labels_each_unique_aspect_once(self):
+        """Test that normalized duplicates are labeled once and broadcast to all rows"""
+        # Arrange
+        mock_labeler = Mock()
+        mock_logger = Mock()
+        mock_labeler.label_aspect.side_effect = lambda aspect: {
+            'Great graphics!': ['Graphics'],
+            'bugs': ['Bugs', 'Optimization'],
+        }[aspect]
+
+        test_df = pd.DataFrame({
+            'recommendationid': [1, 2, 3, 4],
+            'aspect': ['Great graphics!', 'great   graphics', 'bugs', 'GREAT GRAPHICS.']
+        })
+
+        service = AspectLabelingService(
+            labeler=mock_labeler,
+            aspect_df=test_df,
+            logger=mock_logger,
+            workers=2
+        )
+
+        # Act
+        result = service.run()
+
+        # Assert
+        assert mock_labeler.label_aspect.call_count == 2
+        assert result['recommendationid'].tolist() == [1, 2, 3, 3, 4]
+        assert result['labels'].tolist() == ['Graphics', 'Graphics', 'Bugs', 'Optimization', 'Graphics']
+        assert result['aspect'].tolist()[1] == 'great   graphics'
+        assert service.stats == {"total_aspects": 4, "unique_aspects": 2, "dedup_ratio": 0.5, "batch_size": 1}
+
+    def test_run_async_matches_sync_result(self):
+        """Test that the asyncio runner labels unique aspects and keeps row order"""
+        # Arrange
+        import asyncio
+
+        class SlowFirstLabeler:
+            calls = 0
+
+            def label_aspect(self, aspect):
+                raise AssertionError("sync path must not be used")
+
+            async def alabel_aspect(self, aspect):
+                SlowFirstLabeler.calls += 1
+                # Pierwszy aspekt kończy się ostatni — wynik musi trafić do właściwych wierszy
+                await asyncio.sleep(0.01 if aspect == 'graphics' else 0)
+                return [aspect.upper()]
+
+        test_df = pd.DataFrame({'aspect': ['graphics', 'story', 'Graphics!', 'music']})
+
+        service = AspectLabelingService(
+            labeler=SlowFirstLabeler(),
+            aspect_df=test_df,
+            logger=Mock(),
+            workers=3
+        )
+
+        # Act
+        result = asyncio.run(service.run_async())
+
+        # Assert
+        assert SlowFirstLabeler.calls == 3
+        assert result['labels'].tolist() == ['GRAPHICS', 'STORY', 'GRAPHICS', 'MUSIC']
+
+    def test_run_batches_aspects_automatically(self):
+        """Test that many unique aspects are sent in batches and flattened back in order"""
+        # Arrange
+        mock_labeler = Mock()
+        mock_labeler.label_aspects.side_effect = lambda batch: [[aspect.upper()] for aspect in batch]
+
+        aspects = [f'aspect {i}' for i in range(64)]
+        test_df = pd.DataFrame({'aspect': aspects})
+
+        service = AspectLabelingService(
+            labeler=mock_labeler,
+            aspect_df=test_df,
+            logger=Mock(),
+            workers=2
+        )
+
+        # Act
+        result = service.run()
+
+        # Assert
+        assert service.stats["batch_size"] == 8  # 64 aspektów / (2 workery * 4 wsady)
+        assert mock_labeler.label_aspects.call_count == 8
+        mock_labeler.label_aspect.assert_not_called()
+        assert result['labels'].tolist() == [aspect.upper() for aspect in aspects]
+
+    def test_resolve_batch_size_respects_char_budget_and_override(self):
+        """Test batch size limits: explicit value, character budget and max size"""
+        # Arrange
+        long_aspects = ['x' * 292] * 1000
+        short_aspects = ['ok'] * 1000
+
+        auto = AspectLabelingService(Mock(), pd.DataFrame({'aspect': []}), Mock(), workers=1)
+        fixed = AspectLabelingService(Mock(), pd.DataFrame({'aspect': []}), Mock(), workers=1, batch_size=3)
+
+        # Act / Assert
+        assert auto._resolve_batch_size(long_aspects) == 5
+        assert auto._resolve_batch_size(short_aspects) == AspectLabelingService.MAX_BATCH_SIZE
+        assert fixed._resolve_batch_size(short_aspects) == 3
+
+    @patch('review_analyzer.service.aspect_labeling_service.Pool')
+    def test_run_fast_path_skips_model_for_lexicon_matches(self, mock_pool_class):
+        """Test that lexicon matches are labeled locally and only the rest reaches the model"""
+        # Arrange
+        mock_labeler = Mock()
+        mock_logger = Mock()
+        mock_pool = Mock()
+        mock_pool_class.return_value.__enter__.return_value = mock_pool
+        mock_pool.imap.side_effect = lambda func, aspects: [["Gameplay"] for _ in aspects]
+        fast_path = Mock()
+        fast_path.classify.side_effect = lambda aspect: ["Music"] if "music" in aspect else None
+
+        df = pd.DataFrame({"aspect": ["great music", "fun combat", "Great music!"]})
+        service = AspectLabelingService(mock_labeler, df, mock_logger, workers=1, fast_path=fast_path)
+
+        # Act
+        result = service.run()
+
+        # Assert
+        assert mock_pool.imap.call_args.args[1] == ["fun combat"]
+        assert list(result["labels"]) == ["Music", "Gameplay", "Music"]
+        assert service.stats["lexicon"] == 1
+        assert service.stats["model"] == 1
+        assert service.stats["lexicon_share"] == 0.5
+
+    @patch('review_analyzer.service.aspect_labeling_service.Pool')
+    def test_run_clusterer_labels_one_representative_per_cluster(self, mock_pool_class):
+        """Test that near-duplicate aspects share the labels of their cluster representative"""
+        # Arrange
+        mock_pool = Mock()
+        mock_pool_class.return_value.__enter__.return_value = mock_pool
+        mock_pool.imap.side_effect = lambda func, aspects: [[f"L:{a}"] for a in aspects]
+
+        df = pd.DataFrame({"aspect": ["graphics are great", "great graphics!", "Graphics: great", "long loading times"]})
+        service = AspectLabelingService(Mock(), df, Mock(), workers=1, clusterer=AspectClusterer(Mock()))
+
+        # Act
+        result = service.run()
+
+        # Assert
+        assert mock_pool.imap.call_args.args[1] == ["graphics are great", "long loading times"]
+        assert list(result["labels"]) == ["L:graphics are great"] * 3 + ["L:long loading times"]
+        assert service.stats["exact_unique_aspects"] == 4
+        assert service.stats["unique_aspects"] == 2
+
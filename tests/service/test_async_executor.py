@@ -0,0 +1,76 @@
+import asyncio
+import pytest
+from contextlib import aclosing
+
+from review_analyzer.service.async_executor import bounded_map
+
+
+def test_bounded_map_respects_concurrency_limit():
+    in_flight = 0
+    peak = 0
+
+    async def work(x):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.001 * (x % 3))
+        in_flight -= 1
+        return x * 2
+
+    async def main():
+        return [r async for r in bounded_map(work, range(50), concurrency=5)]
+
+    results = asyncio.run(main())
+
+    assert sorted(results) == [x * 2 for x in range(50)]
+    assert peak == 5
+
+
+def test_bounded_map_pulls_items_lazily():
+    pulled = []
+
+    def items():
+        for i in range(100):
+            pulled.append(i)
+            yield i
+
+    async def work(x):
+        await asyncio.sleep(0)
+        return x
+
+    async def main():
+        stream = bounded_map(work, items(), concurrency=3)
+        async with aclosing(stream):
+            async for _ in stream:
+                break
+
+    asyncio.run(main())
+
+    assert len(pulled) <= 4
+
+
+def test_bounded_map_cancels_in_flight_tasks():
+    cancelled = []
+
+    async def work(x):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(x)
+            raise
+
+    async def consume():
+        async with aclosing(bounded_map(work, range(4), concurrency=4)) as stream:
+            async for _ in stream:
+                pass
+
+    async def main():
+        task = asyncio.create_task(consume())
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+
+    assert sorted(cancelled) == [0, 1, 2, 3]
@@ -0,0 +1,77 @@
+import asyncio
+from multiprocessing.dummy import Pool
+from unittest.mock import Mock
+
+from review_analyzer.service.concurrency import AdaptiveLimiter
+
+
+def test_limiter_increases_while_latency_is_flat():
+    limiter = AdaptiveLimiter(Mock(), initial=2, max_limit=4, window=5)
+
+    for _ in range(20):
+        limiter.in_flight = limiter.limit  # limit w pełni wykorzystany
+        limiter.release(0.1)
+        limiter.in_flight = 0
+
+    assert limiter.limit == 4
+    assert [limit for _, limit in limiter.history] == [3, 4]
+
+
+def test_limiter_backs_off_on_latency_spike_and_errors():
+    logger = Mock()
+    limiter = AdaptiveLimiter(logger, initial=10, window=5, backoff=0.5)
+
+    for _ in range(5):
+        limiter.in_flight = 1
+        limiter.release(0.1)
+    for _ in range(5):
+        limiter.in_flight = 1
+        limiter.release(1.0)
+    assert limiter.limit == 5
+
+    for _ in range(5):
+        limiter.in_flight = 1
+        limiter.release(0.1, error=True)
+    assert limiter.limit == 2
+    logger.info.assert_called()
+
+
+def test_limiter_wrap_bounds_threads_and_counts_error_results():
+    limiter = AdaptiveLimiter(Mock(), initial=2, max_limit=2, window=100)
+    in_flight, peak = 0, 0
+
+    def work(x):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        in_flight -= 1
+        return {"error": "x"} if x == 3 else {}
+
+    with Pool(processes=8) as pool:
+        results = list(pool.imap(limiter.wrap(work, lambda r: "error" in r), range(10)))
+
+    assert len(results) == 10
+    assert peak <= 2
+    assert limiter._errors == 1
+    assert limiter.in_flight == 0
+
+
+def test_limiter_awrap_bounds_coroutines():
+    limiter = AdaptiveLimiter(Mock(), initial=3, max_limit=3, window=100)
+    in_flight, peak = 0, 0
+
+    async def work(x):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.001)
+        in_flight -= 1
+        return x
+
+    async def main():
+        limited = limiter.awrap(work)
+        return await asyncio.gather(*(limited(x) for x in range(20)))
+
+    assert asyncio.run(main()) == list(range(20))
+    assert peak == 3
+    assert limiter.in_flight == 0
@@ -0,0 +1,104 @@
+import threading
+
+import pytest
+from unittest.mock import Mock
+
+from review_analyzer.service.pipeline_service import PipelineService
+
+
+class FakeExtraction:
+    '''Ekstrakcja wywołująca on_result dla kolejnych wyników, jak ReviewProcessingService._collect.'''
+
+    def __init__(self, results, wait_for=None):
+        self.results = results
+        self.wait_for = wait_for
+        self.on_result = None
+
+    def run(self, language=None):
+        for i, result in enumerate(self.results):
+            self.on_result(result)
+            if i == 0 and self.wait_for is not None:
+                # Drugi wynik dopiero po etykietowaniu pierwszego — etapy muszą działać jednocześnie
+                assert self.wait_for.wait(timeout=5)
+        return self.results
+
+
+def _result(rid, liked, disliked, **extra):
+    return {"appid": 1, "recommendationid": rid, "liked": liked, "disliked": disliked, "original_review": "r", **extra}
+
+
+class TestPipelineService:
+    def test_labels_stream_while_extraction_runs(self):
+        # Arrange
+        first_labeled = threading.Event()
+        labeler = Mock()
+
+        def label(aspect):
+            first_labeled.set()
+            return [aspect.upper()]
+
+        labeler.label_aspect.side_effect = label
+        extraction = FakeExtraction([_result(1, ["music"], []), _result(2, ["Music!"], ["bugs"])], wait_for=first_labeled)
+        service = PipelineService(extraction, labeler, Mock(), workers=2, queue_size=4)
+
+        # Act
+        reviews, liked, disliked = service.run("english")
+
+        # Assert
+        assert list(reviews.columns) == ["appid", "recommendationid", "original_review"]
+        assert len(reviews) == 2
+        assert sorted(liked["recommendationid"]) == [1, 2]
+        assert set(liked["labels"]) == {"MUSIC"}  # "Music!" ma ten sam klucz — etykietowany raz
+        assert disliked.to_dict("records") == [{"appid": 1, "recommendationid": 2, "aspect": "bugs", "labels": "BUGS"}]
+        assert labeler.label_aspect.call_count == 2
+
+    def test_batches_available_aspects_and_keeps_error_column(self):
+        # Arrange
+        labeler = Mock()
+        labeler.label_aspects.side_effect = lambda aspects: [[a] for a in aspects]
+        labeler.label_aspect.side_effect = lambda aspect: [aspect]
+        extraction = FakeExtraction([_result(1, ["a", "b", "c"], ["d"]), _result(2, [], [], error="json_decode")])
+        service = PipelineService(extraction, labeler, Mock(), workers=1, batch_size=10)
+
+        # Act
+        reviews, liked, disliked = service.run()
+
+        # Assert
+        assert "error" in reviews.columns
+        assert sorted(liked["labels"]) == ["a", "b", "c"]
+        assert list(disliked["labels"]) == ["d"]
+
+    def test_consumers_stop_when_extraction_fails(self):
+        # Arrange
+        extraction = Mock()
+        extraction.run.return_value = None
+        service = PipelineService(extraction, Mock(), Mock(), workers=3)
+
+        # Act
+        reviews, liked, disliked = service.run()
+
+        # Assert
+        assert reviews.empty and liked.empty and disliked.empty
+        assert list(liked.columns) == ["appid", "recommendationid", "aspect", "labels"]
+
+    def test_failing_consumer_does_not_block_extraction(self):
+        # Arrange — więcej aspektów niż miejsca w kolejce, każdy claim kończy się błędem
+        fast_path = Mock()
+        fast_path.classify.side_effect = RuntimeError("broken lexicon")
+        extraction = FakeExtraction([_result(i, [f"aspect {i}"], [f"other {i}"]) for i in range(20)])
+        service = PipelineService(extraction, Mock(), Mock(), workers=2, queue_size=2, fast_path=fast_path)
+        finished = []
+
+        # Act
+        def run():
+            with pytest.raises(RuntimeError, match="broken lexicon"):
+                service.run()
+            finished.append(True)
+
+        runner = threading.Thread(target=run, daemon=True)
+        runner.start()
+        runner.join(timeout=10)
+
+        # Assert
+        assert finished == [True]
+        assert fast_path.classify.call_count == 40
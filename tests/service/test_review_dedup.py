@@ -0,0 +1,66 @@
+from unittest.mock import Mock
+
+from review_analyzer.service.review_dedup import ReviewDeduplicator
+
+
+def _review(rid, text):
+    return Mock(appid=1, recommendationid=rid, review=text)
+
+
+def test_trivial_reviews_get_local_empty_result():
+    dedup = ReviewDeduplicator(min_chars=4)
+
+    reviews = [_review(1, "10/10"), _review(2, "yes"), _review(3, "👍"), _review(4, ""), _review(5, "Great game")]
+
+    passed = list(dedup.filter(reviews))
+
+    assert [r.recommendationid for r in passed] == [5]
+    ready = dedup.drain()
+    assert [r["recommendationid"] for r in ready] == [1, 2, 3, 4]
+    assert all(r["liked"] == [] and r["disliked"] == [] for r in ready)
+    assert ready[0]["original_review"] == "10/10"
+    assert dedup.stats == {"extracted": 1, "duplicates": 0, "trivial": 4}
+
+
+def test_identical_texts_are_extracted_once_and_fanned_out():
+    dedup = ReviewDeduplicator()
+    reviews = iter([_review(1, "Great game"), _review(2, "great  GAME"), _review(3, "Other")])
+
+    stream = dedup.filter(reviews)
+    assert next(stream).recommendationid == 1
+    assert next(stream).recommendationid == 3  # 2 czeka na wynik 1
+
+    results = dedup.fan_out({"appid": 1, "recommendationid": 1, "liked": ["fun"], "disliked": [], "original_review": "Great game"})
+
+    assert [r["recommendationid"] for r in results] == [1, 2]
+    assert results[1]["liked"] == ["fun"]
+    assert results[1]["original_review"] == "great  GAME"
+
+
+def test_duplicate_after_completion_is_ready_immediately_but_errors_are_retried():
+    dedup = ReviewDeduplicator()
+    stream = dedup.filter(iter([_review(1, "Nice"), _review(2, "nice"), _review(3, "Bad"), _review(4, "bad")]))
+
+    assert next(stream).recommendationid == 1
+    dedup.fan_out({"appid": 1, "recommendationid": 1, "liked": ["x"], "disliked": []})
+    assert next(stream).recommendationid == 3
+    assert [r["recommendationid"] for r in dedup.drain()] == [2]
+
+    dedup.fan_out({"appid": 1, "recommendationid": 3, "liked": [], "disliked": [], "error": "json_decode"})
+    assert next(stream).recommendationid == 4
+
+
+def test_completed_results_are_kept_in_a_bounded_lru():
+    dedup = ReviewDeduplicator(max_done=2)
+    texts = ["Alpha", "Beta", "Alpha", "Gamma", "Alpha", "Beta"]
+    stream = dedup.filter(iter([_review(i, text) for i, text in enumerate(texts)]))
+
+    extracted = []
+    for review in stream:
+        extracted.append(review.recommendationid)
+        dedup.fan_out({"appid": 1, "recommendationid": review.recommendationid, "liked": [review.review], "disliked": []})
+
+    # "Alpha" odświeżona przez duplikat zostaje w LRU; "Beta" usunięta przez "Gamma" — ekstrahowana ponownie
+    assert extracted == [0, 1, 3, 5]
+    assert len(dedup._done) == 2
+    assert [r["recommendationid"] for r in dedup.drain()] == [2, 4]
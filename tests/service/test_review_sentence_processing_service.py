@@ -232,3 +232,243 @@ class TestReviewProcessingService:
 
         # Assert
         mock_loader.load_reviews.assert_called_once_with(None)
+
+    def test_group_batches_short_reviews_within_char_budget(self):
+        """Test that short reviews are grouped and long ones go alone"""
+        # Arrange
+        service = ReviewProcessingService(Mock(), Mock(), Mock(), Mock(), workers=1, batch_chars=20)
+        reviews = [Mock(review=text) for text in ["a" * 5, "b" * 5, "c" * 5, "d" * 30, "e" * 5]]
+
+        # Act
+        batches = list(service._group(reviews))
+
+        # Assert
+        assert [len(batch) for batch in batches] == [3, 1, 1]
+
+    @patch('review_analyzer.service.review_sentence_processing_service.Pool')
+    def test_run_batches_flattens_results(self, mock_pool_class):
+        """Test that batch outputs are flattened into single results"""
+        # Arrange
+        mock_extractor = Mock()
+        mock_loader = Mock()
+        mock_saver = Mock()
+        mock_pool = Mock()
+        reviews = [Mock(review="short", recommendationid=i) for i in range(3)]
+        mock_loader.load_reviews.return_value = reviews
+        mock_pool_class.return_value.__enter__.return_value = mock_pool
+        mock_pool.imap_unordered.side_effect = lambda func, items: [
+            [{"recommendationid": r.recommendationid} for r in batch] for batch in items
+        ]
+
+        service = ReviewProcessingService(mock_extractor, mock_loader, mock_saver, Mock(), workers=1, batch_chars=100)
+
+        # Act
+        result = service.run(language="english")
+
+        # Assert
+        assert mock_pool.imap_unordered.call_args.args[0] == mock_extractor.extract_batch
+        assert [r["recommendationid"] for r in result] == [0, 1, 2]
+        mock_saver.save.assert_called_once_with(result)
+
+    @patch('review_analyzer.service.review_sentence_processing_service.Pool')
+    def test_run_with_limiter_sizes_pool_to_max_limit(self, mock_pool_class):
+        """Test that the adaptive limiter wraps calls and sets the pool ceiling"""
+        # Arrange
+        mock_loader = Mock()
+        mock_loader.load_reviews.return_value = []
+        mock_pool = Mock()
+        mock_pool.imap_unordered.return_value = []
+        mock_pool_class.return_value.__enter__.return_value = mock_pool
+        limiter = Mock(max_limit=12)
+
+        service = ReviewProcessingService(Mock(), mock_loader, Mock(), Mock(), workers=2, limiter=limiter)
+
+        # Act
+        service.run(language="english")
+
+        # Assert
+        mock_pool_class.assert_called_once_with(processes=12)
+        assert mock_pool.imap_unordered.call_args.args[0] == limiter.wrap.return_value
+        assert limiter.wrap.call_args.args[1]({"error": "x"}) is True
+
+    def test_run_dedup_extracts_identical_texts_once(self):
+        """Test that identical and trivial reviews do not reach the extractor"""
+        # Arrange
+        mock_extractor = Mock()
+        mock_extractor.extract_sentence_sentiment.side_effect = lambda r: {
+            "appid": r.appid, "recommendationid": r.recommendationid, "liked": [r.review], "disliked": [],
+            "original_review": r.review
+        }
+        mock_loader = Mock()
+        texts = ["Great game", "great game", "10/10", "Great  Game", "Bad port"]
+        mock_loader.load_reviews.return_value = [Mock(appid=1, recommendationid=i, review=t) for i, t in enumerate(texts)]
+        mock_logger = Mock()
+
+        service = ReviewProcessingService(mock_extractor, mock_loader, Mock(), mock_logger, workers=2, dedup=True,
+                                          min_chars=4)
+
+        # Act
+        result = service.run(language="english")
+
+        # Assert
+        assert mock_extractor.extract_sentence_sentiment.call_count == 2
+        by_id = {r["recommendationid"]: r for r in result}
+        assert sorted(by_id) == [0, 1, 2, 3, 4]
+        assert by_id[3]["liked"] == ["Great game"]
+        assert by_id[3]["original_review"] == "Great  Game"
+        assert by_id[2]["liked"] == []
+        mock_logger.info.assert_any_call("Ekstrakcja LLM: %(extracted)d, duplikaty: %(duplicates)d, krótkie/bez liter: %(trivial)d",
+                                         {"extracted": 2, "duplicates": 2, "trivial": 1})
+
+    def test_run_stream_consumes_generator(self):
+        """Test streaming mode consumes the loader generator with the real pool"""
+        # Arrange
+        mock_extractor = Mock()
+        mock_loader = Mock()
+        mock_saver = Mock()
+        mock_logger = Mock()
+
+        consumed = []
+
+        def generate():
+            for i in range(20):
+                consumed.append(i)
+                review = Mock()
+                review.recommendationid = i
+                yield review
+
+        mock_loader.iter_reviews.return_value = generate()
+        mock_extractor.extract_sentence_sentiment.side_effect = lambda r: {"recommendationid": r.recommendationid}
+
+        service = ReviewProcessingService(
+            extractor=mock_extractor,
+            loader=mock_loader,
+            saver=mock_saver,
+            logger=mock_logger,
+            workers=2,
+            limit=7,
+            stream=True
+        )
+
+        # Act
+        result = service.run(language="english")
+
+        # Assert
+        mock_loader.iter_reviews.assert_called_once_with("english")
+        mock_loader.load_reviews.assert_not_called()
+        assert sorted(r["recommendationid"] for r in result) == list(range(7))
+        assert len(consumed) == 7
+
+    def test_run_resume_skips_finished_and_appends(self, tmp_path):
+        """Test resume mode skips saved recommendationids and appends new results"""
+        # Arrange
+        from review_analyzer.infrastructure.json_saver import JsonlSaver
+        import json
+
+        output_path = tmp_path / "out.jsonl"
+        output_path.write_text('{"recommendationid": 1}\n{"recommendationid": 2}\n{"recomm', encoding="utf-8")
+
+        reviews = []
+        for i in range(1, 5):
+            review = Mock()
+            review.recommendationid = i
+            reviews.append(review)
+
+        mock_extractor = Mock()
+        mock_extractor.extract_sentence_sentiment.side_effect = lambda r: {"recommendationid": r.recommendationid}
+        mock_loader = Mock()
+        mock_loader.iter_reviews.return_value = iter(reviews)
+
+        service = ReviewProcessingService(
+            extractor=mock_extractor,
+            loader=mock_loader,
+            saver=JsonlSaver(str(output_path), Mock()),
+            logger=Mock(),
+            workers=2,
+            stream=True,
+            resume=True
+        )
+
+        # Act
+        result = service.run()
+
+        # Assert
+        assert result == {"results": 2, "errors": 0}
+        assert mock_extractor.extract_sentence_sentiment.call_count == 2
+        with open(output_path, encoding="utf-8") as f:
+            saved = sorted(json.loads(line)["recommendationid"] for line in f)
+        assert saved == [1, 2, 3, 4]
+
+    @patch('review_analyzer.service.review_sentence_processing_service.Pool')
+    def test_run_checkpoint_writes_results_as_they_complete(self, mock_pool_class):
+        """Test checkpoint mode writes every result and never calls save"""
+        # Arrange
+        mock_saver = Mock()
+        mock_loader = Mock()
+        mock_loader.load_reviews.return_value = [Mock(), Mock()]
+        mock_pool = Mock()
+        mock_pool_class.return_value.__enter__.return_value = mock_pool
+        mock_pool.imap_unordered.return_value = [{"recommendationid": 1}, {"recommendationid": 2, "error": "timeout"}]
+
+        service = ReviewProcessingService(
+            extractor=Mock(),
+            loader=mock_loader,
+            saver=mock_saver,
+            logger=Mock(),
+            checkpoint=True
+        )
+
+        # Act
+        result = service.run()
+
+        # Assert
+        assert result == {"results": 2, "errors": 1}  # wyniki są w pliku, w pamięci tylko liczniki
+        mock_saver.open.assert_called_once_with(append=False)
+        assert mock_saver.write.call_count == 2
+        mock_saver.close.assert_called_once()
+        mock_saver.save.assert_not_called()
+        mock_saver.finished_ids.assert_not_called()
+
+    def test_run_async_uses_async_extractor(self, tmp_path):
+        """Test asyncio runner with checkpointing through the async extractor API"""
+        # Arrange
+        import asyncio
+        import json
+        from review_analyzer.infrastructure.json_saver import JsonlSaver
+
+        reviews = []
+        for i in range(10):
+            review = Mock()
+            review.recommendationid = i
+            reviews.append(review)
+
+        mock_extractor = Mock()
+
+        async def extract(review):
+            await asyncio.sleep(0)
+            return {"recommendationid": review.recommendationid}
+
+        mock_extractor.aextract_sentence_sentiment.side_effect = extract
+        mock_loader = Mock()
+        mock_loader.iter_reviews.return_value = iter(reviews)
+        output_path = tmp_path / "out.jsonl"
+
+        service = ReviewProcessingService(
+            extractor=mock_extractor,
+            loader=mock_loader,
+            saver=JsonlSaver(str(output_path), Mock()),
+            logger=Mock(),
+            workers=4,
+            limit=6,
+            stream=True,
+            checkpoint=True
+        )
+
+        # Act
+        result = asyncio.run(service.run_async("english"))
+
+        # Assert
+        mock_extractor.extract_sentence_sentiment.assert_not_called()
+        assert result == {"results": 6, "errors": 0}
+        with open(output_path, encoding="utf-8") as f:
+            assert sorted(json.loads(line)["recommendationid"] for line in f) == list(range(6))